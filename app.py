@@ -1,25 +1,190 @@
 import streamlit as st
+import atexit
+import subprocess
+import sys
 import time
 import logging
+import threading
 from dotenv import load_dotenv
 import os
 
-from config import MODELS, DEFAULT_TOPIC, TRANSLATIONS
-from llm_services import initialize_model, generate_summary, generate_subtopics
-from utils import setup_logging, load_css
+from config import (
+    MODELS,
+    AUTO_MODEL,
+    ROUTING_SETTINGS,
+    DEFAULT_TOPIC,
+    TRANSLATIONS,
+    HISTORY_PAGE_SIZE,
+    CARD_HTML_CACHE_SIZE,
+    GENERATION_MODES,
+    DEFAULT_GENERATION_MODE,
+    JOB_SETTINGS,
+    METRICS_SETTINGS,
+)
+from utils import (
+    setup_logging,
+    load_css,
+    normalize_topic,
+    requires_api_token,
+    token_fingerprint,
+)
 from database import CardDatabase
+from cache import ResponseCache
+from prefetch import SubtopicPrefetcher
+from similarity import TopicIndex
+from job_queue import JobQueue
+from metrics import (
+    timed,
+    observe_stage,
+    record_stage_error,
+    export_textfile,
+    clear_worker_textfiles,
+    start_metrics_server,
+    stage_summary,
+)
 
 load_dotenv()
 setup_logging()
 logger = logging.getLogger(__name__)
 
+LANGUAGE_LABELS = {"en": "EN 🇬🇧", "pt": "PT 🇧🇷"}
+
 st.set_page_config(
     page_title="LLM Edu Card System",
     page_icon="🎓",
     layout="wide",
     initial_sidebar_state="collapsed",
 )
-load_css("style.css")
+load_css(os.path.join(os.path.dirname(os.path.abspath(__file__)), "style.css"))
+
+
+@st.cache_resource
+def get_response_cache():
+    """Returns the process-wide LLM response cache."""
+    return ResponseCache()
+
+
+@st.cache_resource
+def get_database():
+    """
+    Returns the process-wide card database.
+
+    Its connection pool is shared by every session, instead of each
+    session opening (and never closing) connections of its own.
+    """
+    return CardDatabase()
+
+
+@st.cache_resource
+def get_job_queue():
+    """Returns the process-wide handle on the generation job queue."""
+    return JobQueue(get_database())
+
+
+def spawn_workers(processes, extra_args=(), env=None):
+    """Starts a ``worker.py`` pool on the app's database, stopped at exit."""
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "worker.py",
+            "--processes",
+            str(processes),
+            "--db-path",
+            os.path.abspath(get_job_queue().db.db_path),
+            "--metrics-dir",
+            os.path.abspath(METRICS_SETTINGS["worker_dir"]),
+            *extra_args,
+        ],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+    )
+    atexit.register(process.terminate)
+    logger.info(f"Started {processes} generation workers (pid {process.pid})")
+    return process
+
+
+@st.cache_resource
+def start_job_workers():
+    """
+    Starts the generation worker pool once per server process.
+
+    With JOB_SETTINGS["workers"] set to 0, workers are expected to be run
+    separately with ``python worker.py``. Metrics files left by the workers
+    of earlier runs are removed; running workers rewrite theirs after
+    their next job.
+    """
+    clear_worker_textfiles()
+    if not JOB_SETTINGS["workers"]:
+        return None
+    return spawn_workers(JOB_SETTINGS["workers"])
+
+
+def stop_workers(process):
+    """Stops a ``worker.py`` pool; it finishes its current jobs first."""
+    # SIGTERM sets the pool's stop event; the wait reaps it without
+    # blocking the script run
+    process.terminate()
+    threading.Thread(target=process.wait, name=f"stop-{process.pid}", daemon=True).start()
+    logger.info(f"Stopping generation workers (pid {process.pid})")
+
+
+@st.cache_data(ttl=600, max_entries=16, show_spinner=False)
+def validate_api_token(api_token):
+    """Checks a token typed in the sidebar with the HuggingFace Hub."""
+    from huggingface_hub import whoami
+
+    try:
+        whoami(token=api_token)
+    except Exception as e:
+        logger.warning(f"API token rejected: {e}")
+        return False
+    return True
+
+
+@st.cache_resource(
+    show_spinner=False, max_entries=JOB_SETTINGS["token_pools"], on_release=stop_workers
+)
+def start_token_workers(api_token):
+    """
+    Starts workers dedicated to a token typed in the sidebar.
+
+    The token reaches them only through their environment; jobs carry its
+    fingerprint (see ``JobQueue.claim``), so it is never written to the
+    database. Call only with a validated token; the pools of the least
+    recently used tokens are stopped beyond JOB_SETTINGS["token_pools"].
+    """
+    return spawn_workers(
+        max(1, JOB_SETTINGS["workers"]),
+        ["--dedicated-token"],
+        {**os.environ, "HUGGINGFACEHUB_API_TOKEN": api_token},
+    )
+
+
+@st.cache_resource
+def init_metrics_server():
+    """Starts the /metrics HTTP endpoint once per process if METRICS_PORT is set."""
+    return start_metrics_server()
+
+
+init_metrics_server()
+start_job_workers()
+
+
+@st.cache_resource
+def get_topic_index():
+    """
+    Returns the process-wide near-duplicate topic index.
+
+    The index is filled from the database on a background thread so the
+    first page render doesn't wait for it, and follows later card changes
+    as a listener of the shared database.
+    """
+    index = TopicIndex()
+    db = get_database()
+    db.add_listener(index)
+    threading.Thread(target=index.build, args=(db,), name="topic-index", daemon=True).start()
+    return index
+
 
 if "history" not in st.session_state:
     st.session_state.history = []
@@ -30,9 +195,39 @@ if "language" not in st.session_state:
 if "topic_input" not in st.session_state:
     st.session_state.topic_input = ""
 
+
+def load_history_page(page):
+    """
+    Loads one page of card history into the session state.
+
+    Only the visible page is kept in memory; ``page_cursors[i]`` holds the
+    keyset cursor that starts page ``i``.
+    """
+    cursors = st.session_state.page_cursors
+    page = min(page, len(cursors) - 1)
+    cards, next_cursor = st.session_state.db.get_cards_page(
+        HISTORY_PAGE_SIZE, cursors[page]
+    )
+
+    if not cards and page > 0:
+        return load_history_page(page - 1)
+
+    del cursors[page + 1 :]
+    if next_cursor:
+        cursors.append(next_cursor)
+
+    st.session_state.history_page = page
+    st.session_state.history = cards
+
+
 if "db" not in st.session_state:
-    st.session_state.db = CardDatabase()
-    st.session_state.history = st.session_state.db.get_all_cards(limit=50)
+    st.session_state.db = get_database()
+    get_topic_index()
+    st.session_state.page_cursors = [None]
+    load_history_page(0)
+
+if "prefetcher" not in st.session_state:
+    st.session_state.prefetcher = SubtopicPrefetcher(get_job_queue())
 
 if "show_modal" not in st.session_state:
     st.session_state.show_modal = False
@@ -86,24 +281,32 @@ def setup_sidebar(lang, current_lang_code):
             help=lang["api_token_help"],
         )
         if api_token:
+            if st.session_state.api_token and api_token != st.session_state.api_token:
+                # Stops the workers started for the replaced token, if any;
+                # the new token gets its own once it is validated
+                start_token_workers.clear(st.session_state.api_token)
             st.session_state.api_token = api_token
 
         selected_model_key = st.selectbox(
             lang["model_select_label"],
-            options=list(MODELS.keys()),
+            options=list(MODELS.keys()) + [AUTO_MODEL],
+            format_func=lambda m: lang["auto_model_label"] if m == AUTO_MODEL else m,
             help=lang["model_select_help"],
             on_change=reset_modal_state,
         )
+        model_defaults = MODELS.get(selected_model_key, ROUTING_SETTINGS)
 
         if selected_model_key == "meta-llama/Meta-Llama-3-8B-Instruct":
             st.info(lang["model_desc_llama"])
+        elif selected_model_key == AUTO_MODEL:
+            st.info(lang["model_desc_auto"])
 
         with st.expander(f"🔧 {lang['advanced_params_header']}"):
             temperature = st.slider(
                 lang["temperature_label"],
                 min_value=0.0,
                 max_value=1.0,
-                value=MODELS[selected_model_key]["temperature"],
+                value=model_defaults["temperature"],
                 step=0.1,
                 help=lang["temperature_help"],
                 key=f"temp_slider_{selected_model_key}",
@@ -114,27 +317,49 @@ def setup_sidebar(lang, current_lang_code):
                 lang["max_tokens_label"],
                 min_value=100,
                 max_value=2048,
-                value=MODELS[selected_model_key]["max_tokens"],
+                value=model_defaults["max_tokens"],
                 step=50,
                 help=lang["max_tokens_help"],
                 key=f"token_slider_{selected_model_key}",
                 on_change=reset_modal_state
             )
 
-        with st.expander(f"📊 {lang['db_stats_expander']}"):
-            # (O resto do código permanece igual...)
-            stats = st.session_state.db.get_statistics()
+            st.radio(
+                lang["generation_mode_label"],
+                GENERATION_MODES,
+                index=GENERATION_MODES.index(DEFAULT_GENERATION_MODE),
+                format_func=lambda mode: lang[f"generation_mode_{mode}"],
+                help=lang["generation_mode_help"],
+                key="generation_mode",
+            )
 
-            col1, col2 = st.columns(2)
-            with col1:
-                st.metric(f"{lang['stats_total_metric']}", stats["total_cards"])
-                st.metric(f"{lang['stats_recent_cards']}", stats["recent_cards"])
+            st.checkbox(
+                lang["use_cache_label"],
+                value=True,
+                help=lang["use_cache_help"],
+                key="use_cache",
+            )
 
-            with col2:
-                if stats["by_language"]:
-                    st.write(f"**{lang['stats_by_language']}:**")
-                    for language_code, count in stats["by_language"].items():
-                        st.write(f"- {language_code.upper()}: {count}")
+            if selected_model_key == AUTO_MODEL:
+                st.checkbox(
+                    lang["hedge_label"],
+                    value=ROUTING_SETTINGS["hedge"],
+                    help=lang["hedge_help"],
+                    key="hedge_requests",
+                )
+
+            st.checkbox(
+                lang["prefetch_label"],
+                value=False,
+                help=lang["prefetch_help"],
+                key="prefetch_enabled",
+            )
+
+        with st.expander(f"📊 {lang['db_stats_expander']}"):
+            display_stats_panel(lang)
+
+        with st.expander(f"⏱️ {lang['performance_expander']}"):
+            display_performance_panel(lang)
 
         st.divider()
         st.markdown(f"### 📚 {lang['project_about_header']}")
@@ -155,7 +380,8 @@ def setup_sidebar(lang, current_lang_code):
                     "✅ Sim, excluir tudo", key="confirm_yes", use_container_width=True
                 ):
                     st.session_state.db.clear_all_cards()
-                    st.session_state.history = []
+                    st.session_state.page_cursors = [None]
+                    load_history_page(0)
                     st.session_state.show_clear_confirm = False
                     logger.info("History cleared by user (including database).")
                     st.success("Histórico limpo permanentemente!")
@@ -171,76 +397,214 @@ def setup_sidebar(lang, current_lang_code):
 
     return selected_model_key, temperature, max_tokens
 
-def display_generated_cards(lang):
-    """Displays the generated content cards in grid layout."""
-    if st.session_state.history:
-        st.divider()
 
-        col_h1, col_h2 = st.columns([3, 1])
-        with col_h1:
-            st.markdown(f"### 📑 {lang['generated_cards_header']}")
-        with col_h2:
-            stats = st.session_state.db.get_statistics()
-            st.metric("Total de Cards", stats["total_cards"])
-
-        search_query = st.text_input(
-            f"🔍 {lang["topic_search_header"]}",
-            placeholder=f"{lang['topic_search_input_placeholder']}",
-            key="card_search",
-            help=f"{lang['search_help']}",
+@st.fragment
+def display_stats_panel(lang):
+    """Shows database, cache, prefetch and job counters; reruns on its own."""
+    stats = st.session_state.db.get_statistics(include_usage=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric(f"{lang['stats_total_metric']}", stats["total_cards"])
+        st.metric(f"{lang['stats_recent_cards']}", stats["recent_cards"])
+
+    with col2:
+        if stats["by_language"]:
+            st.write(f"**{lang['stats_by_language']}:**")
+            for language_code, count in stats["by_language"].items():
+                st.write(f"- {language_code.upper()}: {count}")
+
+    if stats["usage"]:
+        st.caption(lang["usage_stats_label"])
+        st.dataframe(
+            [
+                {
+                    "model": row["model"].split("/")[-1],
+                    "lang": row["language"],
+                    "n": row["cards"],
+                    "p50 (s)": round(row["p50_latency"], 2),
+                    "p95 (s)": round(row["p95_latency"], 2),
+                    "tokens/card": round(row["total_tokens"] / row["cards"]),
+                    "retries": row["retries"],
+                }
+                for row in stats["usage"]
+            ],
+            hide_index=True,
+            use_container_width=True,
         )
 
-        if search_query:
-            cards_to_show = st.session_state.db.search_cards(search_query)
-            if not cards_to_show:
-                st.info(f"Nenhum card encontrado para '{search_query}'")
-                return
-        else:
-            cards_to_show = st.session_state.history
-
-        st.markdown('<div class="card-grid">', unsafe_allow_html=True)
-
-        num_cols = 3
-        for i in range(0, len(cards_to_show), num_cols):
-            cols = st.columns(num_cols)
-
-            for j, col in enumerate(cols):
-                card_idx = i + j
-                if card_idx < len(cards_to_show):
-                    card = cards_to_show[card_idx]
-
-                    with col:
-                        st.markdown(
-                            f"""
-                            <div class="card">
-                                <div class="card-topic">{card['topic']}</div>
-                                <div class="card-preview">
-                                    {card['summary'][:80]}...
-                                </div>
-                                <div class="card-meta">
-                                    <span>{card.get('timestamp', 'N/A')}</span>
-                                    <span class="card-model">{card['model'].split('/')[-1]}</span>
-                                </div>
-                            </div>
-                        """,
-                            unsafe_allow_html=True,
-                        )
-
-                        if st.button(
-                            "👁️ Ver Detalhes",
-                            key=f"view_{card['id']}",
-                            use_container_width=True,
-                        ):
-                            st.session_state.selected_card = card
-                            st.session_state.show_modal = True
-                            st.rerun()
-
-        st.markdown("</div>", unsafe_allow_html=True)
+    cache_stats = get_response_cache().get_statistics()
+    st.caption(
+        f"{lang['cache_stats_label']}: {cache_stats['hits']} hits / "
+        f"{cache_stats['misses']} misses ({cache_stats['entries']} entries)"
+    )
+
+    if st.session_state.get("prefetch_enabled"):
+        prefetch_stats = st.session_state.prefetcher.get_statistics()
+        st.caption(
+            f"{lang['prefetch_stats_label']}: {prefetch_stats['used']} used / "
+            f"{prefetch_stats['completed']} prefetched "
+            f"({prefetch_stats['started']}/{prefetch_stats['budget']} budget)"
+        )
+
+    job_stats = get_job_queue().get_statistics()
+    st.caption(
+        f"{lang['job_stats_label']}: {job_stats['queued']} queued / "
+        f"{job_stats['running']} running / {job_stats['failed']} failed"
+    )
+    st.button(f"🔄 {lang['refresh_stats']}", key="refresh_stats")
+
+
+@st.fragment
+def display_performance_panel(lang):
+    """Shows per-stage timing statistics collected by the metrics module."""
+    rows = stage_summary()
+    if not rows:
+        st.caption(lang["performance_empty"])
+        return
+
+    st.dataframe(
+        [
+            {
+                "stage": row["stage"],
+                "model": row["model"].split("/")[-1],
+                "n": row["count"],
+                "mean (s)": round(row["mean"], 3),
+                "p95 (s)": round(row["p95"], 3),
+                "errors": row["errors"],
+            }
+            for row in rows
+        ],
+        hide_index=True,
+        use_container_width=True,
+    )
+
+
+@st.cache_data(max_entries=CARD_HTML_CACHE_SIZE, show_spinner=False)
+def render_card_html(card_id, topic, preview, timestamp, model):
+    """Builds the grid HTML of a card; cached per card across reruns and sessions."""
+    return f"""
+        <div class="card">
+            <div class="card-topic">{topic}</div>
+            <div class="card-preview">
+                {preview}
+            </div>
+            <div class="card-meta">
+                <span>{timestamp}</span>
+                <span class="card-model">{model.split('/')[-1]}</span>
+            </div>
+        </div>
+    """
+
+
+@st.fragment
+def display_generated_cards(lang):
+    """
+    Displays the generated content cards in grid layout.
+
+    Runs as a fragment: searching, paging or opening a card only redraws
+    the history grid, not the sidebar, input area or footer.
+    """
+    with timed("render_cards"):
+        display_card_grid(lang)
 
     if st.session_state.show_modal and st.session_state.selected_card:
         show_card_modal(st.session_state.selected_card, lang)
 
 
+def display_card_grid(lang):
+    """Renders the history header, search box, card grid and pagination."""
+    st.divider()
+
+    col_h1, col_h2 = st.columns([3, 1])
+    with col_h1:
+        st.markdown(f"### 📑 {lang['generated_cards_header']}")
+    with col_h2:
+        stats = st.session_state.db.get_statistics()
+        st.metric("Total de Cards", stats["total_cards"])
+
+    search_query = st.text_input(
+        f"🔍 {lang["topic_search_header"]}",
+        placeholder=f"{lang['topic_search_input_placeholder']}",
+        key="card_search",
+        help=f"{lang['search_help']}",
+    )
+
+    if search_query:
+        cards_to_show = st.session_state.db.search_cards(search_query)
+        if not cards_to_show:
+            st.info(f"Nenhum card encontrado para '{search_query}'")
+            return
+    else:
+        cards_to_show = st.session_state.history
+
+    st.markdown('<div class="card-grid">', unsafe_allow_html=True)
+
+    num_cols = 3
+    for i in range(0, len(cards_to_show), num_cols):
+        cols = st.columns(num_cols)
+
+        for col, card in zip(cols, cards_to_show[i : i + num_cols]):
+            with col:
+                st.markdown(
+                    render_card_html(
+                        card["id"],
+                        card["topic"],
+                        card.get("snippet") or card["summary"][:80] + "...",
+                        card.get("timestamp", "N/A"),
+                        card["model"],
+                    ),
+                    unsafe_allow_html=True,
+                )
+
+                st.button(
+                    "👁️ Ver Detalhes",
+                    key=f"view_{card['id']}",
+                    use_container_width=True,
+                    on_click=open_card,
+                    args=(card,),
+                )
+
+    st.markdown("</div>", unsafe_allow_html=True)
+
+    if not search_query:
+        display_pagination(lang)
+
+
+def display_pagination(lang):
+    """Displays previous/next controls for the paged card history."""
+    page = st.session_state.history_page
+    has_next = len(st.session_state.page_cursors) > page + 1
+
+    if page == 0 and not has_next:
+        return
+
+    col_prev, col_page, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        st.button(
+            f"⬅️ {lang['previous_page']}",
+            key="history_prev",
+            disabled=page == 0,
+            use_container_width=True,
+            on_click=load_history_page,
+            args=(page - 1,),
+        )
+    with col_page:
+        st.markdown(
+            f"<div style='text-align: center;'>{lang['page_label']} {page + 1}</div>",
+            unsafe_allow_html=True,
+        )
+    with col_next:
+        st.button(
+            f"{lang['next_page']} ➡️",
+            key="history_next",
+            disabled=not has_next,
+            use_container_width=True,
+            on_click=load_history_page,
+            args=(page + 1,),
+        )
+
+
 def display_welcome_message(lang):
     """Shows a welcome message and examples if history is empty."""
     if not st.session_state.history:
@@ -277,62 +641,275 @@ def display_footer(lang):
     )
 
 
+def open_card(card):
+    """Callback that opens a card in the details modal."""
+    st.session_state.selected_card = card
+    st.session_state.show_modal = True
+
+
+def generate_anyway():
+    """Callback that re-runs the pending generation skipping the duplicate check."""
+    st.session_state.skip_similarity = True
+    st.session_state.auto_generate = True
+
+
+def find_similar_card(topic, lang_code):
+    """Returns an existing card close enough to the topic, with its score."""
+    if st.session_state.pop("skip_similarity", False):
+        return None, 0.0
+
+    match = get_topic_index().find_similar(topic, lang_code)
+    if not match:
+        return None, 0.0
+
+    return st.session_state.db.get_card(match["card_id"]), match["score"]
+
+
+def display_similar_card_offer(card, score, lang):
+    """Offers an existing near-duplicate card instead of a new generation."""
+    details = f"{score:.0%}"
+    if card["language"] != st.session_state.language:
+        language = LANGUAGE_LABELS.get(card["language"], card["language"])
+        details += ", " + lang["similar_card_language"].format(language=language)
+    st.info(f"💡 {lang['similar_card_found']} **{card['topic']}** ({details})")
+    col_open, col_generate = st.columns(2)
+    with col_open:
+        st.button(
+            f"👁️ {lang['open_existing_card']}",
+            use_container_width=True,
+            on_click=open_card,
+            args=(card,),
+        )
+    with col_generate:
+        st.button(
+            f"🚀 {lang['generate_anyway']}",
+            use_container_width=True,
+            on_click=generate_anyway,
+        )
+
+
+def save_prefetched_card(
+    topic, summary, subtopics, usage, model_name, temp, tokens, lang, lang_code
+):
+    """Saves a card whose content was already prefetched in this session."""
+    with timed("save_card", model_name):
+        card_id = st.session_state.db.save_card(
+            topic=topic,
+            summary=summary,
+            subtopics=subtopics,
+            model=model_name,
+            language=lang_code,
+            temperature=temp,
+            max_tokens=tokens,
+            usage=usage,
+        )
+    load_history_page(0)
+    logger.info(f"Saved prefetched card with ID: {card_id}")
+    st.success(f"✅ {lang['success_message']} {model_name}!")
+
+
+def uses_dedicated_token(model_name, api_key):
+    """Whether a generation needs workers started for a typed-in token."""
+    return (
+        bool(api_key)
+        and api_key != os.getenv("HUGGINGFACEHUB_API_TOKEN", "")
+        and requires_api_token(model_name)
+    )
+
+
+def job_settings(model_name, temp, tokens, mode, lang_code, api_key):
+    """Builds the generation settings shared by card and prefetch jobs."""
+    settings = {
+        "model": model_name,
+        "language": lang_code,
+        "temperature": temp,
+        "max_tokens": tokens,
+        "mode": mode,
+        "hedge": st.session_state.get("hedge_requests", ROUTING_SETTINGS["hedge"]),
+    }
+    # Default workers use the environment token; a typed-in one is served
+    # by dedicated workers, and the job only records which token it needs
+    if uses_dedicated_token(model_name, api_key):
+        start_token_workers(api_key)
+        settings["token_ref"] = token_fingerprint(api_key)
+    return settings
+
+
 def handle_generation(topic, model_name, temp, tokens, api_key, lang, lang_code):
-    """Handles the logic for generating content."""
-    if not api_key:
+    """
+    Handles a generation request by queueing a job for the workers.
+
+    The script run returns right away; ``display_pending_jobs`` polls the
+    job and refreshes the history once the card is saved.
+    """
+    if not api_key and requires_api_token(model_name):
         st.error(f"⚠️ {lang['error_no_token']}")
         logger.warning("Generation attempt without API key.")
         return
+    if uses_dedicated_token(model_name, api_key) and not validate_api_token(api_key):
+        st.error(f"⚠️ {lang['error_invalid_token']}")
+        return
 
-    try:
-        with st.spinner(f"🤖 {lang['spinner_message']} {model_name}..."):
-            logger.info(f"Initializing model: {model_name}")
-            llm = initialize_model(model_name, api_key, temp, tokens)
-
-            progress_bar = st.progress(0, text=f"{lang['spinner_message']}...")
-
-            summary = generate_summary(llm, topic, lang_code)
-            progress_bar.progress(50, text=f"{lang['spinner_message']}...")
-            subtopics = generate_subtopics(llm, topic, lang_code)
-            progress_bar.progress(100, text="Done!")
-            time.sleep(1)
-            progress_bar.empty()
-
-            card_id = st.session_state.db.save_card(
-                topic=topic,
-                summary=summary,
-                subtopics=subtopics,
-                model=model_name,
-                language=lang_code,
-                temperature=temp,
-                max_tokens=tokens,
-            )
+    similar_card, score = find_similar_card(topic, lang_code)
+    if similar_card:
+        logger.info(
+            f"Found similar card {similar_card['id']} for '{topic}' (score={score:.2f})"
+        )
+        display_similar_card_offer(similar_card, score, lang)
+        return
 
-            card_data = {
-                "id": card_id,
-                "topic": topic,
-                "summary": summary,
-                "subtopics": subtopics,
-                "model": model_name,
-                "language": lang_code,
-                "timestamp": time.strftime("%H:%M:%S"),
-                "temperature": temp,
-                "max_tokens": tokens,
-            }
+    mode = st.session_state.get("generation_mode", DEFAULT_GENERATION_MODE)
+    use_cache = st.session_state.get("use_cache", True)
 
-            st.session_state.history.insert(0, card_data)
-            logger.info(f"Successfully generated and saved card with ID: {card_id}")
-            st.success(f"✅ {lang['success_message']} {model_name}!")
+    if use_cache:
+        prefetched = st.session_state.prefetcher.take(
+            topic, lang_code, model_name, temp, tokens
+        )
+        if prefetched:
+            save_prefetched_card(topic, *prefetched, temp, tokens, lang, lang_code)
+            return
+
+    payload = {
+        "topic": topic,
+        **job_settings(model_name, temp, tokens, mode, lang_code, api_key),
+        "use_cache": use_cache,
+    }
+
+    # Sessions asking for the same card at the same time share one job
+    dedup_key = "|".join(
+        str(part) for part in (model_name, lang_code, normalize_topic(topic), temp, tokens, mode)
+    )
 
+    try:
+        job_id = get_job_queue().enqueue("generate_card", payload, dedup_key=dedup_key)
     except Exception as e:
-        logger.error(
-            f"Error during card generation for topic '{topic}': {str(e)}", exc_info=True
+        logger.error(f"Error queueing generation for '{topic}': {e}", exc_info=True)
+        st.error(f"❌ {lang['error_generic']}: {str(e)}")
+        return
+
+    pending = st.session_state.setdefault("pending_jobs", {})
+    if job_id not in pending:
+        pending[job_id] = {
+            "topic": topic,
+            "temperature": temp,
+            "max_tokens": tokens,
+            "mode": mode,
+            "language": lang_code,
+        }
+    logger.info(f"Queued generation job {job_id} for '{topic}'")
+
+
+def finish_job(job, info, lang):
+    """Applies a finished job to the session: index, prefetch and messages."""
+    if job["status"] == "failed":
+        record_stage_error("generation_total", job["payload"]["model"])
+        logger.error(f"Generation job {job['id']} for '{info['topic']}' failed: {job['error']}")
+        error = job["error"] or ""
+        if "authorization" in error.lower() or "401" in error:
+            st.toast(f"❌ {lang['error_generation_failed']}")
+        else:
+            st.toast(f"❌ {lang['error_generic']}: {error}")
+        return
+
+    result = job["result"]
+    observe_stage(
+        "generation_total", result["model"], job["updated_at"] - job["created_at"]
+    )
+
+    # Cards are saved by worker processes, so listeners here aren't notified
+    card = st.session_state.db.get_card(result["card_id"])
+    if card:
+        get_topic_index().on_card_saved(card)
+
+    # Prefetch with the model the user picked (AUTO_MODEL included), which
+    # is what handle_generation looks the subtopic up with
+    if st.session_state.get("prefetch_enabled"):
+        st.session_state.prefetcher.schedule(
+            result["subtopics"],
+            job_settings(
+                job["payload"]["model"],
+                info["temperature"],
+                info["max_tokens"],
+                info["mode"],
+                info["language"],
+                st.session_state.api_token,
+            ),
         )
-        if "authorization" in str(e).lower() or "401" in str(e):
-            st.error(f"❌ {lang['error_generation_failed']}")
+
+    logger.info(f"Job {job['id']} saved card with ID: {result['card_id']}")
+    st.toast(f"✅ {lang['success_message']} {result['model']}!")
+
+
+@st.fragment(run_every=JOB_SETTINGS["poll_interval"])
+def display_pending_jobs(lang):
+    """
+    Shows the status of this session's queued generations, polling the queue.
+
+    Running jobs show the summary streamed so far and the subtopics parsed
+    so far, as published by the worker in the job's partial result.
+    """
+    pending = st.session_state.get("pending_jobs", {})
+    jobs = get_job_queue().get_jobs(list(pending))
+
+    finished = False
+    for job_id, info in list(pending.items()):
+        job = jobs.get(job_id)
+        if job is None or job["status"] in ("done", "failed"):
+            if job is not None:
+                finish_job(job, info, lang)
+            del pending[job_id]
+            finished = True
+        elif job["status"] == "queued":
+            st.info(f"⏳ {lang['job_queued']}: **{info['topic']}**")
+        else:
+            st.progress(
+                max(job["progress"], 0.05),
+                text=f"🤖 {lang['spinner_message']}: {info['topic']}",
+            )
+            partial = job["result"] or {}
+            if partial.get("summary"):
+                st.markdown(partial["summary"] + " ▌")
+            subtopics = partial.get("subtopics", [])
+            if subtopics:
+                cols = st.columns(3)
+                for col, subtopic in zip(cols, subtopics):
+                    col.markdown(f"🔗 {subtopic}")
+
+    if finished:
+        export_textfile()
+        load_history_page(0)
+        st.rerun()
+
+
+def display_topic_graph(card, lang):
+    """Renders the exploration tree reachable from a card as a graph."""
+    graph = st.session_state.db.get_topic_graph(card["topic"], card["language"])
+    if not graph or not any(edge["target"] for edge in graph["edges"]):
+        st.caption(lang["topic_graph_empty"])
+        return
+
+    def quote(text):
+        return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+    lines = [
+        "digraph {",
+        "rankdir=LR;",
+        'node [shape=box, style="rounded,filled", fillcolor="#e8f0fe", fontsize=10];',
+    ]
+    for node in graph["cards"]:
+        lines.append(f"c{node['id']} [label={quote(node['topic'])}];")
+    for i, edge in enumerate(graph["edges"]):
+        if edge["target"] is None:
+            lines.append(
+                f's{i} [label={quote(edge["subtopic"])}, style="rounded,dashed", fillcolor=white];'
+            )
+            lines.append(f"c{edge['source']} -> s{i};")
         else:
-            st.error(f"❌ {lang['error_generic']}: {str(e)}")
-        st.info(lang["error_check_console"])
+            lines.append(f"c{edge['source']} -> c{edge['target']};")
+    lines.append("}")
+
+    st.graphviz_chart("\n".join(lines), use_container_width=True)
+    st.caption(lang["topic_graph_caption"])
 
 
 @st.dialog(title=" ", width="medium")
@@ -356,18 +933,22 @@ def show_card_modal(card, lang):
             st.write(subtopic)
             if st.button(f"🔍 Explorar", key=f"explore_modal_{card['id']}_{i}"):
                 st.session_state.topic_input = subtopic
+                st.session_state.auto_generate = st.session_state.get(
+                    "prefetch_enabled", False
+                )
                 st.session_state.show_modal = False
                 st.rerun()
 
+    with st.expander(f"🌳 {lang['topic_graph_expander']}"):
+        display_topic_graph(card, lang)
+
     st.divider()
 
     if st.button(
         "🗑️ Excluir Card", key=f"delete_modal_{card['id']}", type="secondary"
     ):
         st.session_state.db.delete_card(card["id"])
-        st.session_state.history = [
-            c for c in st.session_state.history if c["id"] != card["id"]
-        ]
+        load_history_page(st.session_state.history_page)
         st.session_state.show_modal = False
         st.success("Card excluído!")
         time.sleep(0.5)
@@ -418,7 +999,8 @@ def main():
             args=(DEFAULT_TOPIC,),
         )
 
-    if generate_btn and st.session_state.topic_input:
+    auto_generate = st.session_state.pop("auto_generate", False)
+    if (generate_btn or auto_generate) and st.session_state.topic_input:
         logger.info(f"User requested generation for: {st.session_state.topic_input}")
         handle_generation(
             st.session_state.topic_input,
@@ -430,6 +1012,9 @@ def main():
             lang_code,
         )
 
+    if st.session_state.get("pending_jobs"):
+        display_pending_jobs(lang)
+
     if st.session_state.history:
         display_generated_cards(lang)
     else:
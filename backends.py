@@ -0,0 +1,297 @@
+"""
+Backends Module - Pluggable Chat Model Backends
+
+Each entry in config.MODELS names the backend serving it ("backend",
+default config.DEFAULT_BACKEND). A backend builds a LangChain chat model
+for the entry, so the chains in llm_services get the same sync (invoke),
+async (ainvoke) and streaming (stream/astream) calls, with per-call
+temperature, max_tokens, stop and stream_usage, whatever serves the model:
+
+- "huggingface": HuggingFace Inference API (or any TGI endpoint_url)
+- "openai": any server exposing the OpenAI chat completions API, such as
+  a self-hosted vLLM, TGI or llama.cpp server, or fake_endpoint.py
+"""
+
+import asyncio
+import json
+import logging
+import os
+import weakref
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+import httpx
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    convert_to_openai_messages,
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+from config import DEFAULT_BACKEND, OPENAI_BACKEND_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+
+def _usage_metadata(usage: Optional[Dict]) -> Optional[Dict]:
+    """Convert an OpenAI usage object into LangChain usage metadata"""
+    if not usage:
+        return None
+    input_tokens = usage.get("prompt_tokens", 0)
+    output_tokens = usage.get("completion_tokens", 0)
+    return {
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "total_tokens": usage.get("total_tokens", input_tokens + output_tokens),
+    }
+
+
+class OpenAICompatibleChat(BaseChatModel):
+    """
+    Chat model for servers exposing the OpenAI chat completions API
+
+    Requests share one keep-alive connection pool per instance (and one
+    per event loop for async calls), so consecutive generations reuse warm
+    connections to the server.
+    """
+
+    model_id: str
+    """Model name sent with every request"""
+    base_url: str
+    """API root, e.g. http://127.0.0.1:8000/v1"""
+    api_key: Optional[str] = None
+    temperature: Optional[float] = None
+    max_tokens: Optional[int] = None
+    stream_usage: bool = False
+    """Whether streams end with a chunk carrying the token usage"""
+    timeout: float = OPENAI_BACKEND_SETTINGS["timeout"]
+    max_connections: int = OPENAI_BACKEND_SETTINGS["max_connections"]
+    max_keepalive_connections: int = OPENAI_BACKEND_SETTINGS["max_keepalive_connections"]
+
+    _client: Optional[httpx.Client] = PrivateAttr(default=None)
+    _async_clients: Any = PrivateAttr(default_factory=weakref.WeakKeyDictionary)
+
+    @property
+    def _llm_type(self) -> str:
+        return "openai-compatible"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_id": self.model_id, "base_url": self.base_url}
+
+    def _client_options(self) -> Dict:
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        return {
+            "base_url": self.base_url.rstrip("/"),
+            "headers": headers,
+            "timeout": self.timeout,
+            "limits": httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+            ),
+        }
+
+    @property
+    def client(self) -> httpx.Client:
+        """Pooled client for sync calls"""
+        if self._client is None:
+            self._client = httpx.Client(**self._client_options())
+        return self._client
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        """Pooled client for async calls on the running event loop"""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(**self._client_options())
+            self._async_clients[loop] = client
+        return client
+
+    def _payload(
+        self, messages: List[BaseMessage], stop: Optional[List[str]], stream: bool, **kwargs
+    ) -> Dict:
+        """Build a chat completions request body"""
+        payload = {
+            "model": self.model_id,
+            "messages": convert_to_openai_messages(messages),
+            "temperature": kwargs.get("temperature", self.temperature),
+            "max_tokens": kwargs.get("max_tokens", self.max_tokens),
+            "stop": stop,
+        }
+        payload = {key: value for key, value in payload.items() if value is not None}
+        if stream:
+            payload["stream"] = True
+            if kwargs.get("stream_usage", self.stream_usage):
+                payload["stream_options"] = {"include_usage": True}
+        return payload
+
+    @staticmethod
+    def _chat_result(data: Dict) -> ChatResult:
+        """Convert a chat completions response into a ChatResult"""
+        choice = data["choices"][0]
+        message = AIMessage(
+            content=choice["message"].get("content") or "",
+            usage_metadata=_usage_metadata(data.get("usage")),
+            response_metadata={
+                "model_name": data.get("model"),
+                "finish_reason": choice.get("finish_reason"),
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    @staticmethod
+    def _parse_event(line: str) -> Optional[Dict]:
+        """Decode one server-sent event line; None for keep-alives and [DONE]"""
+        if not line.startswith("data:"):
+            return None
+        data = line[len("data:") :].strip()
+        if not data or data == "[DONE]":
+            return None
+        return json.loads(data)
+
+    @staticmethod
+    def _event_chunks(event: Dict) -> Iterator[ChatGenerationChunk]:
+        """Turn a streamed chunk into message chunks (content, finish reason and/or usage)"""
+        for choice in event.get("choices") or []:
+            content = (choice.get("delta") or {}).get("content")
+            finish_reason = choice.get("finish_reason")
+            if content or finish_reason:
+                metadata = {"finish_reason": finish_reason} if finish_reason else {}
+                yield ChatGenerationChunk(
+                    message=AIMessageChunk(content=content or "", response_metadata=metadata)
+                )
+        usage = _usage_metadata(event.get("usage"))
+        if usage:
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=usage))
+
+    @staticmethod
+    def _raise_for_status(response: httpx.Response):
+        """Raise an error carrying the status and the server's (read) message"""
+        if response.is_error:
+            raise httpx.HTTPStatusError(
+                f"{response.status_code} {response.reason_phrase}: {response.text[:500]}",
+                request=response.request,
+                response=response,
+            )
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        response = self.client.post(
+            "/chat/completions", json=self._payload(messages, stop, stream=False, **kwargs)
+        )
+        self._raise_for_status(response)
+        return self._chat_result(response.json())
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        response = await self.async_client.post(
+            "/chat/completions", json=self._payload(messages, stop, stream=False, **kwargs)
+        )
+        self._raise_for_status(response)
+        return self._chat_result(response.json())
+
+    def _stream(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ) -> Iterator[ChatGenerationChunk]:
+        # Leaving the block (including closing the generator early) closes
+        # the connection, which stops the generation on the server
+        with self.client.stream(
+            "POST", "/chat/completions", json=self._payload(messages, stop, stream=True, **kwargs)
+        ) as response:
+            if response.is_error:
+                response.read()
+            self._raise_for_status(response)
+            for line in response.iter_lines():
+                event = self._parse_event(line)
+                if event is None:
+                    continue
+                for chunk in self._event_chunks(event):
+                    if run_manager and chunk.message.content:
+                        run_manager.on_llm_new_token(chunk.message.content, chunk=chunk)
+                    yield chunk
+
+    async def _astream(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        async with self.async_client.stream(
+            "POST", "/chat/completions", json=self._payload(messages, stop, stream=True, **kwargs)
+        ) as response:
+            if response.is_error:
+                await response.aread()
+            self._raise_for_status(response)
+            async for line in response.aiter_lines():
+                event = self._parse_event(line)
+                if event is None:
+                    continue
+                for chunk in self._event_chunks(event):
+                    if run_manager and chunk.message.content:
+                        await run_manager.on_llm_new_token(chunk.message.content, chunk=chunk)
+                    yield chunk
+
+
+def huggingface_backend(model_config: Dict, api_token: str) -> BaseChatModel:
+    """
+    HuggingFace Inference API backend
+
+    Requests go to the model's repo_id, unless an endpoint URL is set for
+    the model (endpoint_url) or globally through the LLM_ENDPOINT_URL
+    environment variable (e.g. a local fake_endpoint.py).
+    """
+    from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
+
+    endpoint_url = model_config.get("endpoint_url") or os.getenv("LLM_ENDPOINT_URL")
+    if endpoint_url:
+        llm_base = HuggingFaceEndpoint(
+            endpoint_url=endpoint_url,
+            huggingfacehub_api_token=api_token,
+        )
+    else:
+        llm_base = HuggingFaceEndpoint(
+            repo_id=model_config["repo_id"],
+            huggingfacehub_api_token=api_token,
+        )
+    return ChatHuggingFace(llm=llm_base)
+
+
+def openai_backend(model_config: Dict, api_token: str) -> BaseChatModel:
+    """
+    OpenAI-compatible server backend, at the model's base_url
+
+    The HuggingFace token is never sent there; the server's key, if it
+    needs one, is read from the environment variable named by api_key_env.
+    """
+    api_key_env = model_config.get("api_key_env")
+    return OpenAICompatibleChat(
+        model_id=model_config["repo_id"],
+        base_url=model_config["base_url"],
+        api_key=os.getenv(api_key_env) if api_key_env else None,
+        temperature=model_config.get("temperature"),
+        max_tokens=model_config.get("max_tokens"),
+    )
+
+
+BACKENDS: Dict[str, Callable[[Dict, str], BaseChatModel]] = {
+    "huggingface": huggingface_backend,
+    "openai": openai_backend,
+}
+
+
+def create_chat_model(model_config: Dict, api_token: str) -> BaseChatModel:
+    """
+    Build the chat model for a MODELS entry with its configured backend
+
+    Args:
+        model_config: The MODELS entry
+        api_token: HuggingFace API token (used by the huggingface backend)
+
+    Returns:
+        A LangChain chat model
+
+    Raises:
+        ValueError: If the entry names an unknown backend
+    """
+    backend = model_config.get("backend", DEFAULT_BACKEND)
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}")
+    return BACKENDS[backend](model_config, api_token)
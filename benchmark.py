@@ -0,0 +1,227 @@
+"""
+Generation Benchmark Suite
+
+Measures the card generation pipeline against the local fake endpoint, so
+performance can be tracked (and regressions caught in CI) without network
+access. Results are printed as JSON.
+
+Usage:
+    python benchmark.py --runs 20 --concurrency 8 --output bench.json
+    python benchmark.py --latency 0.5 --token-rate 30 --max-p95 2.5
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import MODELS, GENERATION_MODES, DEFAULT_GENERATION_MODE, TOKEN_BUDGET_SETTINGS
+from fake_endpoint import FakeEndpointConfig, start_server
+from utils import percentile
+
+logger = logging.getLogger(__name__)
+
+
+def summarize(latencies: list[float]) -> dict:
+    """Reduces a list of latencies (seconds) to summary statistics."""
+    if not latencies:
+        return {"count": 0}
+    return {
+        "count": len(latencies),
+        "mean": sum(latencies) / len(latencies),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "max": max(latencies),
+    }
+
+
+def generate_and_save(
+    llm, db, budget, topic, lang_code, mode, model_name, temperature, max_tokens
+):
+    """Runs the same steps as a generation job (worker.generate_card_job), minus the queue."""
+    from llm_services import GenerationUsage, generate_card_content
+
+    usage = GenerationUsage()
+    token_limits = budget.limits(model_name, lang_code, max_tokens) if budget else None
+    summary, subtopics = generate_card_content(
+        llm, topic, lang_code, mode=mode, usage=usage, token_limits=token_limits
+    )
+    db.save_card(
+        topic=topic,
+        summary=summary,
+        subtopics=subtopics,
+        model=model_name,
+        language=lang_code,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        usage=usage.as_dict(),
+    )
+    return subtopics
+
+
+def bench_latency(llm, db, budget, args) -> dict:
+    """Sequential end-to-end card latency."""
+    latencies = []
+    for i in range(args.runs):
+        start = time.perf_counter()
+        generate_and_save(
+            llm, db, budget, f"Latency topic {i}", args.language, args.mode,
+            args.model, args.temperature, args.max_tokens,
+        )
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies)
+
+
+def bench_streaming(llm, args) -> dict:
+    """Time to first summary token and total time of a streamed card."""
+    from llm_services import stream_card_content
+
+    ttft, totals = [], []
+    for i in range(args.runs):
+        start = time.perf_counter()
+        stream, subtopics_future = stream_card_content(llm, f"Stream topic {i}", args.language)
+        first = None
+        for _ in stream:
+            if first is None:
+                first = time.perf_counter() - start
+        subtopics_future.result()
+        ttft.append(first or 0.0)
+        totals.append(time.perf_counter() - start)
+    return {"ttft": summarize(ttft), "total": summarize(totals)}
+
+
+def bench_throughput(llm, db, budget, args) -> dict:
+    """Cards per second with N concurrent generations."""
+    topics = [f"Throughput topic {i}" for i in range(args.runs * args.concurrency)]
+    failures = 0
+
+    def run(topic):
+        start = time.perf_counter()
+        generate_and_save(
+            llm, db, budget, topic, args.language, args.mode,
+            args.model, args.temperature, args.max_tokens,
+        )
+        return time.perf_counter() - start
+
+    latencies = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        for future in [executor.submit(run, topic) for topic in topics]:
+            try:
+                latencies.append(future.result())
+            except Exception as e:
+                failures += 1
+                logger.warning(f"Throughput generation failed: {e}")
+    elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": args.concurrency,
+        "cards": len(latencies),
+        "failures": failures,
+        "elapsed": elapsed,
+        "cards_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        "latency": summarize(latencies),
+    }
+
+
+def bench_parsing(llm, args) -> dict:
+    """Share of subtopic responses parsed into exactly 3 items."""
+    from llm_services import generate_subtopics
+
+    parsed = 0
+    for i in range(args.parse_runs):
+        if len(generate_subtopics(llm, f"Parse topic {i}", args.language)) == 3:
+            parsed += 1
+    return {
+        "responses": args.parse_runs,
+        "parsed": parsed,
+        "success_rate": parsed / args.parse_runs if args.parse_runs else 0.0,
+    }
+
+
+def parse_args(argv=None):
+    """Parses command-line arguments."""
+    parser = argparse.ArgumentParser(description="Benchmark card generation offline.")
+    parser.add_argument("--model", default=next(iter(MODELS)), choices=list(MODELS.keys()))
+    parser.add_argument("--language", default="en", choices=["pt", "en"])
+    parser.add_argument("--mode", default=DEFAULT_GENERATION_MODE, choices=GENERATION_MODES)
+    parser.add_argument("--temperature", type=float, default=0.3)
+    parser.add_argument("--max-tokens", type=int, default=800)
+    parser.add_argument("--runs", type=int, default=10, help="Cards per benchmark")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--parse-runs", type=int, default=30)
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake endpoint latency (s)")
+    parser.add_argument("--token-rate", type=float, default=100.0, help="Fake tokens/s")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--output", help="Also write the JSON results to this file")
+    parser.add_argument(
+        "--max-p95", type=float, help="Exit with status 1 if end-to-end p95 exceeds this (s)"
+    )
+    parser.add_argument(
+        "--min-parse-rate", type=float, help="Exit with status 1 if parse success is lower"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Runs the benchmark suite and prints machine-readable results."""
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    server = start_server(
+        FakeEndpointConfig(args.latency, args.token_rate, args.error_rate, seed=0)
+    )
+    os.environ["LLM_ENDPOINT_URL"] = f"http://127.0.0.1:{server.server_port}"
+
+    from llm_services import initialize_model
+    from database import CardDatabase
+    from token_budget import TokenBudget
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = CardDatabase(os.path.join(tmp, "bench.db"))
+        budget = TokenBudget(db) if TOKEN_BUDGET_SETTINGS["enabled"] else None
+        llm = initialize_model(args.model, "benchmark", args.temperature, args.max_tokens)
+
+        results = {
+            "config": {
+                key: getattr(args, key)
+                for key in (
+                    "model", "language", "mode", "runs", "concurrency",
+                    "latency", "token_rate", "error_rate",
+                )
+            },
+            "end_to_end": bench_latency(llm, db, budget, args),
+            "streaming": bench_streaming(llm, args),
+            "throughput": bench_throughput(llm, db, budget, args),
+            "subtopic_parsing": bench_parsing(llm, args),
+        }
+        db.close()
+
+    server.shutdown()
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+
+    failed = False
+    if args.max_p95 is not None and results["end_to_end"]["p95"] > args.max_p95:
+        logger.error(f"End-to-end p95 above {args.max_p95}s")
+        failed = True
+    if (
+        args.min_parse_rate is not None
+        and results["subtopic_parsing"]["success_rate"] < args.min_parse_rate
+    ):
+        logger.error(f"Subtopic parse success below {args.min_parse_rate}")
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
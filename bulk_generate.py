@@ -0,0 +1,256 @@
+"""
+Bulk Generation CLI
+
+Generates cards for a list of topics without the Streamlit UI, reusing the
+same model, generation and persistence layers as the app.
+
+Usage:
+    python bulk_generate.py topics.txt --language pt --concurrency 4
+    cat topics.txt | python bulk_generate.py - --rate-limit 30
+"""
+
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+
+from config import MODELS, GENERATION_MODES, DEFAULT_GENERATION_MODE, TOKEN_BUDGET_SETTINGS
+from llm_services import GenerationUsage, initialize_model, generate_card_content
+from utils import setup_logging, normalize_topic, percentile, requires_api_token
+from database import CardDatabase
+from cache import ResponseCache
+from token_budget import TokenBudget
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Spaces out request starts to stay under a requests-per-minute limit."""
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until the caller may start its next request."""
+        if not self.interval:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def read_topics(source: str) -> list[str]:
+    """
+    Reads topics from a file (or stdin for '-'), one per line.
+
+    Blank lines and lines starting with '#' are ignored, and repeated
+    topics are only kept once.
+    """
+    if source == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(source, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+
+    topics, seen = [], set()
+    for line in lines:
+        topic = line.strip()
+        if not topic or topic.startswith("#"):
+            continue
+        key = normalize_topic(topic)
+        if key not in seen:
+            seen.add(key)
+            topics.append(topic)
+
+    return topics
+
+
+def parse_args(argv=None):
+    """Parses command-line arguments."""
+    default_model = next(iter(MODELS))
+
+    parser = argparse.ArgumentParser(
+        description="Generate educational cards in bulk from a list of topics."
+    )
+    parser.add_argument(
+        "topics", nargs="?", default="-", help="File with one topic per line ('-' for stdin)"
+    )
+    parser.add_argument("--model", default=default_model, choices=list(MODELS.keys()))
+    parser.add_argument("--language", default="pt", choices=["pt", "en"])
+    parser.add_argument("--temperature", type=float, default=None)
+    parser.add_argument("--max-tokens", type=int, default=None)
+    parser.add_argument(
+        "--mode", default=DEFAULT_GENERATION_MODE, choices=GENERATION_MODES
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=4, help="Cards generated in parallel"
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=0,
+        help="Maximum cards started per minute (0 = unlimited)",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=20, help="Cards committed per transaction"
+    )
+    parser.add_argument("--db-path", default="cards_history.db")
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Bypass the response cache"
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Generate topics even if they already exist in the database",
+    )
+    parser.add_argument(
+        "--token",
+        default=os.getenv("HUGGINGFACEHUB_API_TOKEN", ""),
+        help="HuggingFace API token (defaults to HUGGINGFACEHUB_API_TOKEN; "
+        "not needed for models served by another backend)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Runs a bulk generation job and prints a throughput report."""
+    load_dotenv()
+    setup_logging()
+    args = parse_args(argv)
+
+    if not args.token and requires_api_token(args.model):
+        logger.error(
+            f"{args.model} needs a HuggingFace API token "
+            "(use --token or HUGGINGFACEHUB_API_TOKEN)"
+        )
+        return 1
+
+    temperature = (
+        args.temperature
+        if args.temperature is not None
+        else MODELS[args.model]["temperature"]
+    )
+    max_tokens = args.max_tokens or MODELS[args.model]["max_tokens"]
+
+    db = CardDatabase(args.db_path)
+    cache = ResponseCache()
+
+    topics = read_topics(args.topics)
+    if not args.no_resume:
+        done = {
+            normalize_topic(topic)
+            for topic in db.get_existing_topics(args.language, args.model)
+        }
+        skipped = [t for t in topics if normalize_topic(t) in done]
+        topics = [t for t in topics if normalize_topic(t) not in done]
+        if skipped:
+            logger.info(f"Resuming: skipping {len(skipped)} topics already in the database")
+
+    if not topics:
+        print("Nothing to generate.")
+        db.close()
+        return 0
+
+    llm = initialize_model(args.model, args.token, temperature, max_tokens)
+    limiter = RateLimiter(args.rate_limit)
+    budget = TokenBudget(db) if TOKEN_BUDGET_SETTINGS["enabled"] else None
+
+    def generate(topic):
+        limiter.acquire()
+        usage = GenerationUsage()
+        summary, subtopics = generate_card_content(
+            llm,
+            topic,
+            args.language,
+            cache=cache,
+            use_cache=not args.no_cache,
+            mode=args.mode,
+            usage=usage,
+            token_limits=budget.limits(args.model, args.language, max_tokens) if budget else None,
+        )
+        return summary, subtopics, usage.as_dict()
+
+    latencies, failures, saved = [], 0, 0
+    pending = []
+    job_start = time.perf_counter()
+
+    def flush():
+        nonlocal saved, pending
+        if pending:
+            saved += len(db.save_cards(pending))
+            pending = []
+
+    logger.info(
+        f"Generating {len(topics)} cards with {args.model} "
+        f"(concurrency={args.concurrency}, rate_limit={args.rate_limit}/min)"
+    )
+
+    def collect(future, topic):
+        nonlocal failures
+        try:
+            summary, subtopics, usage = future.result()
+        except Exception as e:
+            failures += 1
+            logger.error(f"Failed to generate card for '{topic}': {e}")
+            return
+
+        latencies.append(usage["latency"])
+        pending.append(
+            {
+                "topic": topic,
+                "summary": summary,
+                "subtopics": subtopics,
+                "model": args.model,
+                "language": args.language,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+                "usage": usage,
+            }
+        )
+
+    executor = ThreadPoolExecutor(max_workers=max(1, args.concurrency))
+    futures = {}
+    try:
+        futures = {executor.submit(generate, topic): topic for topic in topics}
+
+        for future in as_completed(futures):
+            collect(future, futures.pop(future))
+            if len(pending) >= args.batch_size:
+                flush()
+    finally:
+        # Drop queued topics on interruption; they are picked up on resume.
+        # Generations already running are waited for and saved as well.
+        executor.shutdown(wait=True, cancel_futures=True)
+        for future, topic in futures.items():
+            if not future.cancelled():
+                collect(future, topic)
+        flush()
+        db.close()
+
+    elapsed = time.perf_counter() - job_start
+    throughput = saved / elapsed * 60 if elapsed else 0.0
+
+    print(f"Cards saved:   {saved}")
+    print(f"Failures:      {failures}")
+    print(f"Elapsed:       {elapsed:.1f}s")
+    print(f"Throughput:    {throughput:.1f} cards/min")
+    print(f"Latency p50:   {percentile(latencies, 50):.2f}s")
+    print(f"Latency p95:   {percentile(latencies, 95):.2f}s")
+
+    return 0 if not failures else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
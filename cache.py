@@ -0,0 +1,265 @@
+"""
+Cache Module - SQLite Response Cache
+Stores LLM responses on disk so repeated generations skip the endpoint
+"""
+
+import sqlite3
+import json
+import time
+import hashlib
+from typing import Any, Dict, Optional
+import logging
+
+from config import CACHE_SETTINGS
+from utils import normalize_topic
+from metrics import record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    Manages a persistent TTL + LRU cache of LLM responses
+
+    Hit and miss counts are stored next to the entries, so the lookups made
+    by every worker process show up in the app's statistics.
+    """
+
+    def __init__(
+        self,
+        db_path: str = CACHE_SETTINGS["db_path"],
+        ttl_seconds: int = CACHE_SETTINGS["ttl_seconds"],
+        max_entries: int = CACHE_SETTINGS["max_entries"],
+    ):
+        """
+        Initialize cache storage and create tables if needed
+
+        Args:
+            db_path: Path to SQLite cache file
+            ttl_seconds: Lifetime of an entry in seconds (0 disables expiry)
+            max_entries: Maximum number of entries kept before LRU eviction
+        """
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.init_cache()
+
+    def init_cache(self):
+        """Create cache table if it doesn't exist"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+
+                cursor.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS llm_cache (
+                        cache_key TEXT PRIMARY KEY,
+                        value TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        last_accessed REAL NOT NULL
+                    )
+                """
+                )
+
+                cursor.execute(
+                    """
+                    CREATE INDEX IF NOT EXISTS idx_cache_last_accessed
+                    ON llm_cache(last_accessed)
+                """
+                )
+
+                cursor.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS llm_cache_stats (
+                        result TEXT PRIMARY KEY,
+                        count INTEGER NOT NULL
+                    )
+                """
+                )
+
+                conn.commit()
+                logger.info("Response cache initialized successfully")
+
+        except sqlite3.Error as e:
+            logger.error(f"Response cache initialization error: {e}")
+            raise
+
+    @staticmethod
+    def make_key(
+        kind: str,
+        topic: str,
+        model: str,
+        language: str,
+        params: Dict[str, Any],
+        template: str,
+    ) -> str:
+        """
+        Build a deterministic cache key for a generation request
+
+        Args:
+            kind: Type of generation (e.g. 'summary', 'subtopics')
+            topic: The requested topic (normalized before hashing)
+            model: Model name used
+            language: Language code (pt/en)
+            params: Generation parameters (temperature, max_tokens, ...)
+            template: Prompt template string
+
+        Returns:
+            Hex digest identifying the request
+        """
+        template_hash = hashlib.sha256(template.encode("utf-8")).hexdigest()
+        payload = json.dumps(
+            {
+                "kind": kind,
+                "topic": normalize_topic(topic),
+                "model": model,
+                "language": language,
+                "params": params,
+                "template": template_hash,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a cached response
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            The cached value, or None on a miss or expired entry
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                now = time.time()
+
+                cursor.execute(
+                    "SELECT value, created_at FROM llm_cache WHERE cache_key = ?",
+                    (key,),
+                )
+                row = cursor.fetchone()
+
+                if row and self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                    cursor.execute(
+                        "DELETE FROM llm_cache WHERE cache_key = ?", (key,)
+                    )
+                    conn.commit()
+                    row = None
+
+                self._count_lookup(cursor, hit=row is not None)
+                if row is None:
+                    conn.commit()
+                    record_cache_lookup(hit=False)
+                    return None
+
+                cursor.execute(
+                    "UPDATE llm_cache SET last_accessed = ? WHERE cache_key = ?",
+                    (now, key),
+                )
+                conn.commit()
+
+                record_cache_lookup(hit=True)
+                return json.loads(row[0])
+
+        except sqlite3.Error as e:
+            logger.error(f"Error reading response cache: {e}")
+            record_cache_lookup(hit=False)
+            return None
+
+    @staticmethod
+    def _count_lookup(cursor: sqlite3.Cursor, hit: bool):
+        """Add a hit or miss to the persistent lookup counters"""
+        cursor.execute(
+            """
+            INSERT INTO llm_cache_stats (result, count) VALUES (?, 1)
+            ON CONFLICT(result) DO UPDATE SET count = count + 1
+        """,
+            ("hit" if hit else "miss",),
+        )
+
+    def set(self, key: str, value: Any):
+        """
+        Store a response and evict least recently used entries over the cap
+
+        Args:
+            key: Cache key from make_key
+            value: JSON-serializable response to store
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                now = time.time()
+
+                cursor.execute(
+                    """
+                    INSERT OR REPLACE INTO llm_cache
+                    (cache_key, value, created_at, last_accessed)
+                    VALUES (?, ?, ?, ?)
+                """,
+                    (key, json.dumps(value, ensure_ascii=False), now, now),
+                )
+
+                cursor.execute(
+                    """
+                    DELETE FROM llm_cache WHERE cache_key IN (
+                        SELECT cache_key FROM llm_cache
+                        ORDER BY last_accessed DESC
+                        LIMIT -1 OFFSET ?
+                    )
+                """,
+                    (self.max_entries,),
+                )
+                if cursor.rowcount > 0:
+                    logger.info(f"Evicted {cursor.rowcount} entries from response cache")
+
+                conn.commit()
+
+        except sqlite3.Error as e:
+            logger.error(f"Error writing response cache: {e}")
+
+    def clear(self) -> bool:
+        """
+        Delete all cached responses
+
+        Returns:
+            True if cleared successfully
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("DELETE FROM llm_cache")
+                conn.commit()
+                logger.info("Response cache cleared")
+                return True
+
+        except sqlite3.Error as e:
+            logger.error(f"Error clearing response cache: {e}")
+            return False
+
+    def get_statistics(self) -> Dict:
+        """
+        Get cache statistics
+
+        Returns:
+            Dictionary with hit/miss counters (of every process using the
+            cache file) and entry count
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                entries = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+                counts = dict(conn.execute("SELECT result, count FROM llm_cache_stats"))
+        except sqlite3.Error as e:
+            logger.error(f"Error getting cache statistics: {e}")
+            entries, counts = 0, {}
+
+        hits, misses = counts.get("hit", 0), counts.get("miss", 0)
+        lookups = hits + misses
+        return {
+            "entries": entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
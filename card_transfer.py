@@ -0,0 +1,83 @@
+"""
+Card Export/Import CLI
+
+Moves card histories between instances or into analytics tools, streaming
+rows in chunks so large databases never have to fit in memory.
+
+Usage:
+    python card_transfer.py export cards.jsonl
+    python card_transfer.py export cards.parquet --db-path other.db
+    python card_transfer.py import cards.parquet --dedup
+"""
+
+import argparse
+import logging
+import sys
+import time
+
+from database import CardDatabase
+from utils import setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args(argv=None):
+    """Parses command-line arguments."""
+    parser = argparse.ArgumentParser(description="Export or import the card database.")
+    parser.add_argument("--db-path", default="cards_history.db")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Write all cards to a file")
+    export_parser.add_argument("path", help="Output file (.jsonl or .parquet)")
+    export_parser.add_argument(
+        "--chunk-size", type=int, help="Rows read per query (default depends on format)"
+    )
+
+    import_parser = subparsers.add_parser("import", help="Load cards from an export")
+    import_parser.add_argument("path", help="Input file (.jsonl or .parquet)")
+    import_parser.add_argument("--batch-size", type=int, default=10000)
+    import_parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Skip cards whose topic, language and model already exist",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Runs an export or import and reports its throughput."""
+    args = parse_args(argv)
+    setup_logging()
+
+    db = CardDatabase(args.db_path)
+    try:
+        if args.command == "export":
+            export = db.export_parquet if args.path.endswith(".parquet") else db.export_jsonl
+            start = time.perf_counter()
+            if args.chunk_size:
+                count = export(args.path, chunk_size=args.chunk_size)
+            else:
+                count = export(args.path)
+            elapsed = time.perf_counter() - start
+            print(
+                f"Exported {count} cards to {args.path} in {elapsed:.1f}s "
+                f"({count / elapsed if elapsed else 0:.0f} rows/s)"
+            )
+        else:
+            result = db.import_cards(args.path, batch_size=args.batch_size, dedup=args.dedup)
+            print(
+                f"Imported {result['imported']} of {result['read']} cards "
+                f"({result['skipped']} skipped) in {result['seconds']:.1f}s "
+                f"({result['rows_per_second']:.0f} rows/s)"
+            )
+    except Exception as e:
+        logger.error(f"Card {args.command} failed: {e}")
+        return 1
+    finally:
+        db.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
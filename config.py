@@ -5,6 +5,14 @@ This file stores all constants, model definitions, and prompt templates
 for the application.
 """
 
+import os
+
+from dotenv import load_dotenv
+
+# The local server below may be configured in .env, which the entry points
+# only load after importing this module
+load_dotenv()
+
 MODELS = {
     "meta-llama/Meta-Llama-3-8B-Instruct": {
         "repo_id": "meta-llama/Meta-Llama-3-8B-Instruct",
@@ -25,8 +33,109 @@ MODELS = {
     }
 }
 
+# Models use this backend unless their entry sets "backend" (see backends.py)
+DEFAULT_BACKEND = "huggingface"
+
+# Self-hosted server with an OpenAI-compatible API (vLLM, TGI, llama.cpp...),
+# listed when LOCAL_LLM_BASE_URL is set (e.g. http://127.0.0.1:8000/v1)
+if os.getenv("LOCAL_LLM_BASE_URL"):
+    MODELS[os.getenv("LOCAL_LLM_MODEL", "local-model")] = {
+        "backend": "openai",
+        "repo_id": os.getenv("LOCAL_LLM_MODEL", "local-model"),
+        "base_url": os.getenv("LOCAL_LLM_BASE_URL"),
+        "api_key_env": "LOCAL_LLM_API_KEY",
+        "temperature": 0.3,
+        "max_tokens": 800,
+    }
+
+OPENAI_BACKEND_SETTINGS = {
+    "timeout": 120,  # seconds per request
+    "max_connections": 32,  # per client; keep-alive connections are reused
+    "max_keepalive_connections": 16,
+}
+
+MODEL_CLIENT_SETTINGS = {
+    "max_entries": 8,  # cached (model, token) clients
+    "ttl_seconds": 3600,
+}
+
+# Model option that routes each request to the fastest healthy model
+AUTO_MODEL = "auto"
+
+ROUTING_SETTINGS = {
+    "window": 50,  # recent requests tracked per model
+    "min_samples": 5,  # outcomes needed before hedging or health checks use them
+    "max_error_rate": 0.5,
+    "outcome_ttl": 300,  # seconds an error keeps counting against a model
+    "hedge": True,  # fire a duplicate to the runner-up after the p95 delay
+    "hedge_min_delay": 1.0,
+    "temperature": 0.3,  # slider defaults for the auto option
+    "max_tokens": 800,
+}
+
 DEFAULT_TOPIC = "Reinforcement Learning"
 
+HISTORY_PAGE_SIZE = 24
+
+CARD_HTML_CACHE_SIZE = 2000  # rendered card grid entries kept across reruns
+
+GENERATION_MODES = ["two_call", "combined"]
+DEFAULT_GENERATION_MODE = "two_call"
+
+PREFETCH_SETTINGS = {
+    "budget": 6,  # speculative generations per session
+    "priority": -10,  # job priority; claimed only when no user-facing job is queued
+}
+
+SIMILARITY_SETTINGS = {
+    "threshold": 0.8,  # cosine similarity for offering an existing card
+    "max_df": 0.05,
+    "compact_fraction": 0.25,  # rebuild postings once this share of rows is removed
+}
+
+METRICS_SETTINGS = {
+    "textfile": "metrics.prom",  # Prometheus text export ("" to disable)
+    "worker_dir": "metrics.d",  # one text file per worker process, merged by the app
+}
+
+SINGLE_FLIGHT_SETTINGS = {
+    "timeout": 120,  # seconds to wait for an identical generation in progress
+}
+
+JOB_SETTINGS = {
+    # worker processes started by the app (0 = run worker.py yourself)
+    "workers": int(os.getenv("JOB_WORKERS", 2)),
+    "visibility_timeout": 180,  # seconds a claimed job is leased to a worker
+    "heartbeat_interval": 30,  # seconds between lease renewals of a running job
+    "max_attempts": 3,
+    "retry_backoff": 5,  # seconds before the first retry, doubled per attempt
+    "poll_interval": 0.5,  # seconds between queue polls (workers and UI)
+    "stream_interval": 0.25,  # seconds between partial summary writes of a job
+    "token_pools": 2,  # worker pools kept for tokens typed in the sidebar (oldest stopped)
+}
+
+TOKEN_BUDGET_SETTINGS = {
+    "enabled": True,  # size each call from past outputs (the slider stays the ceiling)
+    "window": 200,  # recent cards sampled per model and language
+    "min_samples": 20,  # below this, the defaults are used
+    "percentile": 99,
+    "headroom": 1.25,
+    "tokens_per_char": 0.35,  # until stored usage allows calibrating it
+    "refresh_seconds": 300,
+    "defaults": {"summary": 400, "subtopics": 96},
+    "min_tokens": {"summary": 160, "subtopics": 48},
+    "card_overhead": 48,  # JSON syntax of the combined card response
+}
+
+# Generation stops once the model starts a 4th subtopic
+SUBTOPIC_STOP_SEQUENCES = ["\n4.", "\n4)"]
+
+CACHE_SETTINGS = {
+    "db_path": "llm_cache.db",
+    "ttl_seconds": 7 * 24 * 3600,
+    "max_entries": 5000,
+}
+
 TRANSLATIONS = {
     "en": {
         "app_title": "Intelligent Educational Card System",
@@ -42,6 +151,33 @@ TRANSLATIONS = {
         "temperature_help": "Controls the creativity of the responses",
         "max_tokens_label": "Max New Tokens",
         "max_tokens_help": "Limit of tokens in the response",
+        "use_cache_label": "Use response cache",
+        "use_cache_help": "Reuse recent responses for the same topic and settings. Uncheck to force a fresh generation.",
+        "cache_stats_label": "Response cache",
+        "prefetch_label": "Prefetch subtopic cards",
+        "prefetch_help": "Generates the subtopics of each new card in the background so exploring them is instant. Uses extra API calls.",
+        "prefetch_stats_label": "Prefetch",
+        "performance_expander": "Performance",
+        "performance_empty": "No timings recorded yet.",
+        "similar_card_found": "A similar card already exists:",
+        "similar_card_language": "card in {language}",
+        "topic_graph_expander": "Exploration map",
+        "topic_graph_empty": "No subtopics of this card have been explored yet.",
+        "topic_graph_caption": "Solid boxes are generated cards; dashed boxes are subtopics not explored yet.",
+        "auto_model_label": "Auto (fastest available)",
+        "model_desc_auto": "Each card goes to the model answering fastest right now; the model used is shown on the card.",
+        "hedge_label": "Hedge slow requests",
+        "hedge_help": "If the chosen model is slower than usual, also ask the next fastest model and keep the first answer.",
+        "job_queued": "Queued",
+        "job_stats_label": "Generation queue",
+        "refresh_stats": "Refresh",
+        "usage_stats_label": "Latency and tokens per generated card",
+        "open_existing_card": "Open existing card",
+        "generate_anyway": "Generate anyway",
+        "generation_mode_label": "Generation mode",
+        "generation_mode_help": "Two calls streams the summary; combined asks for summary and subtopics in a single request.",
+        "generation_mode_two_call": "Two calls (streaming)",
+        "generation_mode_combined": "Combined (single request)",
         "project_about_header": "About the Project",
         "project_about_course": "Course",
         "project_about_institution": "Institution",
@@ -57,7 +193,7 @@ TRANSLATIONS = {
         "stats_header": "Statistics",
         "stats_cards_generated": "Cards Generated",
         "stats_current_model": "Current Model",
-        "search_help": "Press enter to search cards by topic",
+        "search_help": "Press enter to search cards by topic, summary or subtopics (accents are ignored)",
         "spinner_message": "Processing with",
         "db_stats_expander": "Database Statistics",
         "stats_total_metric": "Cards Generated",
@@ -66,11 +202,15 @@ TRANSLATIONS = {
         "topic_search_input_placeholder": "Enter a topic to search...",
         "topic_search_header": "Search Cards",
         "error_no_token": "Please enter your HuggingFace API Token in the sidebar!",
+        "error_invalid_token": "The HuggingFace API Token in the sidebar was not accepted.",
         "error_generation_failed": "API Error: Invalid HuggingFace API Token. Please check your token in the sidebar.",
         "error_generic": "An error occurred",
         "error_check_console": "Please check the console or logs for more details.",
         "success_message": "Cards generated successfully using",
         "generated_cards_header": "Generated Cards",
+        "previous_page": "Previous",
+        "next_page": "Next",
+        "page_label": "Page",
         "summary_box_header": "Explanatory Summary",
         "subtopics_header": "Related Subtopics",
         "subtopic_card_header": "Subtopic",
@@ -106,6 +246,15 @@ Expected format:
 3. [Specific Subtopic 3]
 
 Be specific and educational. Respond ONLY with the 3 items, with no introduction or conclusion.
+""",
+        "card_template": """
+You are an expert educator and curriculum designer. For the topic "{question}", produce:
+- "summary": a clear, objective and educational explanation with the main definition, key related concepts and practical applications, in at most 150 words.
+- "subtopics": EXACTLY 3 specific and relevant subtopics.
+Your response must be in **English**.
+
+Respond ONLY with a JSON object in this format, with no introduction or conclusion:
+{{"summary": "...", "subtopics": ["...", "...", "..."]}}
 """,
     },
     "pt": {
@@ -122,6 +271,33 @@ Be specific and educational. Respond ONLY with the 3 items, with no introduction
         "temperature_help": "Controla a criatividade das respostas",
         "max_tokens_label": "Máximo de Tokens",
         "max_tokens_help": "Limite de tokens na resposta",
+        "use_cache_label": "Usar cache de respostas",
+        "use_cache_help": "Reaproveita respostas recentes para o mesmo tema e configurações. Desmarque para forçar uma nova geração.",
+        "cache_stats_label": "Cache de respostas",
+        "prefetch_label": "Pré-carregar cards de subtemas",
+        "prefetch_help": "Gera os subtemas de cada novo card em segundo plano para que explorá-los seja instantâneo. Usa chamadas extras à API.",
+        "prefetch_stats_label": "Pré-carregamento",
+        "performance_expander": "Desempenho",
+        "performance_empty": "Nenhuma medição registrada ainda.",
+        "similar_card_found": "Já existe um card parecido:",
+        "similar_card_language": "card em {language}",
+        "topic_graph_expander": "Mapa de exploração",
+        "topic_graph_empty": "Nenhum subtema deste card foi explorado ainda.",
+        "topic_graph_caption": "Caixas preenchidas são cards gerados; caixas tracejadas são subtemas ainda não explorados.",
+        "auto_model_label": "Automático (mais rápido disponível)",
+        "model_desc_auto": "Cada card vai para o modelo que está respondendo mais rápido no momento; o modelo usado aparece no card.",
+        "hedge_label": "Duplicar requisições lentas",
+        "hedge_help": "Se o modelo escolhido estiver mais lento que o normal, também consulta o próximo mais rápido e usa a primeira resposta.",
+        "job_queued": "Na fila",
+        "job_stats_label": "Fila de geração",
+        "refresh_stats": "Atualizar",
+        "usage_stats_label": "Latência e tokens por card gerado",
+        "open_existing_card": "Abrir card existente",
+        "generate_anyway": "Gerar mesmo assim",
+        "generation_mode_label": "Modo de geração",
+        "generation_mode_help": "Duas chamadas exibe o resumo em streaming; combinado pede resumo e subtemas em uma única requisição.",
+        "generation_mode_two_call": "Duas chamadas (streaming)",
+        "generation_mode_combined": "Combinado (requisição única)",
         "project_about_header": "Sobre o Projeto",
         "project_about_course": "Disciplina",
         "project_about_institution": "Instituição",
@@ -141,16 +317,20 @@ Be specific and educational. Respond ONLY with the 3 items, with no introduction
         "stats_total_metric": "Total de Cards",
         "stats_recent_cards": "Cards Recentes (7 dias)",
         "stats_by_language": "Por Idioma",
-        "search_help": "Pressione Enter para buscar cards relacionados ao tema.",
+        "search_help": "Pressione Enter para buscar cards por tema, resumo ou subtemas (acentos são ignorados).",
         "topic_search_input_placeholder": "Digite um tema para buscar...",
         "topic_search_header": "Buscar cards",
         "spinner_message": "Processando com",
         "error_no_token": "Por favor, insira seu Token da API HuggingFace na barra lateral!",
+        "error_invalid_token": "O Token da API HuggingFace da barra lateral não foi aceito.",
         "error_generation_failed": "Erro de API: Token da API HuggingFace inválido. Por favor, verifique seu token na barra lateral.",
         "error_generic": "Ocorreu um erro",
         "error_check_console": "Por favor, verifique o console ou os logs para mais detalhes.",
         "success_message": "Cards gerados com sucesso usando",
         "generated_cards_header": "Cards Gerados",
+        "previous_page": "Anterior",
+        "next_page": "Próxima",
+        "page_label": "Página",
         "summary_box_header": "Resumo Explicativo",
         "subtopics_header": "Subtemas Relacionados",
         "subtopic_card_header": "Subtema",
@@ -186,6 +366,15 @@ Formato esperado:
 3. [Subtema específico 3]
 
 Seja específico e educacional. Responda APENAS com os 3 itens, sem introdução ou conclusão.
+""",
+        "card_template": """
+Você é um educador especialista e designer instrucional. Para o tema "{question}", produza:
+- "summary": uma explicação clara, objetiva e educacional com a definição principal, conceitos relacionados importantes e aplicações práticas, com no máximo 150 palavras.
+- "subtopics": EXATAMENTE 3 subtemas específicos e relevantes.
+Sua resposta deve ser em **Português**.
+
+Responda APENAS com um objeto JSON neste formato, sem introdução ou conclusão:
+{{"summary": "...", "subtopics": ["...", "...", "..."]}}
 """,
     },
 }
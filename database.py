@@ -5,30 +5,220 @@ Handles storage and retrieval of card generation history
 
 import sqlite3
 import json
+import queue
+import re
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Tuple
 import logging
 
+from metrics import timed_query
+from utils import percentile
+
 logger = logging.getLogger(__name__)
 
+# Applied to every pooled connection. WAL lets readers proceed while a
+# writer commits; NORMAL sync is durable across app crashes in WAL mode.
+CONNECTION_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -20000,  # KiB (~20 MB page cache per connection)
+    "mmap_size": 268435456,  # 256 MB
+    "temp_store": "MEMORY",
+    "foreign_keys": "ON",
+}
+
+
+CARD_FIELDS = (
+    "id",
+    "topic",
+    "summary",
+    "subtopics",
+    "model",
+    "language",
+    "timestamp",
+    "temperature",
+    "max_tokens",
+    "prompt_tokens",
+    "completion_tokens",
+    "first_token_latency",
+    "latency",
+    "llm_calls",
+    "retries",
+)
+CARD_COLUMNS = ", ".join(CARD_FIELDS)
+
+# What a generation cost, added to databases created before they existed.
+# Tokens are NULL when the endpoint reported no usage; llm_calls is 0 for
+# cards served entirely from the response cache.
+USAGE_COLUMNS = {
+    "prompt_tokens": "INTEGER",
+    "completion_tokens": "INTEGER",
+    "first_token_latency": "REAL",  # seconds, streamed generations only
+    "latency": "REAL",  # seconds from generation start to card content
+    "llm_calls": "INTEGER",
+    "retries": "INTEGER",  # failovers, hedges and job re-attempts
+}
+USAGE_COLUMN_LIST = ", ".join(USAGE_COLUMNS)
+USAGE_PLACEHOLDERS = ", ".join("?" for _ in USAGE_COLUMNS)
+
+# Latency percentiles in the usage statistics cover this many of the most
+# recent cards per model and language
+USAGE_PERCENTILE_WINDOW = 1000
+
+# Adds ({sign} = "") or removes ({sign} = "-") one card's usage in
+# usage_stats; only cards produced by the LLM with a latency count
+USAGE_STATS_SQL = """
+    INSERT INTO usage_stats (model, language, cards, first_token_sum, first_token_cards,
+                             prompt_tokens_sum, prompt_token_cards,
+                             completion_tokens_sum, completion_token_cards, retries)
+    SELECT {row}.model, {row}.language, {sign}1,
+           {sign}COALESCE({row}.first_token_latency, 0),
+           {sign}({row}.first_token_latency IS NOT NULL),
+           {sign}COALESCE({row}.prompt_tokens, 0), {sign}({row}.prompt_tokens IS NOT NULL),
+           {sign}COALESCE({row}.completion_tokens, 0),
+           {sign}({row}.completion_tokens IS NOT NULL),
+           {sign}COALESCE({row}.retries, 0)
+    WHERE {row}.llm_calls > 0 AND {row}.latency IS NOT NULL
+    ON CONFLICT (model, language) DO UPDATE SET
+        cards = cards + excluded.cards,
+        first_token_sum = first_token_sum + excluded.first_token_sum,
+        first_token_cards = first_token_cards + excluded.first_token_cards,
+        prompt_tokens_sum = prompt_tokens_sum + excluded.prompt_tokens_sum,
+        prompt_token_cards = prompt_token_cards + excluded.prompt_token_cards,
+        completion_tokens_sum = completion_tokens_sum + excluded.completion_tokens_sum,
+        completion_token_cards = completion_token_cards + excluded.completion_token_cards,
+        retries = retries + excluded.retries;
+"""
+
+FTS_TOKENIZER = "unicode61 remove_diacritics 2"
+
+# Key used to match a subtopic to the cards generated for it
+TOPIC_KEY_SQL = "lower(trim({column}))"
+
+# Day bucket of a card in card_stats; cards whose timestamp date() can't
+# parse are counted on the day they were written
+DAY_KEY_SQL = "COALESCE(date({column}), date('now'))"
+
+
+def _parquet_schema():
+    """Arrow schema of a Parquet card export (pyarrow is only needed here)"""
+    import pyarrow as pa
+
+    return pa.schema(
+        [
+            ("id", pa.int64()),
+            ("topic", pa.string()),
+            ("summary", pa.string()),
+            ("subtopics", pa.list_(pa.string())),
+            ("model", pa.string()),
+            ("language", pa.string()),
+            ("timestamp", pa.string()),
+            ("temperature", pa.float64()),
+            ("max_tokens", pa.int64()),
+            ("prompt_tokens", pa.int64()),
+            ("completion_tokens", pa.int64()),
+            ("first_token_latency", pa.float64()),
+            ("latency", pa.float64()),
+            ("llm_calls", pa.int64()),
+            ("retries", pa.int64()),
+        ]
+    )
+
+
 
 class CardDatabase:
     """Manages SQLite database for card history"""
 
-    def __init__(self, db_path: str = "cards_history.db"):
+    def __init__(self, db_path: str = "cards_history.db", pool_size: int = 4):
         """
         Initialize database connection and create tables if needed
 
         Args:
             db_path: Path to SQLite database file
+            pool_size: Maximum number of idle connections kept open
         """
         self.db_path = db_path
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self._open_connections = set()
+        self._pool_lock = threading.Lock()
+        self._closed = False
+        self.fts_enabled = False
+        self._listeners = []
         self.init_database()
 
+    def _open_connection(self) -> sqlite3.Connection:
+        """Open a new connection with the tuned pragmas applied"""
+        conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+        for pragma, value in CONNECTION_PRAGMAS.items():
+            conn.execute(f"PRAGMA {pragma} = {value}")
+
+        with self._pool_lock:
+            self._open_connections.add(conn)
+        return conn
+
+    def _discard_connection(self, conn: sqlite3.Connection):
+        """Close a connection and stop tracking it"""
+        with self._pool_lock:
+            self._open_connections.discard(conn)
+        conn.close()
+
+    def add_listener(self, listener):
+        """
+        Register an object notified of card changes
+
+        The listener may define on_card_saved(card), on_card_deleted(card_id)
+        and on_cards_cleared(); missing hooks are skipped.
+        """
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def _notify(self, hook: str, *args):
+        """Call a hook on every listener, logging (not raising) failures"""
+        for listener in self._listeners:
+            callback = getattr(listener, hook, None)
+            if callback is None:
+                continue
+            try:
+                callback(*args)
+            except Exception as e:
+                logger.error(f"Card listener {hook} failed: {e}")
+
+    @contextmanager
+    def _connection(self):
+        """
+        Borrow a pooled connection for one transaction
+
+        Commits on success, rolls back on error and returns the connection
+        to the pool afterwards. Connections are shared across Streamlit
+        script threads, but only one thread uses a connection at a time.
+        Once the database was closed, connections are closed after use.
+        """
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._open_connection()
+
+        try:
+            with conn:
+                yield conn
+        finally:
+            with self._pool_lock:
+                pooled = not self._closed
+                if pooled:
+                    try:
+                        self._pool.put_nowait(conn)
+                    except queue.Full:
+                        pooled = False
+            if not pooled:
+                self._discard_connection(conn)
+
     def init_database(self):
         """Create database tables if they don't exist"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connection() as conn:
                 cursor = conn.cursor()
 
                 cursor.execute(
@@ -42,7 +232,13 @@ class CardDatabase:
                         language TEXT NOT NULL,
                         timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
                         temperature REAL,
-                        max_tokens INTEGER
+                        max_tokens INTEGER,
+                        prompt_tokens INTEGER,
+                        completion_tokens INTEGER,
+                        first_token_latency REAL,
+                        latency REAL,
+                        llm_calls INTEGER,
+                        retries INTEGER
                     )
                 """
                 )
@@ -61,6 +257,19 @@ class CardDatabase:
                 """
                 )
 
+                cursor.execute(
+                    """
+                    CREATE INDEX IF NOT EXISTS idx_timestamp_id
+                    ON cards(timestamp DESC, id DESC)
+                """
+                )
+
+                self._init_usage(cursor)
+                self.fts_enabled = self._init_fts(cursor)
+                self._init_stats(cursor)
+                self._init_usage_stats(cursor)
+                self._init_edges(cursor)
+
                 conn.commit()
                 logger.info("Database initialized successfully")
 
@@ -68,6 +277,351 @@ class CardDatabase:
             logger.error(f"Database initialization error: {e}")
             raise
 
+    def _init_usage(self, cursor: sqlite3.Cursor):
+        """
+        Add the usage accounting columns to databases that predate them
+
+        Cards saved before the migration keep NULL usage and are left out of
+        the usage statistics.
+        """
+        cursor.execute("PRAGMA table_info(cards)")
+        existing = {row[1] for row in cursor.fetchall()}
+        for column, column_type in USAGE_COLUMNS.items():
+            if column not in existing:
+                cursor.execute(f"ALTER TABLE cards ADD COLUMN {column} {column_type}")
+                logger.info(f"Added column cards.{column}")
+
+        cursor.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_cards_usage
+            ON cards(model, language, latency)
+            WHERE llm_calls > 0
+        """
+        )
+
+        cursor.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_cards_recent_usage
+            ON cards(model, language, id)
+            WHERE llm_calls > 0
+        """
+        )
+
+    def _init_fts(self, cursor: sqlite3.Cursor) -> bool:
+        """
+        Create the FTS5 search index and its sync triggers
+
+        The index is an external-content table over cards, so it stores only
+        the inverted index. Existing databases are backfilled once, when the
+        index is first created.
+
+        Returns:
+            True if full-text search is available
+        """
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'cards_fts'"
+        )
+        needs_backfill = cursor.fetchone() is None
+
+        try:
+            cursor.execute(
+                f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS cards_fts USING fts5(
+                    topic, summary, subtopics,
+                    content='cards', content_rowid='id',
+                    tokenize='{FTS_TOKENIZER}'
+                )
+            """
+            )
+        except sqlite3.OperationalError as e:
+            logger.warning(f"FTS5 unavailable, falling back to LIKE search: {e}")
+            return False
+
+        cursor.executescript(
+            """
+            CREATE TRIGGER IF NOT EXISTS cards_fts_insert AFTER INSERT ON cards BEGIN
+                INSERT INTO cards_fts(rowid, topic, summary, subtopics)
+                VALUES (new.id, new.topic, new.summary, new.subtopics);
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS cards_fts_delete AFTER DELETE ON cards BEGIN
+                INSERT INTO cards_fts(cards_fts, rowid, topic, summary, subtopics)
+                VALUES ('delete', old.id, old.topic, old.summary, old.subtopics);
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS cards_fts_update AFTER UPDATE ON cards BEGIN
+                INSERT INTO cards_fts(cards_fts, rowid, topic, summary, subtopics)
+                VALUES ('delete', old.id, old.topic, old.summary, old.subtopics);
+                INSERT INTO cards_fts(rowid, topic, summary, subtopics)
+                VALUES (new.id, new.topic, new.summary, new.subtopics);
+            END;
+        """
+        )
+
+        if needs_backfill:
+            cursor.execute("INSERT INTO cards_fts(cards_fts) VALUES ('rebuild')")
+            logger.info("Full-text search index built for existing cards")
+
+        return True
+
+    def _init_stats(self, cursor: sqlite3.Cursor):
+        """
+        Create the materialized statistics table and its triggers
+
+        card_stats holds one counter per (dimension, key): the overall total,
+        per-model and per-language totals, and per-day buckets. Triggers keep
+        it in step with cards, so get_statistics never scans cards. Existing
+        databases are backfilled once, when the table is first created.
+        """
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'card_stats'"
+        )
+        needs_backfill = cursor.fetchone() is None
+
+        # Triggers created before day keys were guarded against timestamps
+        # that date() can't parse are replaced
+        cursor.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'card_stats_insert'"
+        )
+        row = cursor.fetchone()
+        if row and "COALESCE" not in row[0]:
+            for trigger in ("card_stats_insert", "card_stats_delete", "card_stats_update"):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+
+        cursor.executescript(
+            f"""
+            CREATE TABLE IF NOT EXISTS card_stats (
+                dimension TEXT NOT NULL,
+                key TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (dimension, key)
+            ) WITHOUT ROWID;
+
+            CREATE TRIGGER IF NOT EXISTS card_stats_insert AFTER INSERT ON cards BEGIN
+                INSERT INTO card_stats (dimension, key, count)
+                VALUES ('total', '', 1),
+                       ('model', new.model, 1),
+                       ('language', new.language, 1),
+                       ('day', {DAY_KEY_SQL.format(column="new.timestamp")}, 1)
+                ON CONFLICT (dimension, key) DO UPDATE SET count = count + 1;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS card_stats_delete AFTER DELETE ON cards BEGIN
+                UPDATE card_stats SET count = count - 1
+                WHERE (dimension = 'total' AND key = '')
+                   OR (dimension = 'model' AND key = old.model)
+                   OR (dimension = 'language' AND key = old.language)
+                   OR (dimension = 'day' AND key = {DAY_KEY_SQL.format(column="old.timestamp")});
+                DELETE FROM card_stats WHERE count <= 0 AND dimension != 'total';
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS card_stats_update
+            AFTER UPDATE OF model, language, timestamp ON cards BEGIN
+                UPDATE card_stats SET count = count - 1
+                WHERE (dimension = 'model' AND key = old.model)
+                   OR (dimension = 'language' AND key = old.language)
+                   OR (dimension = 'day' AND key = {DAY_KEY_SQL.format(column="old.timestamp")});
+                INSERT INTO card_stats (dimension, key, count)
+                VALUES ('model', new.model, 1),
+                       ('language', new.language, 1),
+                       ('day', {DAY_KEY_SQL.format(column="new.timestamp")}, 1)
+                ON CONFLICT (dimension, key) DO UPDATE SET count = count + 1;
+                DELETE FROM card_stats WHERE count <= 0 AND dimension != 'total';
+            END;
+        """
+        )
+
+        if needs_backfill:
+            cursor.executescript(
+                f"""
+                INSERT INTO card_stats (dimension, key, count)
+                SELECT 'total', '', COUNT(*) FROM cards;
+
+                INSERT INTO card_stats (dimension, key, count)
+                SELECT 'model', model, COUNT(*) FROM cards GROUP BY model;
+
+                INSERT INTO card_stats (dimension, key, count)
+                SELECT 'language', language, COUNT(*) FROM cards GROUP BY language;
+
+                INSERT INTO card_stats (dimension, key, count)
+                SELECT 'day', {DAY_KEY_SQL.format(column="timestamp")}, COUNT(*) FROM cards
+                GROUP BY 1;
+            """
+            )
+            logger.info("Statistics table built for existing cards")
+
+    def _init_usage_stats(self, cursor: sqlite3.Cursor):
+        """
+        Create the materialized usage totals and their triggers
+
+        usage_stats holds, per (model, language), the card count and the
+        sums behind the usage means, so get_usage_statistics only reads
+        latencies for its percentiles. Existing databases are backfilled
+        once, when the table is first created.
+        """
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'usage_stats'"
+        )
+        needs_backfill = cursor.fetchone() is None
+
+        cursor.executescript(
+            f"""
+            CREATE TABLE IF NOT EXISTS usage_stats (
+                model TEXT NOT NULL,
+                language TEXT NOT NULL,
+                cards INTEGER NOT NULL DEFAULT 0,
+                first_token_sum REAL NOT NULL DEFAULT 0,
+                first_token_cards INTEGER NOT NULL DEFAULT 0,
+                prompt_tokens_sum INTEGER NOT NULL DEFAULT 0,
+                prompt_token_cards INTEGER NOT NULL DEFAULT 0,
+                completion_tokens_sum INTEGER NOT NULL DEFAULT 0,
+                completion_token_cards INTEGER NOT NULL DEFAULT 0,
+                retries INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (model, language)
+            ) WITHOUT ROWID;
+
+            CREATE TRIGGER IF NOT EXISTS usage_stats_insert AFTER INSERT ON cards BEGIN
+                {USAGE_STATS_SQL.format(row="new", sign="")}
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS usage_stats_delete AFTER DELETE ON cards BEGIN
+                {USAGE_STATS_SQL.format(row="old", sign="-")}
+                DELETE FROM usage_stats WHERE cards <= 0;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS usage_stats_update
+            AFTER UPDATE OF model, language, {USAGE_COLUMN_LIST} ON cards BEGIN
+                {USAGE_STATS_SQL.format(row="old", sign="-")}
+                {USAGE_STATS_SQL.format(row="new", sign="")}
+                DELETE FROM usage_stats WHERE cards <= 0;
+            END;
+        """
+        )
+
+        if needs_backfill:
+            cursor.execute(
+                """
+                INSERT INTO usage_stats
+                SELECT model, language, COUNT(*),
+                       COALESCE(SUM(first_token_latency), 0), COUNT(first_token_latency),
+                       COALESCE(SUM(prompt_tokens), 0), COUNT(prompt_tokens),
+                       COALESCE(SUM(completion_tokens), 0), COUNT(completion_tokens),
+                       COALESCE(SUM(retries), 0)
+                FROM cards
+                WHERE llm_calls > 0 AND latency IS NOT NULL
+                GROUP BY model, language
+            """
+            )
+            logger.info("Usage statistics table built for existing cards")
+
+    def _init_edges(self, cursor: sqlite3.Cursor):
+        """
+        Create the normalized subtopic edge table and its triggers
+
+        card_subtopics holds one row per (card, subtopic), with a matching
+        key (lowercased, trimmed) indexed alongside an expression index on
+        card topics, so graph queries can join subtopics to the cards that
+        explored them. Triggers expand cards.subtopics with json_each, which
+        keeps the table in step with every insert, update and delete.
+        Existing databases are backfilled once, when the table is created.
+        """
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'card_subtopics'"
+        )
+        needs_backfill = cursor.fetchone() is None
+
+        cursor.executescript(
+            f"""
+            CREATE TABLE IF NOT EXISTS card_subtopics (
+                card_id INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                subtopic TEXT NOT NULL,
+                subtopic_key TEXT NOT NULL,
+                PRIMARY KEY (card_id, position)
+            ) WITHOUT ROWID;
+
+            CREATE INDEX IF NOT EXISTS idx_card_subtopics_key
+            ON card_subtopics(subtopic_key);
+
+            CREATE INDEX IF NOT EXISTS idx_topic_key
+            ON cards({TOPIC_KEY_SQL.format(column="topic")}, language);
+
+            CREATE TRIGGER IF NOT EXISTS card_subtopics_insert AFTER INSERT ON cards BEGIN
+                INSERT INTO card_subtopics (card_id, position, subtopic, subtopic_key)
+                SELECT new.id, key, value, {TOPIC_KEY_SQL.format(column="value")}
+                FROM json_each(new.subtopics);
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS card_subtopics_delete AFTER DELETE ON cards BEGIN
+                DELETE FROM card_subtopics WHERE card_id = old.id;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS card_subtopics_update
+            AFTER UPDATE OF subtopics ON cards BEGIN
+                DELETE FROM card_subtopics WHERE card_id = old.id;
+                INSERT INTO card_subtopics (card_id, position, subtopic, subtopic_key)
+                SELECT new.id, key, value, {TOPIC_KEY_SQL.format(column="value")}
+                FROM json_each(new.subtopics);
+            END;
+        """
+        )
+
+        if needs_backfill:
+            cursor.execute(
+                f"""
+                INSERT INTO card_subtopics (card_id, position, subtopic, subtopic_key)
+                SELECT cards.id, each.key, each.value,
+                       {TOPIC_KEY_SQL.format(column="each.value")}
+                FROM cards, json_each(cards.subtopics) AS each
+                WHERE json_valid(cards.subtopics)
+            """
+            )
+            logger.info("Subtopic edges built for existing cards")
+
+    @staticmethod
+    def _row_to_card(row) -> Dict:
+        """Convert a row selected with CARD_COLUMNS into a card dictionary"""
+        card = dict(zip(CARD_FIELDS, row))
+        card["subtopics"] = json.loads(card["subtopics"])
+        return card
+
+    @staticmethod
+    def _usage_values(usage: Optional[Dict]) -> Tuple:
+        """Order a usage dictionary as USAGE_COLUMNS values"""
+        usage = usage or {}
+        return tuple(usage.get(column) for column in USAGE_COLUMNS)
+
+    @staticmethod
+    def _normalize_timestamp(value) -> Optional[str]:
+        """
+        Convert an imported timestamp to the format CURRENT_TIMESTAMP uses
+
+        Returns:
+            "YYYY-MM-DD HH:MM:SS", or None (stored as the import time) for
+            missing or unparseable values
+        """
+        if value is None:
+            return None
+        if not isinstance(value, datetime):
+            try:
+                value = datetime.fromisoformat(str(value).strip())
+            except ValueError:
+                logger.warning(f"Ignoring invalid card timestamp: {value!r}")
+                return None
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+
+    @staticmethod
+    def _build_fts_query(query: str) -> str:
+        """
+        Turn free text into an FTS5 query
+
+        Every word becomes a quoted prefix term, so user input can't inject
+        FTS syntax and partially typed words still match.
+        """
+        terms = re.findall(r"\w+", query)
+        return " ".join(f'"{term}"*' for term in terms)
+
+    @timed_query("save_card")
     def save_card(
         self,
         topic: str,
@@ -77,6 +631,7 @@ class CardDatabase:
         language: str,
         temperature: float = 0.3,
         max_tokens: int = 800,
+        usage: Optional[Dict] = None,
     ) -> int:
         """
         Save a generated card to database
@@ -89,21 +644,24 @@ class CardDatabase:
             language: Language code (pt/en)
             temperature: Temperature parameter used
             max_tokens: Max tokens parameter used
+            usage: Token usage and latency of the generation, with the
+                USAGE_COLUMNS keys (missing keys are stored as NULL)
 
         Returns:
             ID of the inserted card
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connection() as conn:
                 cursor = conn.cursor()
 
                 subtopics_json = json.dumps(subtopics, ensure_ascii=False)
 
                 cursor.execute(
-                    """
+                    f"""
                     INSERT INTO cards 
-                    (topic, summary, subtopics, model, language, temperature, max_tokens)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    (topic, summary, subtopics, model, language, temperature, max_tokens,
+                     {USAGE_COLUMN_LIST})
+                    VALUES (?, ?, ?, ?, ?, ?, ?, {USAGE_PLACEHOLDERS})
                 """,
                     (
                         topic,
@@ -113,6 +671,7 @@ class CardDatabase:
                         language,
                         temperature,
                         max_tokens,
+                        *self._usage_values(usage),
                     ),
                 )
 
@@ -120,12 +679,107 @@ class CardDatabase:
                 card_id = cursor.lastrowid
 
                 logger.info(f"Card saved with ID: {card_id}")
-                return card_id
+
+            self._notify(
+                "on_card_saved",
+                {
+                    "id": card_id,
+                    "topic": topic,
+                    "summary": summary,
+                    "subtopics": subtopics,
+                    "model": model,
+                    "language": language,
+                },
+            )
+            return card_id
 
         except sqlite3.Error as e:
             logger.error(f"Error saving card: {e}")
             raise
 
+    @timed_query("save_cards")
+    def save_cards(self, cards: List[Dict]) -> List[int]:
+        """
+        Save several generated cards in a single transaction
+
+        Args:
+            cards: Card dictionaries with the same fields accepted by save_card
+
+        Returns:
+            IDs of the inserted cards, in input order
+        """
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+
+                card_ids = []
+                for card in cards:
+                    cursor.execute(
+                        f"""
+                        INSERT INTO cards 
+                        (topic, summary, subtopics, model, language, temperature, max_tokens,
+                         {USAGE_COLUMN_LIST})
+                        VALUES (?, ?, ?, ?, ?, ?, ?, {USAGE_PLACEHOLDERS})
+                    """,
+                        (
+                            card["topic"],
+                            card["summary"],
+                            json.dumps(card["subtopics"], ensure_ascii=False),
+                            card["model"],
+                            card["language"],
+                            card.get("temperature", 0.3),
+                            card.get("max_tokens", 800),
+                            *self._usage_values(card.get("usage")),
+                        ),
+                    )
+                    card_ids.append(cursor.lastrowid)
+
+                conn.commit()
+
+                logger.info(f"Saved batch of {len(card_ids)} cards")
+
+            for card_id, card in zip(card_ids, cards):
+                self._notify("on_card_saved", {**card, "id": card_id})
+            return card_ids
+
+        except sqlite3.Error as e:
+            logger.error(f"Error saving card batch: {e}")
+            raise
+
+    @timed_query("get_existing_topics")
+    def get_existing_topics(self, language: str, model: Optional[str] = None) -> List[str]:
+        """
+        Retrieve the topics already stored for a language (and model)
+
+        Args:
+            language: Language code (pt/en)
+            model: Restrict to cards generated by this model
+
+        Returns:
+            List of distinct stored topics
+        """
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+
+                if model is None:
+                    cursor.execute(
+                        "SELECT DISTINCT topic FROM cards WHERE language = ?",
+                        (language,),
+                    )
+                else:
+                    cursor.execute(
+                        "SELECT DISTINCT topic FROM cards WHERE language = ? AND model = ?",
+                        (language, model),
+                    )
+
+                return [row[0] for row in cursor.fetchall()]
+
+        except sqlite3.Error as e:
+            logger.error(f"Error retrieving existing topics: {e}")
+            return []
+
+    @timed_query("get_all_cards")
     def get_all_cards(self, limit: int = 100) -> List[Dict]:
         """
         Retrieve all cards from database
@@ -137,13 +791,12 @@ class CardDatabase:
             List of card dictionaries
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connection() as conn:
                 cursor = conn.cursor()
 
                 cursor.execute(
-                    """
-                    SELECT id, topic, summary, subtopics, model, language, 
-                           timestamp, temperature, max_tokens
+                    f"""
+                    SELECT {CARD_COLUMNS}
                     FROM cards
                     ORDER BY timestamp DESC
                     LIMIT ?
@@ -151,22 +804,7 @@ class CardDatabase:
                     (limit,),
                 )
 
-                rows = cursor.fetchall()
-
-                cards = []
-                for row in rows:
-                    card = {
-                        "id": row[0],
-                        "topic": row[1],
-                        "summary": row[2],
-                        "subtopics": json.loads(row[3]),
-                        "model": row[4],
-                        "language": row[5],
-                        "timestamp": row[6],
-                        "temperature": row[7],
-                        "max_tokens": row[8],
-                    }
-                    cards.append(card)
+                cards = [self._row_to_card(row) for row in cursor.fetchall()]
 
                 logger.info(f"Retrieved {len(cards)} cards from database")
                 return cards
@@ -175,50 +813,364 @@ class CardDatabase:
             logger.error(f"Error retrieving cards: {e}")
             return []
 
+    @timed_query("get_card")
+    def get_card(self, card_id: int) -> Optional[Dict]:
+        """
+        Retrieve a single card by ID
+
+        Args:
+            card_id: ID of the card
+
+        Returns:
+            Card dictionary, or None if not found
+        """
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+
+                cursor.execute(
+                    f"SELECT {CARD_COLUMNS} FROM cards WHERE id = ?", (card_id,)
+                )
+                row = cursor.fetchone()
+
+                return self._row_to_card(row) if row else None
+
+        except sqlite3.Error as e:
+            logger.error(f"Error retrieving card {card_id}: {e}")
+            return None
+
+    def _iter_row_chunks(self, chunk_size: int) -> Iterator[List[tuple]]:
+        """
+        Iterate over all card rows in ID order, one keyset-paginated chunk
+        at a time; a pooled connection is only held while a chunk is fetched
+        """
+        last_id = 0
+        while True:
+            with self._connection() as conn:
+                rows = conn.execute(
+                    f"""
+                    SELECT {CARD_COLUMNS}
+                    FROM cards
+                    WHERE id > ?
+                    ORDER BY id
+                    LIMIT ?
+                """,
+                    (last_id, chunk_size),
+                ).fetchall()
+
+            if not rows:
+                return
+
+            yield rows
+            last_id = rows[-1][0]
+
+    def iter_cards(self, chunk_size: int = 1000) -> Iterator[Dict]:
+        """
+        Iterate over every card in ID order without loading them all at once
+
+        Args:
+            chunk_size: Number of rows fetched per query
+
+        Yields:
+            Card dictionaries
+        """
+        try:
+            for rows in self._iter_row_chunks(chunk_size):
+                for row in rows:
+                    yield self._row_to_card(row)
+        except sqlite3.Error as e:
+            logger.error(f"Error iterating cards: {e}")
+
+    @timed_query("export_jsonl")
+    def export_jsonl(self, path: str, chunk_size: int = 5000) -> int:
+        """
+        Stream every card to a JSON Lines file
+
+        Args:
+            path: Output file path
+            chunk_size: Number of rows held in memory at a time
+
+        Returns:
+            Number of cards written
+        """
+        count = 0
+        with open(path, "w", encoding="utf-8") as f:
+            for rows in self._iter_row_chunks(chunk_size):
+                f.writelines(
+                    json.dumps(self._row_to_card(row), ensure_ascii=False) + "\n"
+                    for row in rows
+                )
+                count += len(rows)
+
+        logger.info(f"Exported {count} cards to {path}")
+        return count
+
+    @timed_query("export_parquet")
+    def export_parquet(self, path: str, chunk_size: int = 20000) -> int:
+        """
+        Stream every card to a Parquet file, one row group per chunk
+
+        Requires pyarrow.
+
+        Args:
+            path: Output file path
+            chunk_size: Number of rows held in memory at a time
+
+        Returns:
+            Number of cards written
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = _parquet_schema()
+        count = 0
+        with pq.ParquetWriter(path, schema) as writer:
+            for rows in self._iter_row_chunks(chunk_size):
+                columns = list(zip(*rows))
+                columns[CARD_FIELDS.index("subtopics")] = [
+                    json.loads(value) for value in columns[CARD_FIELDS.index("subtopics")]
+                ]
+                writer.write_batch(pa.record_batch(columns, schema=schema))
+                count += len(rows)
+
+        logger.info(f"Exported {count} cards to {path}")
+        return count
+
+    @staticmethod
+    def _iter_jsonl(path: str, batch_size: int) -> Iterator[List[Dict]]:
+        """Read a JSON Lines file in batches of card dictionaries"""
+        with open(path, encoding="utf-8") as f:
+            batch = []
+            for line in f:
+                if line.strip():
+                    batch.append(json.loads(line))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+    @staticmethod
+    def _iter_parquet(path: str, batch_size: int) -> Iterator[List[Dict]]:
+        """Read a Parquet file in batches of card dictionaries"""
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+            yield batch.to_pylist()
+
+    @timed_query("import_cards")
+    def import_cards(
+        self, path: str, batch_size: int = 10000, dedup: bool = False
+    ) -> Dict:
+        """
+        Stream cards from a JSON Lines or Parquet export into the database
+
+        Each batch is inserted with executemany in one transaction. Card IDs
+        are reassigned; valid timestamps are kept, missing or invalid ones
+        are replaced by the import time.
+
+        Args:
+            path: Input file (.jsonl/.json or .parquet)
+            batch_size: Number of cards held in memory and committed at a time
+            dedup: Skip cards whose (topic, language, model) already exists
+
+        Returns:
+            Dictionary with read, imported, skipped, seconds and rows_per_second
+        """
+        if path.endswith(".parquet"):
+            batches = self._iter_parquet(path, batch_size)
+        else:
+            batches = self._iter_jsonl(path, batch_size)
+
+        if dedup:
+            statement = f"""
+                INSERT INTO cards
+                (topic, summary, subtopics, model, language, timestamp, temperature, max_tokens,
+                 {USAGE_COLUMN_LIST})
+                SELECT ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), ?, ?, {USAGE_PLACEHOLDERS}
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM cards WHERE topic = ?1 AND language = ?5 AND model = ?4
+                )
+            """
+        else:
+            statement = f"""
+                INSERT INTO cards
+                (topic, summary, subtopics, model, language, timestamp, temperature, max_tokens,
+                 {USAGE_COLUMN_LIST})
+                VALUES (?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), ?, ?, {USAGE_PLACEHOLDERS})
+            """
+
+        read = imported = 0
+        start = time.perf_counter()
+        try:
+            for batch in batches:
+                params = [
+                    (
+                        card["topic"],
+                        card["summary"],
+                        json.dumps(card.get("subtopics") or [], ensure_ascii=False),
+                        card["model"],
+                        card["language"],
+                        self._normalize_timestamp(card.get("timestamp")),
+                        card.get("temperature"),
+                        card.get("max_tokens"),
+                        *self._usage_values(card),
+                    )
+                    for card in batch
+                ]
+
+                with self._connection() as conn:
+                    first_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM cards").fetchone()[0]
+                    inserted = conn.executemany(statement, params).rowcount
+
+                read += len(batch)
+                imported += inserted
+                if inserted and self._listeners:
+                    for card in self._cards_after(first_id, inserted):
+                        self._notify("on_card_saved", card)
+
+        except (sqlite3.Error, KeyError, ValueError) as e:
+            logger.error(f"Error importing cards from {path} after {read} rows: {e}")
+            raise
+
+        seconds = time.perf_counter() - start
+        result = {
+            "read": read,
+            "imported": imported,
+            "skipped": read - imported,
+            "seconds": seconds,
+            "rows_per_second": read / seconds if seconds else 0.0,
+        }
+        logger.info(
+            f"Imported {imported} of {read} cards from {path} "
+            f"({result['rows_per_second']:.0f} rows/s)"
+        )
+        return result
+
+    def _cards_after(self, last_id: int, limit: int) -> List[Dict]:
+        """Read back the cards inserted after a given ID"""
+        with self._connection() as conn:
+            rows = conn.execute(
+                f"SELECT {CARD_COLUMNS} FROM cards WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, limit),
+            ).fetchall()
+        return [self._row_to_card(row) for row in rows]
+
+    @timed_query("get_cards_page")
+    def get_cards_page(
+        self, limit: int = 24, cursor: Optional[Tuple[str, int]] = None
+    ) -> Tuple[List[Dict], Optional[Tuple[str, int]]]:
+        """
+        Retrieve one page of cards, newest first, using keyset pagination
+
+        Pages are addressed by the (timestamp, id) of the last card of the
+        previous page, so each page is an index range scan no matter how
+        deep it is.
+
+        Args:
+            limit: Number of cards per page
+            cursor: Cursor returned with the previous page (None for the first)
+
+        Returns:
+            Tuple of (cards, next_cursor); next_cursor is None on the last page
+        """
+        try:
+            with self._connection() as conn:
+                cur = conn.cursor()
+
+                if cursor is None:
+                    cur.execute(
+                        f"""
+                        SELECT {CARD_COLUMNS}
+                        FROM cards
+                        ORDER BY timestamp DESC, id DESC
+                        LIMIT ?
+                    """,
+                        (limit + 1,),
+                    )
+                else:
+                    cur.execute(
+                        f"""
+                        SELECT {CARD_COLUMNS}
+                        FROM cards
+                        WHERE (timestamp, id) < (?, ?)
+                        ORDER BY timestamp DESC, id DESC
+                        LIMIT ?
+                    """,
+                        (cursor[0], cursor[1], limit + 1),
+                    )
+
+                rows = cur.fetchall()
+                cards = [self._row_to_card(row) for row in rows[:limit]]
+
+                next_cursor = None
+                if len(rows) > limit:
+                    next_cursor = (cards[-1]["timestamp"], cards[-1]["id"])
+
+                logger.info(f"Retrieved page of {len(cards)} cards from database")
+                return cards, next_cursor
+
+        except sqlite3.Error as e:
+            logger.error(f"Error retrieving cards page: {e}")
+            return [], None
+
+    @timed_query("search_cards")
     def search_cards(self, query: str, limit: int = 50) -> List[Dict]:
         """
-        Search cards by topic
+        Search cards by topic, summary and subtopics
+
+        Uses the FTS5 index with BM25 ranking (topic matches weigh most) and
+        prefix matching, ignoring accents. Each result carries a "snippet"
+        with the matched terms wrapped in <mark> tags.
 
         Args:
             query: Search query string
             limit: Maximum number of results
 
         Returns:
-            List of matching cards
+            List of matching cards, best match first
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connection() as conn:
                 cursor = conn.cursor()
 
-                search_pattern = f"%{query}%"
+                if not self.fts_enabled:
+                    search_pattern = f"%{query}%"
+                    cursor.execute(
+                        f"""
+                        SELECT {CARD_COLUMNS}
+                        FROM cards
+                        WHERE topic LIKE ? OR summary LIKE ?
+                        ORDER BY timestamp DESC
+                        LIMIT ?
+                    """,
+                        (search_pattern, search_pattern, limit),
+                    )
+                    cards = [self._row_to_card(row) for row in cursor.fetchall()]
+                    logger.info(f"Found {len(cards)} cards matching '{query}'")
+                    return cards
+
+                fts_query = self._build_fts_query(query)
+                if not fts_query:
+                    return []
 
                 cursor.execute(
-                    """
-                    SELECT id, topic, summary, subtopics, model, language, 
-                           timestamp, temperature, max_tokens
-                    FROM cards
-                    WHERE topic LIKE ? OR summary LIKE ?
-                    ORDER BY timestamp DESC
+                    f"""
+                    SELECT {", ".join(f"cards.{field}" for field in CARD_FIELDS)},
+                           snippet(cards_fts, 1, '<mark>', '</mark>', '…', 16)
+                    FROM cards_fts
+                    JOIN cards ON cards.id = cards_fts.rowid
+                    WHERE cards_fts MATCH ?
+                    ORDER BY bm25(cards_fts, 10.0, 1.0, 3.0)
                     LIMIT ?
                 """,
-                    (search_pattern, search_pattern, limit),
+                    (fts_query, limit),
                 )
 
-                rows = cursor.fetchall()
-
                 cards = []
-                for row in rows:
-                    card = {
-                        "id": row[0],
-                        "topic": row[1],
-                        "summary": row[2],
-                        "subtopics": json.loads(row[3]),
-                        "model": row[4],
-                        "language": row[5],
-                        "timestamp": row[6],
-                        "temperature": row[7],
-                        "max_tokens": row[8],
-                    }
+                for row in cursor.fetchall():
+                    card = self._row_to_card(row)
+                    card["snippet"] = row[-1]
                     cards.append(card)
 
                 logger.info(f"Found {len(cards)} cards matching '{query}'")
@@ -228,6 +1180,144 @@ class CardDatabase:
             logger.error(f"Error searching cards: {e}")
             return []
 
+    @timed_query("get_linking_cards")
+    def get_linking_cards(
+        self, topic: str, language: Optional[str] = None, limit: int = 50
+    ) -> List[Dict]:
+        """
+        Retrieve the cards that list a topic among their subtopics
+
+        Args:
+            topic: Subtopic to look for (matched case-insensitively)
+            language: Restrict to cards in this language
+            limit: Maximum number of cards to return
+
+        Returns:
+            List of card dictionaries, newest first
+        """
+        try:
+            with self._connection() as conn:
+                rows = conn.execute(
+                    f"""
+                    SELECT {CARD_COLUMNS}
+                    FROM cards
+                    WHERE id IN (
+                        SELECT card_id FROM card_subtopics
+                        WHERE subtopic_key = {TOPIC_KEY_SQL.format(column=":topic")}
+                    )
+                    AND (:language IS NULL OR language = :language)
+                    ORDER BY timestamp DESC, id DESC
+                    LIMIT :limit
+                """,
+                    {"topic": topic, "language": language, "limit": limit},
+                ).fetchall()
+                return [self._row_to_card(row) for row in rows]
+
+        except sqlite3.Error as e:
+            logger.error(f"Error retrieving cards linking to '{topic}': {e}")
+            return []
+
+    @timed_query("get_topic_graph")
+    def get_topic_graph(
+        self,
+        topic: str,
+        language: Optional[str] = None,
+        max_depth: int = 3,
+        max_nodes: int = 200,
+    ) -> Optional[Dict]:
+        """
+        Build the exploration tree reachable from a topic
+
+        Starting at the newest card for the topic, each subtopic is followed
+        to the newest card generated for it (in the same language), up to
+        max_depth hops. The traversal is a recursive CTE over card_subtopics.
+
+        Args:
+            topic: Topic of the root card (matched case-insensitively)
+            language: Language of the root card (any if None)
+            max_depth: Maximum number of hops from the root
+            max_nodes: Maximum number of traversal rows
+
+        Returns:
+            Dictionary with the root card ID, its language, the reached cards
+            (id, topic, depth) and the subtopic edges (source card, subtopic,
+            target card or None if not explored yet); None if no card exists
+            for the topic
+        """
+        target_sql = f"""(
+            SELECT MAX(id) FROM cards
+            WHERE {TOPIC_KEY_SQL.format(column="topic")} = s.subtopic_key
+              AND language = :language
+        )"""
+
+        try:
+            with self._connection() as conn:
+                root = conn.execute(
+                    f"""
+                    SELECT id, language FROM cards
+                    WHERE {TOPIC_KEY_SQL.format(column="topic")}
+                          = {TOPIC_KEY_SQL.format(column=":topic")}
+                      AND (:language IS NULL OR language = :language)
+                    ORDER BY id DESC
+                    LIMIT 1
+                """,
+                    {"topic": topic, "language": language},
+                ).fetchone()
+
+                if root is None:
+                    return None
+
+                params = {
+                    "root": root[0],
+                    "language": root[1],
+                    "max_depth": max_depth,
+                    "max_nodes": max_nodes,
+                }
+                rows = conn.execute(
+                    f"""
+                    WITH RECURSIVE tree(card_id, depth, path) AS (
+                        SELECT :root, 0, '/' || :root || '/'
+                        UNION ALL
+                        SELECT c.id, t.depth + 1, t.path || c.id || '/'
+                        FROM tree AS t
+                        JOIN card_subtopics AS s ON s.card_id = t.card_id
+                        JOIN cards AS c ON c.id = {target_sql}
+                        WHERE t.depth < :max_depth
+                          AND instr(t.path, '/' || c.id || '/') = 0
+                        LIMIT :max_nodes
+                    ),
+                    nodes AS (
+                        SELECT card_id, MIN(depth) AS depth FROM tree GROUP BY card_id
+                    )
+                    SELECT n.card_id, n.depth, c.topic, s.subtopic,
+                           CASE WHEN n.depth < :max_depth THEN {target_sql} END
+                    FROM nodes AS n
+                    JOIN cards AS c ON c.id = n.card_id
+                    LEFT JOIN card_subtopics AS s
+                           ON s.card_id = n.card_id AND n.depth < :max_depth
+                    ORDER BY n.depth, n.card_id, s.position
+                """,
+                    params,
+                ).fetchall()
+
+        except sqlite3.Error as e:
+            logger.error(f"Error building topic graph for '{topic}': {e}")
+            return None
+
+        cards, edges = {}, []
+        for card_id, depth, card_topic, subtopic, target in rows:
+            cards.setdefault(card_id, {"id": card_id, "topic": card_topic, "depth": depth})
+            if subtopic is not None:
+                edges.append({"source": card_id, "subtopic": subtopic, "target": target})
+
+        return {
+            "root": root[0],
+            "language": root[1],
+            "cards": list(cards.values()),
+            "edges": edges,
+        }
+
+    @timed_query("delete_card")
     def delete_card(self, card_id: int) -> bool:
         """
         Delete a card by ID
@@ -239,7 +1329,7 @@ class CardDatabase:
             True if deleted successfully
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connection() as conn:
                 cursor = conn.cursor()
 
                 cursor.execute("DELETE FROM cards WHERE id = ?", (card_id,))
@@ -251,12 +1341,15 @@ class CardDatabase:
                 else:
                     logger.warning(f"Card {card_id} not found")
 
-                return deleted
+            if deleted:
+                self._notify("on_card_deleted", card_id)
+            return deleted
 
         except sqlite3.Error as e:
             logger.error(f"Error deleting card: {e}")
             return False
 
+    @timed_query("clear_all_cards")
     def clear_all_cards(self) -> bool:
         """
         Delete all cards from database
@@ -265,60 +1358,63 @@ class CardDatabase:
             True if cleared successfully
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connection() as conn:
                 cursor = conn.cursor()
 
                 cursor.execute("DELETE FROM cards")
                 conn.commit()
 
                 logger.info("All cards cleared from database")
-                return True
+
+            self._notify("on_cards_cleared")
+            return True
 
         except sqlite3.Error as e:
             logger.error(f"Error clearing cards: {e}")
             return False
 
-    def get_statistics(self) -> Dict:
+    @timed_query("get_statistics")
+    def get_statistics(self, include_usage: bool = False) -> Dict:
         """
         Get database statistics
 
+        Reads the trigger-maintained card_stats counters, so the cost does
+        not depend on the number of cards. recent_cards covers the last
+        7 calendar days (UTC) plus today.
+
+        Args:
+            include_usage: Also add per model and language usage aggregates
+                (see get_usage_statistics), read from usage_stats plus a
+                bounded window of recent latencies
+
         Returns:
             Dictionary with statistics
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connection() as conn:
                 cursor = conn.cursor()
 
-                cursor.execute("SELECT COUNT(*) FROM cards")
-                total_cards = cursor.fetchone()[0]
-
                 cursor.execute(
                     """
-                    SELECT model, COUNT(*) 
-                    FROM cards 
-                    GROUP BY model
+                    SELECT dimension, key, count
+                    FROM card_stats
+                    WHERE dimension != 'day' OR key >= date('now', '-7 days')
                 """
                 )
-                by_model = dict(cursor.fetchall())
 
-
-                cursor.execute(
-                    """
-                    SELECT language, COUNT(*) 
-                    FROM cards 
-                    GROUP BY language
-                """
-                )
-                by_language = dict(cursor.fetchall())
-
-                cursor.execute(
-                    """
-                    SELECT COUNT(*) 
-                    FROM cards 
-                    WHERE timestamp >= datetime('now', '-7 days')
-                """
-                )
-                recent_cards = cursor.fetchone()[0]
+                total_cards = 0
+                by_model = {}
+                by_language = {}
+                recent_cards = 0
+                for dimension, key, count in cursor.fetchall():
+                    if dimension == "total":
+                        total_cards = count
+                    elif dimension == "model":
+                        by_model[key] = count
+                    elif dimension == "language":
+                        by_language[key] = count
+                    elif dimension == "day":
+                        recent_cards += count
 
                 stats = {
                     "total_cards": total_cards,
@@ -328,17 +1424,148 @@ class CardDatabase:
                 }
 
                 logger.info(f"Statistics retrieved: {stats}")
-                return stats
 
         except sqlite3.Error as e:
             logger.error(f"Error getting statistics: {e}")
-            return {
+            stats = {
                 "total_cards": 0,
                 "by_model": {},
                 "by_language": {},
                 "recent_cards": 0,
             }
 
+        if include_usage:
+            stats["usage"] = self.get_usage_statistics()
+        return stats
+
+    @timed_query("get_output_lengths")
+    def get_output_lengths(self, model: str, language: str, limit: int = 200) -> List[Tuple]:
+        """
+        Get the output sizes of the most recent generated cards
+
+        Args:
+            model: Model name
+            language: Language code
+            limit: Maximum number of cards sampled
+
+        Returns:
+            List of (summary chars, subtopics JSON chars, completion tokens,
+            whether the card was generated fresh by one two-call attempt)
+            tuples, newest first; completion tokens may be None
+        """
+        try:
+            with self._connection() as conn:
+                return conn.execute(
+                    """
+                    SELECT length(summary), length(subtopics), completion_tokens,
+                           retries = 0 AND llm_calls = 2
+                    FROM cards
+                    WHERE model = ? AND language = ? AND llm_calls > 0
+                    ORDER BY id DESC
+                    LIMIT ?
+                """,
+                    (model, language, limit),
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error getting output lengths: {e}")
+            return []
+
+    @timed_query("get_usage_statistics")
+    def get_usage_statistics(self) -> List[Dict]:
+        """
+        Aggregate what generations cost per model and language
+
+        Only cards produced by at least one LLM call and with a recorded
+        latency are counted, so cache hits and cards saved (or imported)
+        without usage don't skew latency. Counts, means and totals come from
+        the trigger-maintained usage_stats table; p50/p95 latency covers
+        the last USAGE_PERCENTILE_WINDOW cards of each model and language.
+
+        Returns:
+            One dictionary per (model, language) with the number of cards,
+            p50/p95 latency, mean time to first token, mean prompt and
+            completion tokens, total tokens and total retries
+        """
+        try:
+            with self._connection() as conn:
+                rows = conn.execute(
+                    """
+                    SELECT model, language, cards, first_token_sum, first_token_cards,
+                           prompt_tokens_sum, prompt_token_cards,
+                           completion_tokens_sum, completion_token_cards, retries
+                    FROM usage_stats
+                    ORDER BY cards DESC
+                """
+                ).fetchall()
+
+                latencies = {
+                    (model, language): [
+                        latency
+                        for (latency,) in conn.execute(
+                            """
+                            SELECT latency FROM cards
+                            WHERE model = ? AND language = ?
+                              AND llm_calls > 0 AND latency IS NOT NULL
+                            ORDER BY id DESC
+                            LIMIT ?
+                        """,
+                            (model, language, USAGE_PERCENTILE_WINDOW),
+                        )
+                    ]
+                    for model, language, *_ in rows
+                }
+
+        except sqlite3.Error as e:
+            logger.error(f"Error getting usage statistics: {e}")
+            return []
+
+        def mean(total, count):
+            return total / count if count else None
+
+        return [
+            {
+                "model": model,
+                "language": language,
+                "cards": cards,
+                "p50_latency": percentile(latencies[model, language], 50),
+                "p95_latency": percentile(latencies[model, language], 95),
+                "mean_first_token_latency": mean(first_token_sum, first_token_cards),
+                "mean_prompt_tokens": mean(prompt_sum, prompt_cards),
+                "mean_completion_tokens": mean(completion_sum, completion_cards),
+                "total_tokens": prompt_sum + completion_sum,
+                "retries": retries,
+            }
+            for (
+                model,
+                language,
+                cards,
+                first_token_sum,
+                first_token_cards,
+                prompt_sum,
+                prompt_cards,
+                completion_sum,
+                completion_cards,
+                retries,
+            ) in rows
+        ]
+
     def close(self):
-        """Close database connection (for cleanup)"""
-        logger.info("Database connection closed")
+        """
+        Close the pooled database connections (for cleanup)
+
+        Only idle connections are closed here; connections still in use by
+        another thread are closed when that thread returns them.
+        """
+        connections = []
+        with self._pool_lock:
+            self._closed = True
+            while True:
+                try:
+                    connections.append(self._pool.get_nowait())
+                except queue.Empty:
+                    break
+
+        for conn in connections:
+            self._discard_connection(conn)
+
+        logger.info(f"Database connections closed ({len(connections)})")
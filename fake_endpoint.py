@@ -0,0 +1,286 @@
+"""
+Fake Inference Endpoint
+
+A local stand-in for the HuggingFace Inference API, used for benchmarks
+and offline development. It speaks the OpenAI-compatible chat completions
+protocol that HuggingFaceEndpoint/ChatHuggingFace use, with configurable
+latency, token rate, error rate and canned outputs.
+
+Usage:
+    python fake_endpoint.py --port 8080 --latency 0.3 --token-rate 40
+    LLM_ENDPOINT_URL=http://127.0.0.1:8080 streamlit run app.py
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OUTPUTS = {
+    "summary": [
+        "Reinforcement Learning is a machine learning paradigm in which an agent "
+        "learns to make decisions by interacting with an environment and receiving "
+        "rewards. Key concepts include states, actions, policies, value functions "
+        "and the exploration-exploitation trade-off. It is applied in robotics, "
+        "game playing, recommendation systems and resource management."
+    ],
+    "subtopics": [
+        "1. Markov Decision Processes\n2. Q-Learning and Temporal Difference Methods\n3. Policy Gradient Algorithms",
+        "Here are the subtopics:\n- Markov Decision Processes\n- Deep Q-Networks (DQN)\n- Exploration vs. Exploitation",
+        "1. **Markov Decision Processes**\n2. **Reward Shaping Techniques**\n3. **Actor-Critic Methods**",
+    ],
+    "card": [
+        '{"summary": "Reinforcement Learning is a machine learning paradigm in which '
+        'an agent learns by trial and error from rewards.", "subtopics": '
+        '["Markov Decision Processes", "Q-Learning and Temporal Difference Methods", '
+        '"Policy Gradient Algorithms"]}'
+    ],
+}
+
+_TOKEN_RE = re.compile(r"\S+\s*|\s+")
+
+
+def classify_prompt(prompt: str) -> str:
+    """Guesses which app prompt a request carries, to pick a canned output."""
+    if "JSON" in prompt:
+        return "card"
+    if "EXACTLY 3" in prompt or "EXATAMENTE 3" in prompt:
+        return "subtopics"
+    return "summary"
+
+
+class FakeEndpointConfig:
+    """Behaviour knobs shared by all request handlers of a server"""
+
+    def __init__(
+        self,
+        latency: float = 0.3,
+        token_rate: float = 50.0,
+        error_rate: float = 0.0,
+        outputs: dict = None,
+        seed: int = None,
+    ):
+        """
+        Args:
+            latency: Seconds before the first token is produced
+            token_rate: Tokens produced per second after the first one (0 = instant)
+            error_rate: Fraction of requests answered with HTTP 503
+            outputs: Canned outputs per prompt kind ('summary', 'subtopics',
+                'card'); each value is a list cycled through in order
+            seed: Seed for the error-rate random generator
+        """
+        self.latency = latency
+        self.token_rate = token_rate
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._outputs = {
+            kind: itertools.cycle(texts)
+            for kind, texts in {**DEFAULT_OUTPUTS, **(outputs or {})}.items()
+        }
+
+    def next_output(self, kind: str) -> str:
+        with self._lock:
+            return next(self._outputs[kind])
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            self.requests += 1
+            failed = self.random.random() < self.error_rate
+            self.errors += failed
+            return failed
+
+
+class FakeEndpointHandler(BaseHTTPRequestHandler):
+    """Serves /v1/chat/completions (plain and streamed) and /health"""
+
+    protocol_version = "HTTP/1.1"
+    config: FakeEndpointConfig = None
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def do_GET(self):
+        if self.path.rstrip("/") in ("/health", "/v1/models"):
+            self._send_json(200, {"status": "ok", "data": [{"id": "fake-model"}]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": "not found"})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+
+        if self.config.should_fail():
+            time.sleep(self.config.latency)
+            self._send_json(503, {"error": "Model is overloaded"})
+            return
+
+        prompt = "\n".join(
+            str(message.get("content", "")) for message in body.get("messages", [])
+        )
+        kind = classify_prompt(prompt)
+        tokens, finish_reason = self._limit_tokens(
+            self.config.next_output(kind),
+            body.get("max_tokens"),
+            body.get("stop"),
+        )
+        usage = {
+            "prompt_tokens": len(_TOKEN_RE.findall(prompt)),
+            "completion_tokens": len(tokens),
+            "total_tokens": len(_TOKEN_RE.findall(prompt)) + len(tokens),
+        }
+        model = body.get("model") or "fake-model"
+
+        time.sleep(self.config.latency)
+        if body.get("stream"):
+            self._stream(tokens, model, usage, body.get("stream_options") or {}, finish_reason)
+        else:
+            if self.config.token_rate:
+                time.sleep(max(len(tokens) - 1, 0) / self.config.token_rate)
+            self._send_json(
+                200,
+                {
+                    "id": f"chatcmpl-{uuid.uuid4().hex}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": "".join(tokens)},
+                            "finish_reason": finish_reason,
+                        }
+                    ],
+                    "usage": usage,
+                },
+            )
+
+    @staticmethod
+    def _limit_tokens(text: str, max_tokens, stop) -> tuple:
+        """Apply stop sequences and max_tokens; returns (tokens, finish_reason)"""
+        if stop:
+            for sequence in [stop] if isinstance(stop, str) else stop:
+                if sequence and sequence in text:
+                    text = text[: text.index(sequence)]
+        tokens = _TOKEN_RE.findall(text)
+        if max_tokens and len(tokens) > max_tokens:
+            return tokens[:max_tokens], "length"
+        return tokens, "stop"
+
+    def _stream(self, tokens, model, usage, stream_options, finish_reason="stop"):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        chunk_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+        def send(choices, extra=None):
+            payload = {
+                "id": chunk_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": choices,
+                **(extra or {}),
+            }
+            self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        try:
+            for i, token in enumerate(tokens):
+                if i and self.config.token_rate:
+                    time.sleep(1 / self.config.token_rate)
+                send([{"index": 0, "delta": {"content": token}, "finish_reason": None}])
+
+            send([{"index": 0, "delta": {}, "finish_reason": finish_reason}])
+            if stream_options.get("include_usage"):
+                send([], {"usage": usage})
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            logger.debug("Client closed the stream early")
+
+    def _send_json(self, status: int, payload: dict):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_server(
+    config: FakeEndpointConfig = None, host: str = "127.0.0.1", port: int = 0
+) -> ThreadingHTTPServer:
+    """
+    Start a fake endpoint on a background thread
+
+    Args:
+        config: Behaviour of the endpoint (defaults to FakeEndpointConfig())
+        host: Interface to bind
+        port: Port to bind (0 picks a free one)
+
+    Returns:
+        The running server; its URL is http://{host}:{server.server_port}
+    """
+    handler = type(
+        "ConfiguredFakeEndpointHandler",
+        (FakeEndpointHandler,),
+        {"config": config or FakeEndpointConfig()},
+    )
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-endpoint", daemon=True).start()
+    return server
+
+
+def main():
+    """Runs the fake endpoint in the foreground."""
+    parser = argparse.ArgumentParser(description="Local fake LLM inference endpoint.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.3, help="Seconds to first token")
+    parser.add_argument("--token-rate", type=float, default=50.0, help="Tokens per second")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of 503s")
+    parser.add_argument(
+        "--outputs", help="JSON file mapping summary/subtopics/card to lists of outputs"
+    )
+    args = parser.parse_args()
+
+    outputs = None
+    if args.outputs:
+        with open(args.outputs, encoding="utf-8") as f:
+            outputs = json.load(f)
+
+    logging.basicConfig(level=logging.INFO)
+    config = FakeEndpointConfig(args.latency, args.token_rate, args.error_rate, outputs)
+    server = ThreadingHTTPServer(
+        (args.host, args.port),
+        type("ConfiguredFakeEndpointHandler", (FakeEndpointHandler,), {"config": config}),
+    )
+    logger.info(f"Fake endpoint listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
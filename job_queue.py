@@ -0,0 +1,411 @@
+"""
+Job Queue Module - Durable SQLite-Backed Work Queue
+
+Generation requests are stored as jobs in the card database and run by
+separate worker processes (see worker.py), so the Streamlit script only
+enqueues work and polls its status.
+
+Workers claim a job by leasing it for a visibility timeout and renew the
+lease while the job runs; if a worker dies, the lease expires and another
+worker picks the job up again. Failed
+jobs are retried with exponential backoff until max_attempts, and higher
+priority jobs are claimed first.
+"""
+
+import json
+import logging
+import sqlite3
+import time
+from typing import Dict, List, Optional
+
+from config import JOB_SETTINGS
+from database import CardDatabase
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseLostError(RuntimeError):
+    """Raised by a job handler whose worker no longer holds the job's lease"""
+
+
+JOB_FIELDS = (
+    "id",
+    "kind",
+    "payload",
+    "status",
+    "priority",
+    "attempts",
+    "max_attempts",
+    "progress",
+    "result",
+    "error",
+    "created_at",
+    "updated_at",
+)
+JOB_COLUMNS = ", ".join(JOB_FIELDS)
+
+
+class JobQueue:
+    """Persistent priority queue of jobs stored next to the cards"""
+
+    def __init__(
+        self,
+        db: CardDatabase,
+        visibility_timeout: float = JOB_SETTINGS["visibility_timeout"],
+        max_attempts: int = JOB_SETTINGS["max_attempts"],
+        retry_backoff: float = JOB_SETTINGS["retry_backoff"],
+    ):
+        """
+        Args:
+            db: Card database whose file (and connection pool) holds the jobs
+            visibility_timeout: Seconds a claimed job stays leased to a worker
+            max_attempts: Default number of attempts before a job fails
+            retry_backoff: Base delay (seconds) before retrying a failed job;
+                doubled after every attempt
+        """
+        self.db = db
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.init_table()
+
+    def init_table(self):
+        """Create the jobs table if it doesn't exist"""
+        with self.db._connection() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    dedup_key TEXT,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    priority INTEGER NOT NULL DEFAULT 0,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    available_at REAL NOT NULL,
+                    locked_by TEXT,
+                    progress REAL NOT NULL DEFAULT 0,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+
+                CREATE INDEX IF NOT EXISTS idx_jobs_claim
+                ON jobs(status, priority DESC, available_at, id);
+
+                CREATE INDEX IF NOT EXISTS idx_jobs_dedup
+                ON jobs(dedup_key, status);
+            """
+            )
+
+    @staticmethod
+    def _row_to_job(row) -> Dict:
+        """Convert a row selected with JOB_COLUMNS into a job dictionary"""
+        job = dict(zip(JOB_FIELDS, row))
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def enqueue(
+        self,
+        kind: str,
+        payload: Dict,
+        priority: int = 0,
+        dedup_key: Optional[str] = None,
+        max_attempts: Optional[int] = None,
+    ) -> int:
+        """
+        Add a job to the queue
+
+        Args:
+            kind: Job type, used by workers to pick a handler
+            payload: JSON-serializable job arguments
+            priority: Higher values are claimed first
+            dedup_key: If a queued or running job has the same key, its ID
+                is returned instead of adding a duplicate
+            max_attempts: Attempts before giving up (defaults to the queue's)
+
+        Returns:
+            ID of the new (or already active) job
+        """
+        now = time.time()
+        with self.db._connection() as conn:
+            if dedup_key:
+                # Take the write lock first so concurrent enqueues can't both miss
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute(
+                    """
+                    SELECT id FROM jobs
+                    WHERE dedup_key = ? AND status IN ('queued', 'running')
+                    ORDER BY id
+                    LIMIT 1
+                """,
+                    (dedup_key,),
+                ).fetchone()
+                if row:
+                    logger.info(f"Joining active job {row[0]} for {dedup_key}")
+                    return row[0]
+
+            cursor = conn.execute(
+                """
+                INSERT INTO jobs
+                (kind, payload, dedup_key, priority, max_attempts,
+                 available_at, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+                (
+                    kind,
+                    json.dumps(payload, ensure_ascii=False),
+                    dedup_key,
+                    priority,
+                    max_attempts or self.max_attempts,
+                    now,
+                    now,
+                    now,
+                ),
+            )
+            job_id = cursor.lastrowid
+
+        logger.info(f"Enqueued {kind} job {job_id} (priority {priority})")
+        return job_id
+
+    def claim(self, worker_id: str, token_ref: Optional[str] = None) -> Optional[Dict]:
+        """
+        Lease the next available job to a worker
+
+        Queued jobs and running jobs whose lease expired are both eligible;
+        expired jobs that used all their attempts are marked failed instead.
+        The progress and partial result of an earlier attempt are cleared.
+        API tokens are never stored in jobs: a job submitted with a token
+        other than the workers' default carries its token_ref
+        (utils.token_fingerprint), and only workers holding that token in
+        their environment claim it.
+
+        Args:
+            worker_id: Identifier of the claiming worker
+            token_ref: Fingerprint of the worker's dedicated token, or None
+                for workers serving jobs without one
+
+        Returns:
+            The claimed job dictionary, or None if nothing is available
+        """
+        now = time.time()
+        with self.db._connection() as conn:
+            conn.execute(
+                """
+                UPDATE jobs
+                SET status = 'failed', error = 'Visibility timeout expired',
+                    locked_by = NULL, updated_at = ?
+                WHERE status = 'running' AND available_at <= ? AND attempts >= max_attempts
+            """,
+                (now, now),
+            )
+
+            row = conn.execute(
+                f"""
+                UPDATE jobs
+                SET status = 'running', attempts = attempts + 1, locked_by = ?,
+                    available_at = ?, updated_at = ?, progress = 0, result = NULL
+                WHERE id = (
+                    SELECT id FROM jobs
+                    WHERE status IN ('queued', 'running') AND available_at <= ?
+                      AND json_extract(payload, '$.token_ref') IS ?
+                    ORDER BY priority DESC, available_at, id
+                    LIMIT 1
+                )
+                RETURNING {JOB_COLUMNS}
+            """,
+                (worker_id, now + self.visibility_timeout, now, now, token_ref),
+            ).fetchone()
+
+        return self._row_to_job(row) if row else None
+
+    def renew(self, job_id: int, worker_id: str) -> bool:
+        """
+        Extend a worker's lease on a job by another visibility timeout
+
+        Returns:
+            False if the worker no longer holds the lease
+        """
+        return self.set_progress(job_id, worker_id, None)
+
+    def set_progress(
+        self,
+        job_id: int,
+        worker_id: str,
+        progress: Optional[float],
+        partial: Optional[Dict] = None,
+    ) -> bool:
+        """
+        Record the progress of a leased job, renewing its lease
+
+        Args:
+            job_id: Leased job
+            worker_id: Worker holding the lease
+            progress: Fraction done (0-1), or None to keep the current one
+            partial: Intermediate result, readable from the job's result
+                field until the job completes
+
+        Returns:
+            False if the worker no longer holds the lease
+        """
+        now = time.time()
+        with self.db._connection() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE jobs
+                SET progress = COALESCE(?, progress), result = COALESCE(?, result),
+                    available_at = ?, updated_at = ?
+                WHERE id = ? AND status = 'running' AND locked_by = ?
+            """,
+                (
+                    progress,
+                    json.dumps(partial, ensure_ascii=False) if partial is not None else None,
+                    now + self.visibility_timeout,
+                    now,
+                    job_id,
+                    worker_id,
+                ),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: int, worker_id: str, result: Dict) -> bool:
+        """
+        Mark a leased job as done
+
+        Returns:
+            False if the worker no longer held the lease
+        """
+        with self.db._connection() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE jobs
+                SET status = 'done', progress = 1, result = ?, error = NULL,
+                    locked_by = NULL, updated_at = ?
+                WHERE id = ? AND locked_by = ?
+            """,
+                (json.dumps(result, ensure_ascii=False), time.time(), job_id, worker_id),
+            )
+        if cursor.rowcount != 1:
+            logger.warning(f"Worker {worker_id} lost the lease on job {job_id}")
+            return False
+        return True
+
+    def fail(self, job_id: int, worker_id: str, error: str) -> str:
+        """
+        Record a failed attempt, scheduling a retry if attempts remain
+
+        Returns:
+            The job's new status ('queued' for a retry, or 'failed')
+        """
+        now = time.time()
+        with self.db._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND locked_by = ?",
+                (job_id, worker_id),
+            ).fetchone()
+            if row is None:
+                logger.warning(f"Worker {worker_id} lost the lease on job {job_id}")
+                return "running"
+
+            attempts, max_attempts = row
+            if attempts < max_attempts:
+                status = "queued"
+                delay = self.retry_backoff * 2 ** (attempts - 1)
+                conn.execute(
+                    """
+                    UPDATE jobs
+                    SET status = 'queued', error = ?, available_at = ?, progress = 0,
+                        result = NULL, locked_by = NULL, updated_at = ?
+                    WHERE id = ?
+                """,
+                    (error, now + delay, now, job_id),
+                )
+                logger.info(f"Job {job_id} failed (attempt {attempts}), retrying in {delay:.0f}s")
+            else:
+                status = "failed"
+                conn.execute(
+                    """
+                    UPDATE jobs
+                    SET status = 'failed', error = ?, locked_by = NULL, updated_at = ?
+                    WHERE id = ?
+                """,
+                    (error, now, job_id),
+                )
+                logger.warning(f"Job {job_id} failed after {attempts} attempts: {error}")
+        return status
+
+    def cancel(self, job_ids: List[int]) -> int:
+        """
+        Cancel jobs that no worker has claimed yet
+
+        Returns:
+            Number of cancelled jobs
+        """
+        if not job_ids:
+            return 0
+        placeholders = ", ".join("?" for _ in job_ids)
+        with self.db._connection() as conn:
+            cursor = conn.execute(
+                f"""
+                UPDATE jobs
+                SET status = 'cancelled', updated_at = ?
+                WHERE id IN ({placeholders}) AND status = 'queued'
+            """,
+                (time.time(), *job_ids),
+            )
+        return cursor.rowcount
+
+    def get_job(self, job_id: int) -> Optional[Dict]:
+        """Retrieve a job by ID"""
+        try:
+            with self.db._connection() as conn:
+                row = conn.execute(
+                    f"SELECT {JOB_COLUMNS} FROM jobs WHERE id = ?", (job_id,)
+                ).fetchone()
+            return self._row_to_job(row) if row else None
+        except sqlite3.Error as e:
+            logger.error(f"Error retrieving job {job_id}: {e}")
+            return None
+
+    def get_jobs(self, job_ids: List[int]) -> Dict[int, Dict]:
+        """Retrieve several jobs by ID, keyed by ID"""
+        if not job_ids:
+            return {}
+        placeholders = ", ".join("?" for _ in job_ids)
+        with self.db._connection() as conn:
+            rows = conn.execute(
+                f"SELECT {JOB_COLUMNS} FROM jobs WHERE id IN ({placeholders})",
+                list(job_ids),
+            ).fetchall()
+        return {row[0]: self._row_to_job(row) for row in rows}
+
+    def purge(self, older_than: float = 7 * 24 * 3600) -> int:
+        """
+        Delete finished jobs last updated more than older_than seconds ago
+
+        Returns:
+            Number of deleted jobs
+        """
+        with self.db._connection() as conn:
+            cursor = conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed', 'cancelled') AND updated_at < ?",
+                (time.time() - older_than,),
+            )
+        return cursor.rowcount
+
+    def get_statistics(self) -> Dict:
+        """
+        Get job counts per status
+
+        Returns:
+            Dictionary mapping each status to its number of jobs
+        """
+        with self.db._connection() as conn:
+            rows = conn.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall()
+        return {"queued": 0, "running": 0, "done": 0, "failed": 0, **dict(rows)}
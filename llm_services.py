@@ -2,104 +2,707 @@
 LLM Service Module (Bilingual Version)
 """
 
+import time
+import threading
 import streamlit as st
 import logging
-from langchain_huggingface import HuggingFaceEndpoint, ChatHuggingFace
+from collections.abc import Iterator
+from functools import partial
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
 
-from config import MODELS, TRANSLATIONS
-from utils import parse_subtopics_response
+from config import (
+    MODELS,
+    MODEL_CLIENT_SETTINGS,
+    TRANSLATIONS,
+    DEFAULT_GENERATION_MODE,
+    DEFAULT_BACKEND,
+    SUBTOPIC_STOP_SEQUENCES,
+)
+from utils import iter_subtopics, parse_card_response
+from backends import create_chat_model
+from cache import ResponseCache
+from metrics import timed, observe_stage
+from singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# Shared by every session of the process
+_inflight = SingleFlight()
 
-@st.cache_resource(ttl=3600)
-def initialize_model(model_name, api_token, temperature, max_tokens):
+
+class GenerationUsage:
+    """
+    Token and latency accounting for the LLM calls behind one card.
+
+    Pass the same instance to every call of a generation and store
+    ``as_dict()`` with the card. When a card is routed to several models
+    (failovers and hedged duplicates), give each model its own instance,
+    store the answering model's and count the other calls as retries.
+    Calls answered from the response cache or by an identical request
+    already in flight are not counted.
+    """
+
+    def __init__(self, start: float | None = None):
+        """
+        Args:
+            start (float, optional): ``time.perf_counter()`` value the
+                latency is measured from; defaults to now.
+        """
+        self.prompt_tokens = None
+        self.completion_tokens = None
+        self.first_token_latency = None
+        self.llm_calls = 0
+        self.retries = 0
+        self._start = time.perf_counter() if start is None else start
+        self._lock = threading.Lock()
+
+    def record(self, message: BaseMessage | None, first_token: float | None = None):
+        """Adds one LLM call and the token usage reported in its response."""
+        usage = getattr(message, "usage_metadata", None)
+        with self._lock:
+            self.llm_calls += 1
+            if usage:
+                self.prompt_tokens = (self.prompt_tokens or 0) + usage.get("input_tokens", 0)
+                self.completion_tokens = (self.completion_tokens or 0) + usage.get(
+                    "output_tokens", 0
+                )
+            if first_token is not None and self.first_token_latency is None:
+                self.first_token_latency = first_token
+
+    def add_retry(self, count: int = 1):
+        """Counts requests that repeat an earlier one (failover or hedge)."""
+        with self._lock:
+            self.retries += count
+
+    def as_dict(self) -> dict:
+        """Returns the usage so far, with the latency measured up to now."""
+        with self._lock:
+            return {
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "first_token_latency": self.first_token_latency,
+                "latency": time.perf_counter() - self._start,
+                "llm_calls": self.llm_calls,
+                "retries": self.retries,
+            }
+
+
+@st.cache_resource(
+    ttl=MODEL_CLIENT_SETTINGS["ttl_seconds"],
+    max_entries=MODEL_CLIENT_SETTINGS["max_entries"],
+)
+def get_client(model_name, api_token):
     """
-    Initializes and caches the selected LLM.
+    Creates and caches one chat client per (model, token).
+
+    The client is shared by every temperature/max_tokens combination, so
+    moving a sidebar slider reuses its keep-alive connections instead of
+    building a new client. The model's MODELS entry picks the backend
+    serving it (HuggingFace Inference by default, or an OpenAI-compatible
+    server; see backends.py).
     """
     try:
         if model_name not in MODELS:
             raise ValueError(f"Unknown model: {model_name}")
 
         config = MODELS[model_name]
-        logger.info(
-            f"Initializing model: {config['repo_id']} with temp={temperature}, max_tokens={max_tokens}"
-        )
+        backend = config.get("backend", DEFAULT_BACKEND)
+        logger.info(f"Creating {backend} client for model: {config['repo_id']}")
 
-        llm_base = HuggingFaceEndpoint(
-            repo_id=config["repo_id"],
-            huggingfacehub_api_token=api_token,
-            temperature=temperature,
-            max_new_tokens=max_tokens,
-        )
-        return ChatHuggingFace(llm=llm_base)
+        with timed("model_init", model_name):
+            return create_chat_model(config, api_token)
 
     except Exception as e:
-        logger.error(f"Failed to initialize model {model_name}: {e}", exc_info=True)
+        logger.error(f"Failed to create client for model {model_name}: {e}", exc_info=True)
         raise e
 
 
-def generate_summary(llm: ChatHuggingFace, topic: str, lang_code: str) -> str:
+def initialize_model(model_name, api_token, temperature, max_tokens):
+    """
+    Returns the selected LLM with the given generation parameters.
+
+    The parameters are bound per call on top of the shared client from
+    ``get_client``, so this is cheap and needs no caching of its own.
+    """
+    logger.info(
+        f"Initializing model: {model_name} with temp={temperature}, max_tokens={max_tokens}"
+    )
+    return get_client(model_name, api_token).bind(
+        temperature=temperature, max_tokens=max_tokens
+    )
+
+
+def _get_template(lang_code: str, template_key: str) -> str:
+    """Returns a prompt template for the language, defaulting to English."""
+    try:
+        return TRANSLATIONS[lang_code][template_key]
+    except KeyError:
+        logger.warning(
+            f"No {template_key} found for lang '{lang_code}'. Defaulting to 'en'."
+        )
+        return TRANSLATIONS["en"][template_key]
+
+
+def _generation_signature(llm: BaseChatModel) -> tuple[str, dict]:
+    """Extracts the model id and generation parameters from a chat model."""
+    bound = getattr(llm, "kwargs", {})
+    chat = getattr(llm, "bound", llm)
+    base = getattr(chat, "llm", chat)
+    model = getattr(base, "repo_id", None) or getattr(chat, "model_id", "unknown")
+    params = {
+        "temperature": bound.get("temperature", getattr(base, "temperature", None)),
+        "max_tokens": bound.get("max_tokens", getattr(base, "max_new_tokens", None)),
+    }
+    return model, params
+
+
+def _build_chain(template_string: str, llm: BaseChatModel):
+    """Builds the prompt | model chain for a template.
+
+    The chain returns chat messages rather than strings so that the usage
+    metadata of each response is kept.
+    """
+    prompt = ChatPromptTemplate.from_messages([("human", template_string)])
+    return prompt | llm
+
+
+def _with_call_limits(llm: BaseChatModel, max_tokens: int | None, stop: list[str] | None):
+    """Binds a per-call token limit and stop sequences, when given."""
+    overrides = {}
+    if max_tokens:
+        overrides["max_tokens"] = max_tokens
+    if stop:
+        overrides["stop"] = stop
+    return llm.bind(**overrides) if overrides else llm
+
+
+def _truncated(message) -> bool:
+    """Whether a response (or streamed chunk) was cut off by its token limit."""
+    return (message.response_metadata or {}).get("finish_reason") == "length"
+
+
+def _invoke(
+    template_string: str,
+    llm: BaseChatModel,
+    topic: str,
+    stage: str,
+    usage: GenerationUsage | None = None,
+    max_tokens: int | None = None,
+    stop: list[str] | None = None,
+) -> tuple[str, bool]:
+    """
+    Sends one prompt, records its timing and usage, and returns the text.
+
+    ``max_tokens`` and ``stop`` apply to this request only; they don't
+    change the model's cache key, so the caller must not cache a response
+    they cut off.
+
+    Returns:
+        tuple[str, bool]: The text, and whether it ended before the token limit.
+    """
+    chain = _build_chain(template_string, _with_call_limits(llm, max_tokens, stop))
+    with timed(stage, _generation_signature(llm)[0]):
+        message = chain.invoke({"question": topic})
+    if usage is not None:
+        usage.record(message)
+    return message.content, not _truncated(message)
+
+
+def _request_key(kind, llm, topic, lang_code, template) -> str:
+    """Builds the key identifying a generation call, for caching and coalescing."""
+    model, params = _generation_signature(llm)
+    return ResponseCache.make_key(kind, topic, model, lang_code, params, template)
+
+
+def _cached_call(cache, use_cache, kind, llm, topic, lang_code, template, compute):
+    """
+    Runs ``compute`` behind the response cache when one is given.
+
+    ``compute`` returns the result and whether it is complete. With
+    ``use_cache=False`` the lookup is bypassed but a fresh complete result
+    still refreshes the cached entry. Identical calls already in flight
+    (from any session) are joined instead of sent again.
+    """
+    key = _request_key(kind, llm, topic, lang_code, template)
+
+    if cache is not None and use_cache:
+        cached = cache.get(key)
+        if cached is not None:
+            logger.info(f"Cache hit for {kind} of '{topic}'")
+            return cached
+
+    def run():
+        result, complete = compute()
+        if result and complete and cache is not None:
+            cache.set(key, result)
+        elif result and not complete:
+            logger.info(f"Not caching {kind} of '{topic}': cut off by the token limit")
+        return result
+
+    return _inflight.do(key, run)
+
+
+def generate_summary(
+    llm: BaseChatModel,
+    topic: str,
+    lang_code: str,
+    cache: ResponseCache | None = None,
+    use_cache: bool = True,
+    usage: GenerationUsage | None = None,
+    max_tokens: int | None = None,
+    on_token=None,
+) -> str:
     """
     Generates an explanatory summary for a given topic in the specified language.
 
     Args:
-        llm (ChatHuggingFace): The initialized chat model.
+        llm (BaseChatModel): The initialized chat model.
         topic (str): The topic to summarize.
         lang_code (str): The language code (e.g., 'en', 'pt').
+        cache (ResponseCache, optional): Response cache to read from and write to.
+        use_cache (bool): Set to False to bypass cached responses for this call.
+        usage (GenerationUsage, optional): Accounting the call is added to.
+        max_tokens (int, optional): Token limit for this call only.
+        on_token (callable, optional): If given, the summary is streamed
+            (see ``stream_summary``) and this is called with each chunk.
 
     Returns:
         str: The generated summary.
     """
     logger.debug(f"Generating summary for: {topic} in language: {lang_code}")
 
+    if on_token:
+        chunks = []
+        for chunk in stream_summary(
+            llm, topic, lang_code, cache, use_cache, usage, max_tokens
+        ):
+            chunks.append(chunk)
+            on_token(chunk)
+        return "".join(chunks)
+
+    template_string = _get_template(lang_code, "summary_template")
+
+    def compute():
+        return _invoke(template_string, llm, topic, "summary", usage, max_tokens)
+
+    return _cached_call(
+        cache, use_cache, "summary", llm, topic, lang_code, template_string, compute
+    )
+
+
+def stream_summary(
+    llm: BaseChatModel,
+    topic: str,
+    lang_code: str,
+    cache: ResponseCache | None = None,
+    use_cache: bool = True,
+    usage: GenerationUsage | None = None,
+    max_tokens: int | None = None,
+) -> Iterator[str]:
+    """
+    Streams the explanatory summary for a topic token by token.
+
+    A cached summary is yielded as a single chunk. A freshly streamed summary
+    is stored in the cache once the stream has been fully consumed, unless
+    it was cut off by the token limit. If the
+    same summary is already being streamed elsewhere, its final text is
+    yielded as a single chunk once it completes.
+
+    Args:
+        llm (BaseChatModel): The initialized chat model.
+        topic (str): The topic to summarize.
+        lang_code (str): The language code (e.g., 'en', 'pt').
+        cache (ResponseCache, optional): Response cache to read from and write to.
+        use_cache (bool): Set to False to bypass cached responses for this call.
+        usage (GenerationUsage, optional): Accounting the call is added to,
+            including its time to first token.
+        max_tokens (int, optional): Token limit for this call only.
+
+    Yields:
+        str: Chunks of the summary as they arrive from the endpoint.
+    """
+    logger.debug(f"Streaming summary for: {topic} in language: {lang_code}")
+
+    template_string = _get_template(lang_code, "summary_template")
+
+    key = _request_key("summary", llm, topic, lang_code, template_string)
+    if cache is not None and use_cache:
+        cached = cache.get(key)
+        if cached is not None:
+            logger.info(f"Cache hit for summary of '{topic}'")
+            yield cached
+            return
+
+    flight, is_leader = _inflight.join(key)
+    if not is_leader:
+        logger.info(f"Joining summary already being streamed for '{topic}'")
+        summary = _inflight.wait(flight)
+        if summary:
+            yield summary
+        return
+
+    # Ask for a final chunk carrying the token usage of the stream
+    chain = _build_chain(
+        template_string, _with_call_limits(llm, max_tokens, None).bind(stream_usage=True)
+    )
+    model = _generation_signature(llm)[0]
+    chunks = []
+    first_token = None
+    usage_message = None
+    complete = True
+    start = time.perf_counter()
     try:
-        template_string = TRANSLATIONS[lang_code]["summary_template"]
-    except KeyError:
-        logger.warning(
-            f"No summary template found for lang '{lang_code}'. Defaulting to 'en'."
+        with timed("summary_stream", model):
+            for message in chain.stream({"question": topic}):
+                if message.usage_metadata:
+                    usage_message = message
+                if _truncated(message):
+                    complete = False
+                if not message.content:
+                    continue
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+                    observe_stage("summary_first_token", model, first_token)
+                chunks.append(message.content)
+                yield message.content
+    except GeneratorExit:
+        _inflight.finish(
+            key, flight, error=RuntimeError(f"Summary stream for '{topic}' was abandoned")
         )
-        template_string = TRANSLATIONS["en"]["summary_template"]
+        raise
+    except BaseException as e:
+        _inflight.finish(key, flight, error=e)
+        raise
 
-    prompt = ChatPromptTemplate.from_messages([("human", template_string)])
-    output_parser = StrOutputParser()
-    chain = prompt | llm | output_parser
+    if usage is not None:
+        usage.record(usage_message, first_token)
+
+    summary = "".join(chunks)
+    if cache is not None and summary and complete:
+        cache.set(key, summary)
+    _inflight.finish(key, flight, summary)
+
+
+def stream_subtopics(
+    llm: BaseChatModel,
+    topic: str,
+    lang_code: str,
+    cache: ResponseCache | None = None,
+    use_cache: bool = True,
+    usage: GenerationUsage | None = None,
+    max_tokens: int | None = None,
+) -> Iterator[str]:
+    """
+    Streams 3 related subtopics for a topic, one at a time.
 
-    return chain.invoke({"question": topic})
+    The response is parsed while it streams (see ``utils.iter_subtopics``):
+    each subtopic is yielded as soon as its line is complete, and the
+    upstream stream is closed once 3 valid items were parsed, so tokens past
+    them are not generated. Stop sequences (``config.SUBTOPIC_STOP_SEQUENCES``)
+    end the generation server-side when the model starts a 4th item.
+    Cached subtopics, or those of an identical call in progress elsewhere,
+    are yielded all at once.
 
+    Args:
+        llm (BaseChatModel): The initialized chat model.
+        topic (str): The main topic.
+        lang_code (str): The language code (e.g., 'en', 'pt').
+        cache (ResponseCache, optional): Response cache to read from and write to.
+        use_cache (bool): Set to False to bypass cached responses for this call.
+        usage (GenerationUsage, optional): Accounting the call is added to.
+            Token counts are unknown for a stream closed early.
+        max_tokens (int, optional): Token limit for this call only.
 
-def generate_subtopics(llm: ChatHuggingFace, topic: str, lang_code: str) -> list[str]:
+    Yields:
+        str: Each cleaned subtopic.
+    """
+    logger.debug(f"Streaming subtopics for: {topic} in language: {lang_code}")
+
+    template_string = _get_template(lang_code, "subtopics_template")
+
+    key = _request_key("subtopics", llm, topic, lang_code, template_string)
+    if cache is not None and use_cache:
+        cached = cache.get(key)
+        if cached is not None:
+            logger.info(f"Cache hit for subtopics of '{topic}'")
+            yield from cached
+            return
+
+    flight, is_leader = _inflight.join(key)
+    if not is_leader:
+        logger.info(f"Joining subtopics already being generated for '{topic}'")
+        yield from _inflight.wait(flight) or []
+        return
+
+    limited = _with_call_limits(llm, max_tokens, SUBTOPIC_STOP_SEQUENCES)
+    chain = _build_chain(template_string, limited.bind(stream_usage=True))
+    stream = chain.stream({"question": topic})
+    usage_message = None
+    complete = True
+
+    def text_chunks():
+        nonlocal usage_message, complete
+        for message in stream:
+            if message.usage_metadata:
+                usage_message = message
+            if _truncated(message):
+                complete = False
+            if message.content:
+                yield message.content
+
+    chunks = text_chunks()
+    subtopics = []
+    try:
+        with timed("subtopics", _generation_signature(llm)[0]):
+            for subtopic in iter_subtopics(chunks):
+                subtopics.append(subtopic)
+                yield subtopic
+    except GeneratorExit:
+        _inflight.finish(
+            key, flight, error=RuntimeError(f"Subtopics stream for '{topic}' was abandoned")
+        )
+        raise
+    except BaseException as e:
+        _inflight.finish(key, flight, error=e)
+        raise
+    finally:
+        # Stops the generation when the 3 items were parsed before it ended
+        chunks.close()
+        stream.close()
+
+    logger.debug(f"Parsed subtopics: {subtopics}")
+    if usage is not None:
+        usage.record(usage_message)
+    if cache is not None and subtopics and complete:
+        cache.set(key, subtopics)
+    _inflight.finish(key, flight, subtopics)
+
+
+def generate_subtopics(
+    llm: BaseChatModel,
+    topic: str,
+    lang_code: str,
+    cache: ResponseCache | None = None,
+    use_cache: bool = True,
+    usage: GenerationUsage | None = None,
+    max_tokens: int | None = None,
+    on_subtopic=None,
+) -> list[str]:
     """
     Generates 3 related subtopics for a given topic in the specified language.
 
+    The response is streamed and cut off once 3 subtopics were parsed (see
+    ``stream_subtopics``).
+
     Args:
-        llm (ChatHuggingFace): The initialized chat model.
+        llm (BaseChatModel): The initialized chat model.
         topic (str): The main topic.
         lang_code (str): The language code (e.g., 'en', 'pt').
+        cache (ResponseCache, optional): Response cache to read from and write to.
+        use_cache (bool): Set to False to bypass cached responses for this call.
+        usage (GenerationUsage, optional): Accounting the call is added to.
+        max_tokens (int, optional): Token limit for this call only.
+        on_subtopic (callable, optional): Called with each subtopic as soon
+            as it has been parsed.
 
     Returns:
         list[str]: A list of 3 subtopics.
     """
-    logger.debug(f"Generating subtopics for: {topic} in language: {lang_code}")
+    subtopics = []
+    for subtopic in stream_subtopics(
+        llm, topic, lang_code, cache, use_cache, usage, max_tokens
+    ):
+        subtopics.append(subtopic)
+        if on_subtopic:
+            on_subtopic(subtopic)
+    return subtopics
 
-    try:
-        template_string = TRANSLATIONS[lang_code]["subtopics_template"]
-    except KeyError:
-        logger.warning(
-            f"No subtopics template found for lang '{lang_code}'. Defaulting to 'en'."
+
+def generate_card_combined(
+    llm: BaseChatModel,
+    topic: str,
+    lang_code: str,
+    cache: ResponseCache | None = None,
+    use_cache: bool = True,
+    usage: GenerationUsage | None = None,
+    max_tokens: int | None = None,
+) -> tuple[str, list[str]]:
+    """
+    Generates the summary and subtopics for a topic in a single request.
+
+    The model is asked for a JSON object holding both parts, which halves the
+    number of requests and repeated prompt tokens per card.
+
+    Args:
+        llm (BaseChatModel): The initialized chat model.
+        topic (str): The topic to generate content for.
+        lang_code (str): The language code (e.g., 'en', 'pt').
+        cache (ResponseCache, optional): Response cache to read from and write to.
+        use_cache (bool): Set to False to bypass cached responses for this call.
+        usage (GenerationUsage, optional): Accounting the call is added to.
+        max_tokens (int, optional): Token limit for this call only.
+
+    Returns:
+        tuple[str, list[str]]: The generated summary and list of subtopics.
+    """
+    logger.debug(f"Generating combined card for: {topic} in language: {lang_code}")
+
+    template_string = _get_template(lang_code, "card_template")
+
+    def compute():
+        response_text, complete = _invoke(
+            template_string, llm, topic, "card", usage, max_tokens
         )
-        template_string = TRANSLATIONS["en"]["subtopics_template"]
+        logger.debug(f"Raw combined card response: {response_text}")
 
-    prompt = ChatPromptTemplate.from_messages([("human", template_string)])
-    output_parser = StrOutputParser()
-    chain = prompt | llm | output_parser
+        summary, subtopics = parse_card_response(response_text)
+        logger.debug(f"Parsed combined card subtopics: {subtopics}")
+
+        if not summary:
+            return None, False
+        return {"summary": summary, "subtopics": subtopics}, complete
+
+    result = _cached_call(
+        cache, use_cache, "card", llm, topic, lang_code, template_string, compute
+    )
+    if not result:
+        raise ValueError(f"Could not parse combined card response for '{topic}'")
+
+    return result["summary"], result["subtopics"]
+
+
+def generate_card_content(
+    llm: BaseChatModel,
+    topic: str,
+    lang_code: str,
+    on_progress=None,
+    cache: ResponseCache | None = None,
+    use_cache: bool = True,
+    mode: str = DEFAULT_GENERATION_MODE,
+    usage: GenerationUsage | None = None,
+    token_limits: dict | None = None,
+    on_subtopic=None,
+    on_summary_token=None,
+) -> tuple[str, list[str]]:
+    """
+    Generates the summary and the subtopics for a topic concurrently.
+
+    Both prompts are sent at once on a small thread pool, so the card latency
+    is the slowest of the two calls instead of their sum. In ``combined`` mode
+    a single structured request is sent instead.
+
+    Args:
+        llm (BaseChatModel): The initialized chat model.
+        topic (str): The topic to generate content for.
+        lang_code (str): The language code (e.g., 'en', 'pt').
+        on_progress (callable, optional): Called as ``on_progress(done, total)``
+            from the calling thread each time one of the calls finishes.
+        cache (ResponseCache, optional): Response cache shared by both calls.
+        use_cache (bool): Set to False to bypass cached responses for this card.
+        mode (str): One of ``config.GENERATION_MODES``.
+        usage (GenerationUsage, optional): Accounting both calls are added to.
+        token_limits (dict, optional): Per-call max_tokens keyed by "summary",
+            "subtopics" and "card" (see ``token_budget.TokenBudget``).
+        on_subtopic (callable, optional): Called from a pool thread with each
+            subtopic as soon as it has been parsed (``two_call`` mode only).
+        on_summary_token (callable, optional): Called from a pool thread with
+            each chunk of the summary as it streams (``two_call`` mode only).
+
+    Returns:
+        tuple[str, list[str]]: The generated summary and list of subtopics.
 
-    response_text = chain.invoke({"question": topic})
-    logger.debug(f"Raw subtopics response: {response_text}")
+    Raises:
+        Exception: The first error raised by either call is re-raised.
+    """
+    token_limits = token_limits or {}
+
+    if mode == "combined":
+        result = generate_card_combined(
+            llm, topic, lang_code, cache, use_cache, usage, token_limits.get("card")
+        )
+        if on_progress:
+            on_progress(1, 1)
+        return result
+
+    logger.debug(f"Generating card content concurrently for: {topic}")
+
+    tasks = {
+        "summary": partial(generate_summary, on_token=on_summary_token),
+        "subtopics": partial(generate_subtopics, on_subtopic=on_subtopic),
+    }
+    results = {}
+
+    with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+        futures = {
+            executor.submit(
+                func, llm, topic, lang_code, cache, use_cache, usage, token_limits.get(name)
+            ): name
+            for name, func in tasks.items()
+        }
+        try:
+            for done, future in enumerate(as_completed(futures), 1):
+                results[futures[future]] = future.result()
+                if on_progress:
+                    on_progress(done, len(tasks))
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+
+    return results["summary"], results["subtopics"]
+
+
+def stream_card_content(
+    llm: BaseChatModel,
+    topic: str,
+    lang_code: str,
+    cache: ResponseCache | None = None,
+    use_cache: bool = True,
+    usage: GenerationUsage | None = None,
+    token_limits: dict | None = None,
+) -> tuple[Iterator[str], Future]:
+    """
+    Starts a card generation with a streamed summary.
+
+    The subtopics call is sent immediately on a background thread while the
+    caller consumes the summary stream, so both requests overlap.
+
+    Args:
+        llm (BaseChatModel): The initialized chat model.
+        topic (str): The topic to generate content for.
+        lang_code (str): The language code (e.g., 'en', 'pt').
+        cache (ResponseCache, optional): Response cache shared by both calls.
+        use_cache (bool): Set to False to bypass cached responses for this card.
+        usage (GenerationUsage, optional): Accounting both calls are added to.
+        token_limits (dict, optional): Per-call max_tokens keyed by "summary"
+            and "subtopics".
+
+    Returns:
+        tuple[Iterator[str], Future]: The summary token stream and a future
+        resolving to the list of subtopics.
+    """
+    logger.debug(f"Streaming card content for: {topic}")
+    token_limits = token_limits or {}
 
-    parsed_subtopics = parse_subtopics_response(response_text)
-    logger.debug(f"Parsed subtopics: {parsed_subtopics}")
+    executor = ThreadPoolExecutor(max_workers=1)
+    subtopics_future = executor.submit(
+        generate_subtopics,
+        llm,
+        topic,
+        lang_code,
+        cache,
+        use_cache,
+        usage,
+        token_limits.get("subtopics"),
+    )
+    executor.shutdown(wait=False)
 
-    return parsed_subtopics
+    return (
+        stream_summary(
+            llm, topic, lang_code, cache, use_cache, usage, token_limits.get("summary")
+        ),
+        subtopics_future,
+    )
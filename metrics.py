@@ -0,0 +1,306 @@
+"""
+Metrics Module - Per-Stage Timing Instrumentation
+
+Prometheus metrics for the generation pipeline: per-stage and per-model
+latency histograms, error/retry/cache counters and database query timings.
+They can be exported to a Prometheus text file, served over a small local
+HTTP endpoint, or summarized for the app's performance panel.
+
+Generation runs in worker processes (see worker.py), so each worker writes
+its own metrics to a text file in METRICS_SETTINGS["worker_dir"] after
+every job. Exports, the HTTP endpoint and the summaries merge those files
+with the current process's metrics, summing samples with the same labels.
+"""
+
+import functools
+import glob
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    start_http_server,
+    write_to_textfile,
+)
+from prometheus_client.metrics_core import Metric
+from prometheus_client.parser import text_string_to_metric_families
+
+from config import METRICS_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+REGISTRY = CollectorRegistry()
+
+STAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 13, 21, 34, 60)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+
+STAGE_SECONDS = Histogram(
+    "llm_edu_stage_seconds",
+    "Time spent in each generation stage",
+    ["stage", "model"],
+    buckets=STAGE_BUCKETS,
+    registry=REGISTRY,
+)
+STAGE_ERRORS = Counter(
+    "llm_edu_stage_errors_total",
+    "Generation stages that raised an error",
+    ["stage", "model"],
+    registry=REGISTRY,
+)
+RETRIES = Counter(
+    "llm_edu_retries_total",
+    "Generation requests that were retried",
+    ["stage", "model"],
+    registry=REGISTRY,
+)
+CACHE_LOOKUPS = Counter(
+    "llm_edu_cache_lookups_total",
+    "Response cache lookups by result",
+    ["result"],
+    registry=REGISTRY,
+)
+DB_QUERY_SECONDS = Histogram(
+    "llm_edu_db_query_seconds",
+    "Time spent in CardDatabase operations",
+    ["operation"],
+    buckets=QUERY_BUCKETS,
+    registry=REGISTRY,
+)
+
+_server_lock = threading.Lock()
+_server_started = False
+
+
+@contextmanager
+def timed(stage: str, model: str = ""):
+    """
+    Time a block as a pipeline stage
+
+    Errors raised inside the block are counted and re-raised.
+
+    Args:
+        stage: Stage name (e.g. 'summary', 'subtopics', 'save_card')
+        model: Model name, if the stage is model-specific
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.labels(stage, model).inc()
+        raise
+    finally:
+        STAGE_SECONDS.labels(stage, model).observe(time.perf_counter() - start)
+
+
+def observe_stage(stage: str, model: str, seconds: float):
+    """Record a stage duration measured by the caller."""
+    STAGE_SECONDS.labels(stage, model).observe(seconds)
+
+
+def record_stage_error(stage: str, model: str = ""):
+    """Count an error in a stage timed by the caller."""
+    STAGE_ERRORS.labels(stage, model).inc()
+
+
+def timed_query(operation: str):
+    """Decorator timing a CardDatabase method as a database query."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                DB_QUERY_SECONDS.labels(operation).observe(time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+def record_cache_lookup(hit: bool):
+    """Count a response cache hit or miss."""
+    CACHE_LOOKUPS.labels("hit" if hit else "miss").inc()
+
+
+def record_retry(stage: str, model: str = ""):
+    """Count a retried generation request."""
+    RETRIES.labels(stage, model).inc()
+
+
+def export_worker_textfile(worker_id: str, directory: str = METRICS_SETTINGS["worker_dir"]):
+    """
+    Write this process's metrics to its file in the worker metrics directory
+
+    Args:
+        worker_id: Name of the file (one per worker process)
+        directory: Directory shared with the app; does nothing if empty
+    """
+    if not directory:
+        return
+    try:
+        os.makedirs(directory, exist_ok=True)
+        write_to_textfile(os.path.join(directory, f"{worker_id}.prom"), REGISTRY)
+    except OSError as e:
+        logger.error(f"Error writing worker metrics file: {e}")
+
+
+def clear_worker_textfiles(directory: str = METRICS_SETTINGS["worker_dir"]):
+    """Delete the files left by earlier worker processes."""
+    for path in glob.glob(os.path.join(directory, "*.prom")) if directory else []:
+        try:
+            os.remove(path)
+        except OSError as e:
+            logger.error(f"Error removing worker metrics file: {e}")
+
+
+def _merged_families(directory: str = METRICS_SETTINGS["worker_dir"]) -> List[Metric]:
+    """
+    Merge this process's metrics with the worker metrics files
+
+    Samples with the same name and labels are summed; _created timestamps
+    are dropped since they can't be combined.
+    """
+    texts = []
+    for path in glob.glob(os.path.join(directory, "*.prom")) if directory else []:
+        try:
+            with open(path, encoding="utf-8") as f:
+                texts.append(f.read())
+        except OSError as e:
+            logger.error(f"Error reading worker metrics file: {e}")
+
+    families: Dict[str, Metric] = {}
+    values: Dict[str, Dict[tuple, float]] = {}
+    sources = [REGISTRY.collect()] + [text_string_to_metric_families(t) for t in texts]
+    for source in sources:
+        for family in source:
+            if family.name not in families:
+                families[family.name] = Metric(family.name, family.documentation, family.type)
+                values[family.name] = {}
+            merged = values[family.name]
+            for sample in family.samples:
+                if sample.name.endswith("_created"):
+                    continue
+                key = (sample.name, tuple(sorted(sample.labels.items())))
+                merged[key] = merged.get(key, 0.0) + sample.value
+
+    for name, family in families.items():
+        for (sample_name, labels), value in values[name].items():
+            family.add_sample(sample_name, dict(labels), value)
+    return list(families.values())
+
+
+class _MergedCollector:
+    """Collector exposing the merged metrics of the app and its workers"""
+
+    def collect(self):
+        return _merged_families()
+
+
+MERGED_REGISTRY = CollectorRegistry(auto_describe=False)
+MERGED_REGISTRY.register(_MergedCollector())
+
+
+def export_textfile(path: str = METRICS_SETTINGS["textfile"]):
+    """
+    Write all metrics, including the workers', to a Prometheus text file
+
+    The file is written atomically, so it can be picked up by the
+    node_exporter textfile collector at any time.
+    """
+    if not path:
+        return
+    try:
+        write_to_textfile(path, MERGED_REGISTRY)
+    except OSError as e:
+        logger.error(f"Error writing metrics file: {e}")
+
+
+def start_metrics_server(port: int = None) -> bool:
+    """
+    Serve metrics over HTTP on /metrics (once per process)
+
+    Args:
+        port: Port to listen on; defaults to the METRICS_PORT environment
+            variable, and does nothing if neither is set
+
+    Returns:
+        True if the server is running
+    """
+    global _server_started
+
+    port = port or int(os.getenv("METRICS_PORT", 0) or 0)
+    if not port:
+        return False
+
+    with _server_lock:
+        if not _server_started:
+            start_http_server(port, registry=MERGED_REGISTRY)
+            _server_started = True
+            logger.info(f"Metrics server listening on port {port}")
+    return True
+
+
+def _bucket_quantile(buckets: List[tuple], count: float, q: float) -> float:
+    """Estimate a quantile from cumulative histogram buckets."""
+    if not count:
+        return 0.0
+    target = q * count
+    lower_bound, lower_count = 0.0, 0.0
+    for upper_bound, cumulative in buckets:
+        if cumulative >= target:
+            if upper_bound == float("inf"):
+                return lower_bound
+            in_bucket = cumulative - lower_count
+            fraction = (target - lower_count) / in_bucket if in_bucket else 0.0
+            return lower_bound + (upper_bound - lower_bound) * fraction
+        lower_bound, lower_count = upper_bound, cumulative
+    return lower_bound
+
+
+def stage_summary() -> List[Dict]:
+    """
+    Summarize stage timings of the app and its workers for display
+
+    Returns:
+        One dictionary per (stage, model) with count, mean, p95 and errors
+    """
+    samples = {family.name: family.samples for family in _merged_families()}
+
+    series: Dict[tuple, Dict] = {}
+    for sample in samples.get("llm_edu_stage_seconds", []):
+        key = (sample.labels["stage"], sample.labels["model"])
+        entry = series.setdefault(key, {"buckets": [], "count": 0, "sum": 0.0})
+        if sample.name.endswith("_bucket"):
+            entry["buckets"].append((float(sample.labels["le"]), sample.value))
+        elif sample.name.endswith("_count"):
+            entry["count"] = sample.value
+        elif sample.name.endswith("_sum"):
+            entry["sum"] = sample.value
+
+    errors = {}
+    for sample in samples.get("llm_edu_stage_errors", []):
+        if sample.name.endswith("_total"):
+            errors[(sample.labels["stage"], sample.labels["model"])] = sample.value
+
+    summary = []
+    for (stage, model), entry in sorted(series.items()):
+        count = entry["count"]
+        summary.append(
+            {
+                "stage": stage,
+                "model": model,
+                "count": int(count),
+                "mean": entry["sum"] / count if count else 0.0,
+                "p95": _bucket_quantile(sorted(entry["buckets"]), count, 0.95),
+                "errors": int(errors.get((stage, model), 0)),
+            }
+        )
+    return summary
@@ -0,0 +1,162 @@
+"""
+Prefetch Module - Speculative Subtopic Generation
+
+Generates the subtopic cards of a freshly generated card in the background,
+so clicking "Explore" on one of them can skip the LLM round trip.
+
+Prefetches are queued as low priority "prefetch_card" jobs (see
+job_queue.py and worker.py), so workers only pick them up when no
+generation a user is waiting for is queued. The generated content stays in
+the job's result until the user explores the subtopic.
+
+Prefetches are keyed on the model the user asked for (possibly the "auto"
+option), and each session only shares prefetch jobs with itself, so
+cancelling them never takes work away from another session.
+"""
+
+import logging
+import threading
+import uuid
+from typing import Dict, Optional, Tuple
+
+from config import PREFETCH_SETTINGS
+from job_queue import JobQueue
+from utils import normalize_topic
+
+logger = logging.getLogger(__name__)
+
+
+class SubtopicPrefetcher:
+    """Per-session budget and bookkeeping of prefetched subtopic cards"""
+
+    def __init__(self, jobs: JobQueue, budget: int = PREFETCH_SETTINGS["budget"]):
+        """
+        Args:
+            jobs: Queue the prefetch jobs are added to
+            budget: Maximum number of speculative generations for the session
+        """
+        self.jobs = jobs
+        self.budget = budget
+        self.started = 0
+        self.cancelled = 0
+        self.used = 0
+
+        # Scopes the dedup keys of this session's prefetch jobs
+        self._session = uuid.uuid4().hex
+        self._jobs: Dict[Tuple, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(topic, lang_code, model_name, temperature, max_tokens) -> Tuple:
+        return (normalize_topic(topic), lang_code, model_name, temperature, max_tokens)
+
+    def schedule(self, subtopics: list, settings: Dict):
+        """
+        Queue the subtopics of a new card for background generation
+
+        Anything still queued from a previous card is cancelled first, since
+        the user has moved on from it.
+
+        Args:
+            subtopics: Topics to prefetch
+            settings: Generation job payload without the topic (model,
+                language, temperature, max_tokens, mode, ...)
+        """
+        self.cancel_pending()
+
+        with self._lock:
+            for subtopic in subtopics:
+                key = self._key(
+                    subtopic,
+                    settings["language"],
+                    settings["model"],
+                    settings["temperature"],
+                    settings["max_tokens"],
+                )
+                if key in self._jobs:
+                    continue
+                if self.started >= self.budget:
+                    logger.info("Prefetch budget exhausted for this session")
+                    break
+
+                self._jobs[key] = self.jobs.enqueue(
+                    "prefetch_card",
+                    {**settings, "topic": subtopic},
+                    priority=PREFETCH_SETTINGS["priority"],
+                    dedup_key="|".join(
+                        str(part) for part in ("prefetch", self._session, *key)
+                    ),
+                    max_attempts=1,
+                )
+                self.started += 1
+
+    def cancel_pending(self):
+        """Drop queued prefetches that have not started yet"""
+        with self._lock:
+            cancelled = self.jobs.cancel(list(self._jobs.values()))
+            self.cancelled += cancelled
+            # Cancelled jobs don't count against the budget
+            self.started -= cancelled
+            jobs = self.jobs.get_jobs(list(self._jobs.values()))
+            self._jobs = {
+                key: job_id
+                for key, job_id in self._jobs.items()
+                if job_id in jobs and jobs[job_id]["status"] != "cancelled"
+            }
+
+    def take(
+        self,
+        topic: str,
+        lang_code: str,
+        model_name: str,
+        temperature: float,
+        max_tokens: int,
+    ) -> Optional[Tuple[str, list, Dict]]:
+        """
+        Return and consume a prefetched card, if one is ready
+
+        Args:
+            model_name: The model the card is requested with, matching the
+                settings it was scheduled with (AUTO_MODEL included)
+
+        Returns:
+            Tuple of (summary, subtopics, usage, model that generated it),
+            or None if nothing was prefetched
+        """
+        key = self._key(topic, lang_code, model_name, temperature, max_tokens)
+        with self._lock:
+            job_id = self._jobs.get(key)
+            if job_id is None:
+                return None
+            job = self.jobs.get_job(job_id)
+            if job is None or job["status"] != "done":
+                return None
+
+            del self._jobs[key]
+            self.used += 1
+
+        logger.info(f"Using prefetched card for '{topic}'")
+        result = job["result"]
+        return result["summary"], result["subtopics"], result["usage"], result["model"]
+
+    def get_statistics(self) -> Dict:
+        """
+        Get prefetch counters
+
+        Returns:
+            Dictionary with started/completed/used/failed/cancelled counts
+        """
+        with self._lock:
+            statuses = [
+                job["status"]
+                for job in self.jobs.get_jobs(list(self._jobs.values())).values()
+            ]
+            return {
+                "budget": self.budget,
+                "started": self.started,
+                "completed": statuses.count("done") + self.used,
+                "used": self.used,
+                "failed": statuses.count("failed"),
+                "cancelled": self.cancelled,
+                "ready": statuses.count("done"),
+            }
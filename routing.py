@@ -0,0 +1,214 @@
+"""
+Routing Module - Latency-Aware Model Selection with Hedged Requests
+
+Backs the "auto" model option: keeps a rolling window of latencies and
+errors per configured model, sends each request to the fastest healthy
+model (errors expire after a while, so a failing model gets retried
+later) and, optionally, fires a hedged duplicate to the runner-up when the
+first model takes longer than its usual p95.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Tuple
+
+from config import MODELS, ROUTING_SETTINGS
+from metrics import record_retry
+from utils import percentile
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRouter:
+    """Process-wide per-model health tracking and request routing"""
+
+    def __init__(
+        self,
+        models: List[str] = None,
+        window: int = ROUTING_SETTINGS["window"],
+        min_samples: int = ROUTING_SETTINGS["min_samples"],
+        max_error_rate: float = ROUTING_SETTINGS["max_error_rate"],
+        outcome_ttl: float = ROUTING_SETTINGS["outcome_ttl"],
+        hedge_min_delay: float = ROUTING_SETTINGS["hedge_min_delay"],
+        max_workers: int = 8,
+    ):
+        """
+        Args:
+            models: Candidate model names (defaults to every model in MODELS)
+            window: Number of recent requests kept per model
+            min_samples: Requests needed before a model's p95 drives hedging
+                or its error rate can mark it unhealthy
+            max_error_rate: Models failing more often than this are skipped
+                while a healthier one is available
+            outcome_ttl: Seconds after which a request outcome no longer
+                counts towards the error rate
+            hedge_min_delay: Lower bound (seconds) on the hedging delay
+            max_workers: Threads shared by primary and hedged requests
+        """
+        self.models = list(models or MODELS.keys())
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.outcome_ttl = outcome_ttl
+        self.hedge_min_delay = hedge_min_delay
+        self.hedges = 0
+        self.hedge_wins = 0
+
+        self._latencies = {m: deque(maxlen=window) for m in self.models}
+        self._outcomes = {m: deque(maxlen=window) for m in self.models}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="router")
+
+    def record(self, model: str, seconds: float, ok: bool):
+        """Record the outcome of a request sent to a model"""
+        with self._lock:
+            if model not in self._outcomes:
+                return
+            self._outcomes[model].append((time.monotonic(), ok))
+            if ok:
+                self._latencies[model].append(seconds)
+
+    def _recent_outcomes(self, model: str) -> List[bool]:
+        cutoff = time.monotonic() - self.outcome_ttl
+        return [ok for at, ok in self._outcomes[model] if at >= cutoff]
+
+    def _error_rate(self, model: str) -> float:
+        outcomes = self._recent_outcomes(model)
+        return outcomes.count(False) / len(outcomes) if outcomes else 0.0
+
+    def _is_healthy(self, model: str) -> bool:
+        # Too few recent outcomes to judge: keep trying the model, which
+        # also lets a model recover once its old errors have expired
+        if len(self._recent_outcomes(model)) < self.min_samples:
+            return True
+        return self._error_rate(model) <= self.max_error_rate
+
+    def _expected_latency(self, model: str) -> float:
+        latencies = self._latencies[model]
+        # Models without data are tried first, so every model gets measured
+        return percentile(latencies, 50) if latencies else 0.0
+
+    def rank(self) -> List[str]:
+        """
+        Order the models from most to least preferred
+
+        Healthy models come first, fastest median latency first; unhealthy
+        ones follow, least failing first. A model is only unhealthy after
+        min_samples recent outcomes within outcome_ttl.
+        """
+        with self._lock:
+            healthy = [m for m in self.models if self._is_healthy(m)]
+            unhealthy = [m for m in self.models if m not in healthy]
+            healthy.sort(key=self._expected_latency)
+            unhealthy.sort(key=self._error_rate)
+            return healthy + unhealthy
+
+    def hedge_delay(self, model: str) -> float:
+        """Seconds to wait on a model before hedging to another one"""
+        with self._lock:
+            latencies = list(self._latencies[model])
+        if len(latencies) < self.min_samples:
+            return max(self.hedge_min_delay, max(latencies, default=0.0))
+        return max(self.hedge_min_delay, percentile(latencies, 95))
+
+    def _timed_call(self, fn: Callable[[str], Any], model: str) -> Any:
+        start = time.perf_counter()
+        try:
+            result = fn(model)
+        except Exception:
+            self.record(model, time.perf_counter() - start, ok=False)
+            raise
+        self.record(model, time.perf_counter() - start, ok=True)
+        return result
+
+    def run(self, fn: Callable[[str], Any], hedge: bool = ROUTING_SETTINGS["hedge"]) -> Tuple[str, Any]:
+        """
+        Run a request on the best model, hedging to the runner-up if slow
+
+        The first successful answer wins; the slower request is left to
+        finish in the background, and its latency still feeds the stats.
+        If a request fails, the next model in the ranking is tried.
+
+        Args:
+            fn: Called with a model name; performs the request on that model
+            hedge: Whether to fire a duplicate request after the p95 delay
+
+        Returns:
+            Tuple of (model that answered, its result)
+
+        Raises:
+            Exception: The last error, if every model failed
+        """
+        candidates = self.rank()
+        pending = {}
+        hedged_futures = set()
+        last_error = None
+
+        def launch():
+            model = candidates.pop(0)
+            future = self._executor.submit(self._timed_call, fn, model)
+            pending[future] = model
+            return future
+
+        logger.info(f"Routing request to {pending[launch()]}")
+
+        while pending:
+            timeout = None
+            if hedge and candidates and len(pending) == 1:
+                timeout = self.hedge_delay(next(iter(pending.values())))
+
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                future = launch()
+                hedged_futures.add(future)
+                hedged = pending[future]
+                with self._lock:
+                    self.hedges += 1
+                record_retry("hedge", hedged)
+                logger.info(f"Hedging request to {hedged} after {timeout:.2f}s")
+                continue
+
+            for future in done:
+                model = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    last_error = e
+                    logger.warning(f"Routed request to {model} failed: {e}")
+                    if candidates and not pending:
+                        record_retry("failover", candidates[0])
+                        launch()
+                    continue
+
+                # A failover answering after the first request failed is
+                # not a hedge; only answers from hedged requests count
+                if future in hedged_futures:
+                    with self._lock:
+                        self.hedge_wins += 1
+                logger.info(f"Routed request answered by {model}")
+                return model, result
+
+        raise last_error
+
+    def get_statistics(self) -> Dict:
+        """
+        Get per-model routing statistics
+
+        Returns:
+            Dictionary with hedge counters and, per model, recent request count,
+            error rate and p50/p95 latency
+        """
+        with self._lock:
+            models = {
+                m: {
+                    "requests": len(self._recent_outcomes(m)),
+                    "error_rate": self._error_rate(m),
+                    "p50": percentile(self._latencies[m], 50) if self._latencies[m] else None,
+                    "p95": percentile(self._latencies[m], 95) if self._latencies[m] else None,
+                }
+                for m in self.models
+            }
+            return {"hedges": self.hedges, "hedge_wins": self.hedge_wins, "models": models}
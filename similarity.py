@@ -0,0 +1,331 @@
+"""
+Similarity Module - Local Near-Duplicate Topic Index
+
+Finds stored cards whose topic is close to a new request, so an existing
+card can be offered instead of generating a new one. Runs entirely on CPU
+with NumPy; no embeddings model or network access is needed.
+
+Each card becomes a sparse vector of hashed features: character n-grams of
+the topic words, the words themselves (with a plural "s" stripped), the
+acronym of multi-word topics ("Convolutional Neural Networks" -> "cnn") and,
+with a lower weight, the words opening the summary. Vectors are stored as
+inverted postings in growable arrays, so a lookup only touches the postings
+of the query's features and scores them with a single np.bincount.
+
+Single-word queries such as "CNNs" are too short to score well against a
+full card vector, so acronyms (topic initials and parenthesized acronyms in
+the summary) are also kept in an exact-match map.
+
+Cards in every language are searched, preferring the query's language, so
+topics written alike in both languages ("Machine Learning", "CNNs") find
+each other. The features are lexical, though: a translated topic such as
+"Redes Neurais Convolucionais" shares only a few n-grams with
+"Convolutional Neural Networks" (a score around 0.4) and is not matched.
+
+Removed cards leave inactive rows in the postings until they make up
+compact_fraction of the index, when the postings are rebuilt without them.
+"""
+
+import logging
+import re
+import threading
+import unicodedata
+import zlib
+from array import array
+from collections import Counter
+from typing import Dict, Optional
+
+import numpy as np
+
+from config import SIMILARITY_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+N_FEATURES = 1 << 20
+NGRAM_SIZES = (3, 4)
+SUMMARY_WORDS = 30
+SUMMARY_WEIGHT = 0.5
+# Postings shorter than this are always scored, so small indexes are exact
+MIN_PRUNED_POSTINGS = 1000
+
+_WORD_RE = re.compile(r"\w+")
+_ACRONYM_RE = re.compile(r"\(([A-Z][A-Za-z]{1,7})\)")
+
+
+def _strip_accents(text: str) -> str:
+    """Lowercases text and removes diacritics."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def _words(text: str) -> list[str]:
+    """Splits text into accent-free words, dropping a plural trailing 's'."""
+    words = []
+    for word in _WORD_RE.findall(_strip_accents(text)):
+        if len(word) > 3 and word.endswith("s"):
+            word = word[:-1]
+        words.append(word)
+    return words
+
+
+def _hash(feature: str) -> int:
+    return zlib.crc32(feature.encode("utf-8")) % N_FEATURES
+
+
+def _topic_acronym(words: list[str]) -> Optional[str]:
+    """Builds the acronym of a multi-word topic from its significant words."""
+    significant = [w for w in words if len(w) > 2]
+    if len(significant) >= 2:
+        return "".join(w[0] for w in significant)
+    return None
+
+
+def _acronyms(topic: str, summary: str) -> set[str]:
+    """Collects the acronyms a card can be looked up by."""
+    acronyms = {_words(match)[0] for match in _ACRONYM_RE.findall(summary)}
+    topic_acronym = _topic_acronym(_words(topic))
+    if topic_acronym:
+        acronyms.add(topic_acronym)
+    return acronyms
+
+
+def _topic_features(topic: str) -> Counter:
+    """Extracts weighted hashed features from a topic string."""
+    features = Counter()
+    words = _words(topic)
+
+    for word in words:
+        features[_hash(f"w:{word}")] += 1.0
+        padded = f" {word} "
+        for n in NGRAM_SIZES:
+            for i in range(len(padded) - n + 1):
+                features[_hash(f"c:{padded[i:i + n]}")] += 1.0
+
+    acronym = _topic_acronym(words)
+    if acronym:
+        features[_hash(f"w:{acronym}")] += 1.0
+
+    return features
+
+
+def _summary_features(summary: str) -> Counter:
+    """Extracts lightly weighted word features from the opening of a summary."""
+    features = Counter()
+    for word in _words(summary)[:SUMMARY_WORDS]:
+        features[_hash(f"w:{word}")] += SUMMARY_WEIGHT
+    return features
+
+
+def _normalize(features: Counter) -> Dict[int, float]:
+    """Applies sublinear weighting and L2-normalizes a feature vector."""
+    weighted = {f: 1.0 + np.log(w) if w >= 1 else w for f, w in features.items()}
+    norm = np.sqrt(sum(w * w for w in weighted.values()))
+    if not norm:
+        return {}
+    return {f: w / norm for f, w in weighted.items()}
+
+
+class TopicIndex:
+    """In-memory similarity index over card topics and summaries"""
+
+    def __init__(
+        self,
+        threshold: float = SIMILARITY_SETTINGS["threshold"],
+        max_df: float = SIMILARITY_SETTINGS["max_df"],
+        compact_fraction: float = SIMILARITY_SETTINGS["compact_fraction"],
+    ):
+        """
+        Args:
+            threshold: Minimum cosine similarity reported as a near-duplicate
+            max_df: Features present in more than this fraction of cards are
+                skipped at query time; they carry little signal and have the
+                longest postings
+            compact_fraction: Share of removed rows at which the postings
+                are rebuilt without them
+        """
+        self.threshold = threshold
+        self.max_df = max_df
+        self.compact_fraction = compact_fraction
+
+        self._postings: Dict[int, tuple] = {}
+        self._card_ids = array("q")
+        self._languages = array("b")
+        self._language_codes: Dict[str, int] = {}
+        self._active = array("b")
+        self._inactive = 0
+        self._rows: Dict[int, int] = {}
+        self._acronyms: Dict[tuple, int] = {}
+        self._card_acronyms: Dict[int, list] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def build(self, db):
+        """
+        Index every card stored in a CardDatabase
+
+        Args:
+            db: CardDatabase to read cards from
+        """
+        for card in db.iter_cards():
+            self.add(card["id"], card["topic"], card["summary"], card["language"])
+        logger.info(f"Topic index built with {len(self)} cards")
+
+    def add(self, card_id: int, topic: str, summary: str, language: str):
+        """Add (or replace) a card in the index"""
+        features = _topic_features(topic) + _summary_features(summary)
+        vector = _normalize(features)
+        acronym_keys = [(language, a) for a in _acronyms(topic, summary)]
+
+        with self._lock:
+            if card_id in self._rows:
+                self._remove_locked(card_id)
+
+            for key in acronym_keys:
+                self._acronyms[key] = card_id
+            self._card_acronyms[card_id] = acronym_keys
+
+            row = len(self._card_ids)
+            self._card_ids.append(card_id)
+            self._languages.append(
+                self._language_codes.setdefault(language, len(self._language_codes))
+            )
+            self._active.append(1)
+            self._rows[card_id] = row
+
+            for feature, weight in vector.items():
+                postings = self._postings.get(feature)
+                if postings is None:
+                    postings = self._postings[feature] = (array("i"), array("f"))
+                postings[0].append(row)
+                postings[1].append(weight)
+
+    def remove(self, card_id: int):
+        """Remove a card from the index"""
+        with self._lock:
+            self._remove_locked(card_id)
+
+    def _remove_locked(self, card_id: int):
+        row = self._rows.pop(card_id, None)
+        if row is not None:
+            self._active[row] = 0
+            self._inactive += 1
+        for key in self._card_acronyms.pop(card_id, []):
+            if self._acronyms.get(key) == card_id:
+                del self._acronyms[key]
+
+        if self._inactive > self.compact_fraction * len(self._card_ids):
+            self._compact_locked()
+
+    def _compact_locked(self):
+        """Rebuild the postings and row arrays without the removed rows"""
+        active = np.frombuffer(self._active, dtype=np.int8).astype(bool)
+        new_rows = (np.cumsum(active) - 1).astype(np.int32)
+
+        for feature, (rows, weights) in list(self._postings.items()):
+            old_rows = np.frombuffer(rows, dtype=np.int32)
+            keep = active[old_rows]
+            if not keep.any():
+                del self._postings[feature]
+                continue
+            compacted = (array("i"), array("f"))
+            compacted[0].frombytes(new_rows[old_rows[keep]].tobytes())
+            compacted[1].frombytes(np.frombuffer(weights, dtype=np.float32)[keep].tobytes())
+            self._postings[feature] = compacted
+
+        self._card_ids = array("q", (c for c, a in zip(self._card_ids, active) if a))
+        self._languages = array("b", (code for code, a in zip(self._languages, active) if a))
+        self._active = array("b", [1] * len(self._card_ids))
+        self._rows = {card_id: int(new_rows[row]) for card_id, row in self._rows.items()}
+        logger.info(f"Topic index compacted: {self._inactive} removed rows dropped")
+        self._inactive = 0
+
+    def clear(self):
+        """Remove every card from the index"""
+        with self._lock:
+            self._postings.clear()
+            self._card_ids = array("q")
+            self._languages = array("b")
+            self._active = array("b")
+            self._inactive = 0
+            self._rows.clear()
+            self._acronyms.clear()
+            self._card_acronyms.clear()
+
+    def find_similar(self, topic: str, language: str) -> Optional[Dict]:
+        """
+        Find the most similar stored card, preferring the same language
+
+        A card in another language is only returned when no card in the
+        requested language reaches the threshold.
+
+        Args:
+            topic: Topic requested by the user
+            language: Language code (pt/en)
+
+        Returns:
+            Dictionary with card_id, score and the card's language, or None
+            if no card reaches the similarity threshold (acronym matches
+            report a score of 1.0)
+        """
+        query = _normalize(_topic_features(topic))
+        if not query:
+            return None
+
+        words = _words(topic)
+        with self._lock:
+            if len(words) == 1:
+                for card_language in sorted(self._language_codes, key=lambda name: name != language):
+                    card_id = self._acronyms.get((card_language, words[0]))
+                    if card_id is not None:
+                        return {"card_id": card_id, "score": 1.0, "language": card_language}
+
+            n_rows = len(self._card_ids)
+            if not n_rows:
+                return None
+
+            max_postings = max(MIN_PRUNED_POSTINGS, int(self.max_df * len(self._rows)))
+            rows, weights = [], []
+            for feature, query_weight in query.items():
+                postings = self._postings.get(feature)
+                if postings is None or len(postings[0]) > max_postings:
+                    continue
+                rows.append(np.frombuffer(postings[0], dtype=np.int32))
+                weights.append(np.frombuffer(postings[1], dtype=np.float32) * query_weight)
+
+            if not rows:
+                return None
+
+            scores = np.bincount(
+                np.concatenate(rows), weights=np.concatenate(weights), minlength=n_rows
+            )
+            scores *= np.frombuffer(self._active, dtype=np.int8)
+            same_language = (
+                np.frombuffer(self._languages, dtype=np.int8)
+                == self._language_codes.get(language, -1)
+            )
+
+            row = int(np.argmax(scores * same_language))
+            if scores[row] < self.threshold or not same_language[row]:
+                row = int(np.argmax(scores))
+            if scores[row] < self.threshold:
+                return None
+
+            languages = {code: name for name, code in self._language_codes.items()}
+            return {
+                "card_id": self._card_ids[row],
+                "score": float(scores[row]),
+                "language": languages[self._languages[row]],
+            }
+
+    # CardDatabase listener hooks
+
+    def on_card_saved(self, card: Dict):
+        self.add(card["id"], card["topic"], card["summary"], card["language"])
+
+    def on_card_deleted(self, card_id: int):
+        self.remove(card_id)
+
+    def on_cards_cleared(self):
+        self.clear()
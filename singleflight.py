@@ -0,0 +1,154 @@
+"""
+Single-Flight Module - Coalescing of Identical In-Flight Work
+
+When several callers ask for the same thing at the same time (e.g. a class
+clicking the same example topic), only the first one does the work; the
+others wait for its result. Errors raised by the work are re-raised in
+every waiter, and waiters give up after a timeout.
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from config import SINGLE_FLIGHT_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+
+class Flight:
+    """A unit of work in progress, shared by its leader and waiters"""
+
+    def __init__(self):
+        self.waiters = 0
+        self._done = threading.Event()
+        self._result = None
+        self._error = None
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: float = None) -> Any:
+        """
+        Block until the leader finishes
+
+        Args:
+            timeout: Seconds to wait (None waits forever)
+
+        Returns:
+            The leader's result
+
+        Raises:
+            TimeoutError: If the leader didn't finish in time
+            Exception: Whatever the leader raised
+        """
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"Timed out after {timeout}s waiting for identical request")
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+class SingleFlight:
+    """Process-wide registry of in-flight work keyed by request identity"""
+
+    def __init__(self, timeout: float = SINGLE_FLIGHT_SETTINGS["timeout"]):
+        """
+        Args:
+            timeout: Default seconds a waiter blocks before giving up
+        """
+        self.timeout = timeout
+        self.leaders = 0
+        self.coalesced = 0
+        self.timeouts = 0
+
+        self._flights: Dict[Hashable, Flight] = {}
+        self._lock = threading.Lock()
+
+    def join(self, key: Hashable) -> Tuple[Flight, bool]:
+        """
+        Join the flight for a key, starting one if none is in progress
+
+        The leader (second value True) must report its outcome with
+        ``finish``, otherwise waiters block until they time out.
+
+        Returns:
+            Tuple of (flight, is_leader)
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.waiters += 1
+                self.coalesced += 1
+                return flight, False
+
+            flight = self._flights[key] = Flight()
+            self.leaders += 1
+            return flight, True
+
+    def finish(self, key: Hashable, flight: Flight, result: Any = None, error: BaseException = None):
+        """
+        Publish the leader's outcome and wake up every waiter
+
+        Args:
+            key: Key the flight was joined with
+            flight: Flight returned by ``join``
+            result: Result handed to the waiters
+            error: Exception re-raised in the waiters instead of a result
+        """
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight._result = result
+        flight._error = error
+        flight._done.set()
+        if flight.waiters:
+            logger.info(f"Shared one result with {flight.waiters} identical request(s)")
+
+    def wait(self, flight: Flight, timeout: float = None) -> Any:
+        """Wait on a joined flight, counting timeouts (see ``Flight.wait``)"""
+        try:
+            return flight.wait(self.timeout if timeout is None else timeout)
+        except TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            raise
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: float = None) -> Any:
+        """
+        Run ``fn`` once for all concurrent callers with the same key
+
+        Args:
+            key: Identity of the request
+            fn: Work to run if no identical request is in progress
+            timeout: Seconds to wait for an identical request in progress
+
+        Returns:
+            The result of ``fn``, computed here or by the leader
+        """
+        flight, is_leader = self.join(key)
+        if not is_leader:
+            return self.wait(flight, timeout)
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self.finish(key, flight, error=e)
+            raise
+        self.finish(key, flight, result)
+        return result
+
+    def get_statistics(self) -> Dict:
+        """
+        Get coalescing counters
+
+        Returns:
+            Dictionary with leaders, coalesced, timeouts and in_flight counts
+        """
+        with self._lock:
+            return {
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "timeouts": self.timeouts,
+                "in_flight": len(self._flights),
+            }
@@ -0,0 +1,173 @@
+"""
+Startup Benchmark
+
+Measures the app's cold start: time to first render of app.py and a
+per-module import time breakdown (from ``python -X importtime``). Each run
+uses a fresh interpreter, so nothing is already imported or cached.
+
+Runs happen in a temporary working directory (so the app creates its
+databases and metrics files there) with JOB_WORKERS=0, so no generation
+workers are spawned and the timings measure the render alone.
+
+Usage:
+    python startup_benchmark.py --runs 5 --top 15
+    python startup_benchmark.py --output startup.json --max-first-render 3.0
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+from utils import percentile
+
+logger = logging.getLogger(__name__)
+
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def parse_importtime(stderr: str) -> list[dict]:
+    """
+    Parses ``-X importtime`` output
+
+    Returns:
+        One dictionary per imported module with its self and cumulative
+        time (seconds) and nesting depth (0 = imported directly)
+    """
+    modules = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            modules.append(
+                {
+                    "module": module,
+                    "self": int(self_us) / 1e6,
+                    "cumulative": int(cumulative_us) / 1e6,
+                    "depth": len(indent) // 2,
+                }
+            )
+    return modules
+
+
+def run_child(app_path: str) -> dict:
+    """Renders the app once in this process and reports the timing (child mode)."""
+    start = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(app_path, default_timeout=60).run()
+    first_render = time.perf_counter() - start
+
+    return {"first_render": first_render, "exceptions": len(app.exception)}
+
+
+def measure(app_path: str) -> tuple[dict, list[dict]]:
+    """Runs one cold start in a fresh interpreter with import timing enabled."""
+    with tempfile.TemporaryDirectory() as tmp:
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                "-X",
+                "importtime",
+                os.path.abspath(__file__),
+                "--child",
+                os.path.abspath(app_path),
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            cwd=tmp,
+            env={**os.environ, "JOB_WORKERS": "0", "METRICS_PORT": ""},
+            start_new_session=hasattr(os, "killpg"),
+        )
+        try:
+            stdout, stderr = process.communicate()
+        finally:
+            # Stop anything the child left running before its files go away
+            if hasattr(os, "killpg"):
+                try:
+                    os.killpg(process.pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, process.args, stdout, stderr)
+    result = json.loads(stdout.strip().splitlines()[-1])
+    return result, parse_importtime(stderr)
+
+
+def parse_args(argv=None):
+    """Parses command-line arguments."""
+    parser = argparse.ArgumentParser(description="Benchmark the app's cold start.")
+    parser.add_argument("--app", default="app.py", help="Streamlit script to render")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15, help="Modules listed in the breakdown")
+    parser.add_argument("--output", help="Also write the JSON results to this file")
+    parser.add_argument(
+        "--max-first-render",
+        type=float,
+        help="Exit with status 1 if the median first render exceeds this (s)",
+    )
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Runs the startup benchmark and prints machine-readable results."""
+    args = parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_child(args.child)))
+        return 0
+
+    logging.basicConfig(level=logging.WARNING)
+
+    renders, import_totals, breakdown = [], [], {}
+    exceptions = 0
+    for _ in range(args.runs):
+        result, modules = measure(args.app)
+        renders.append(result["first_render"])
+        exceptions += result["exceptions"]
+
+        top_level = [m for m in modules if m["depth"] == 0]
+        import_totals.append(sum(m["cumulative"] for m in top_level))
+        for m in top_level:
+            breakdown.setdefault(m["module"], []).append(m["cumulative"])
+
+    slowest = sorted(
+        ({"module": name, "cumulative": percentile(times, 50)} for name, times in breakdown.items()),
+        key=lambda m: m["cumulative"],
+        reverse=True,
+    )[: args.top]
+
+    results = {
+        "runs": args.runs,
+        "first_render": {
+            "p50": percentile(renders, 50),
+            "min": min(renders),
+            "max": max(renders),
+        },
+        "import_time_total": percentile(import_totals, 50),
+        "render_exceptions": exceptions,
+        "slowest_imports": slowest,
+    }
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+
+    if args.max_first_render is not None and results["first_render"]["p50"] > args.max_first_render:
+        logger.error(f"First render p50 above {args.max_first_render}s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
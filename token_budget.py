@@ -0,0 +1,114 @@
+"""
+Token Budget Module - Adaptive Per-Call Generation Limits
+
+The max_tokens slider is a ceiling, but the prompts ask for at most 150
+words and exactly 3 subtopics, so most of that budget is never used and a
+runaway output only adds latency. TokenBudget sizes each call from the
+outputs previously saved for the same model and language: a high
+percentile of their length, converted to tokens and given some headroom.
+"""
+
+import logging
+import math
+import threading
+import time
+from typing import Dict, Tuple
+
+from config import TOKEN_BUDGET_SETTINGS
+from database import CardDatabase
+from utils import percentile
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBudget:
+    """Process-wide per-model, per-language max_tokens for each generation call"""
+
+    def __init__(
+        self,
+        db: CardDatabase,
+        window: int = TOKEN_BUDGET_SETTINGS["window"],
+        min_samples: int = TOKEN_BUDGET_SETTINGS["min_samples"],
+        pct: float = TOKEN_BUDGET_SETTINGS["percentile"],
+        headroom: float = TOKEN_BUDGET_SETTINGS["headroom"],
+        refresh_seconds: float = TOKEN_BUDGET_SETTINGS["refresh_seconds"],
+    ):
+        """
+        Args:
+            db: Database holding the previously generated cards
+            window: Number of recent cards sampled per model and language
+            min_samples: Cards needed before the history replaces the defaults
+            pct: Percentile of the output lengths the budget covers
+            headroom: Multiplier applied on top of that percentile
+            refresh_seconds: How long a computed budget is reused
+        """
+        self.db = db
+        self.window = window
+        self.min_samples = min_samples
+        self.pct = pct
+        self.headroom = headroom
+        self.refresh_seconds = refresh_seconds
+
+        self._budgets: Dict[Tuple[str, str], Tuple[float, Dict[str, int]]] = {}
+        self._lock = threading.Lock()
+
+    def _estimate(self, model: str, language: str) -> Dict[str, int]:
+        """Compute uncapped summary and subtopics budgets from the history"""
+        rows = self.db.get_output_lengths(model, language, self.window)
+        if len(rows) < self.min_samples:
+            return dict(TOKEN_BUDGET_SETTINGS["defaults"])
+
+        # Calibrate characters to tokens only on cards whose tokens match
+        # their text: a cached half, a hedged duplicate or a failover adds
+        # tokens for text the card doesn't hold (or none for text it does).
+        # Combined-mode cards can't be told apart from half-cached ones.
+        calibration = [
+            (summary + subtopics, tokens)
+            for summary, subtopics, tokens, fresh in rows
+            if tokens and fresh
+        ]
+        chars = sum(chars for chars, _ in calibration)
+        tokens = sum(tokens for _, tokens in calibration)
+        tokens_per_char = tokens / chars if chars else TOKEN_BUDGET_SETTINGS["tokens_per_char"]
+
+        return {
+            kind: math.ceil(
+                percentile([row[i] for row in rows], self.pct) * tokens_per_char * self.headroom
+            )
+            for i, kind in enumerate(("summary", "subtopics"))
+        }
+
+    def limits(self, model: str, language: str, max_tokens: int) -> Dict[str, int]:
+        """
+        Get the max_tokens to request for each kind of call
+
+        Args:
+            model: Model name
+            language: Language code
+            max_tokens: The user's ceiling, which no budget exceeds
+
+        Returns:
+            Dictionary with "summary", "subtopics" and "card" (combined mode)
+            token limits
+        """
+        key = (model, language)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._budgets.get(key)
+        if cached and now - cached[0] < self.refresh_seconds:
+            budget = cached[1]
+        else:
+            budget = self._estimate(model, language)
+            with self._lock:
+                self._budgets[key] = (now, budget)
+            logger.info(f"Token budget for {model} ({language}): {budget}")
+
+        minimums = TOKEN_BUDGET_SETTINGS["min_tokens"]
+        limits = {
+            kind: min(max_tokens, max(minimums[kind], tokens)) for kind, tokens in budget.items()
+        }
+        limits["card"] = min(
+            max_tokens,
+            limits["summary"] + limits["subtopics"] + TOKEN_BUDGET_SETTINGS["card_overhead"],
+        )
+        return limits
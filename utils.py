@@ -5,8 +5,14 @@ This module contains helper functions used across the application,
 such as logging configuration and response parsing.
 """
 
+import hashlib
+import json
 import logging
+import re
 import streamlit as st
+from collections.abc import Iterable, Iterator
+
+from config import AUTO_MODEL, DEFAULT_BACKEND, MODELS
 
 
 def setup_logging():
@@ -23,6 +29,27 @@ def setup_logging():
     logging.getLogger("httpx").setLevel(logging.WARNING)  # Quieten noisy libraries
 
 
+def clean_subtopic_line(line: str) -> str | None:
+    """
+    Cleans one line of a subtopics response.
+
+    Args:
+        line (str): A raw line of LLM output.
+
+    Returns:
+        str | None: The subtopic without numbering or bullets, or None if
+        the line is too short to be a subtopic.
+    """
+    # Remove common numbering patterns (e.g., "1.", "2.", "-", "*")
+    # This uses lstrip to remove leading characters
+    cleaned_line = line.strip().lstrip("0123456789.-*• ")
+
+    # Quality filter: ensure the line is not empty and has substance
+    if cleaned_line and len(cleaned_line) > 10:
+        return cleaned_line
+    return None
+
+
 def parse_subtopics_response(text: str) -> list[str]:
     """
     Processes and cleans the raw LLM response for subtopics.
@@ -36,21 +63,164 @@ def parse_subtopics_response(text: str) -> list[str]:
     if not text:
         return []
 
-    # Split by lines and strip whitespace
-    lines = [line.strip() for line in text.split("\n") if line.strip()]
+    # Return only the first 3 relevant items
+    return list(iter_subtopics([text]))
 
-    cleaned_lines = []
-    for line in lines:
-        # Remove common numbering patterns (e.g., "1.", "2.", "-", "*")
-        # This uses lstrip to remove leading characters
-        cleaned_line = line.lstrip("0123456789.-*• ")
 
-        # Quality filter: ensure the line is not empty and has substance
-        if cleaned_line and len(cleaned_line) > 10:
-            cleaned_lines.append(cleaned_line)
+def iter_subtopics(chunks: Iterable[str], limit: int = 3) -> Iterator[str]:
+    """
+    Parses a streamed subtopics response incrementally.
 
-    # Return only the first 3 relevant items
-    return cleaned_lines[:3]
+    Each cleaned subtopic is yielded as soon as its line is complete (the
+    last line when the stream ends). Once ``limit`` subtopics were found
+    the chunks are no longer read, so the caller can close the upstream
+    stream instead of paying for tokens that would be discarded.
+
+    Args:
+        chunks (Iterable[str]): Text chunks as they arrive from the model.
+        limit (int): Number of subtopics to parse before stopping.
+
+    Yields:
+        str: Cleaned subtopics, in order.
+    """
+    found = 0
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            subtopic = clean_subtopic_line(line)
+            if subtopic:
+                yield subtopic
+                found += 1
+                if found >= limit:
+                    return
+
+    if found < limit:
+        subtopic = clean_subtopic_line(buffer)
+        if subtopic:
+            yield subtopic
+
+
+def parse_card_response(text: str) -> tuple[str, list[str]]:
+    """
+    Processes the raw LLM response of a combined card generation.
+
+    The expected format is a JSON object with "summary" and "subtopics" keys,
+    but models often wrap it in code fences, add commentary or emit slightly
+    broken JSON, so each stage falls back to a more lenient one.
+
+    Args:
+        text (str): The raw text output from the LLM.
+
+    Returns:
+        tuple[str, list[str]]: The summary and a list of up to 3 cleaned subtopics.
+    """
+    if not text:
+        return "", []
+
+    # 1. Strict JSON between the first "{" and the last "}"
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
+        try:
+            data = json.loads(text[start : end + 1], strict=False)
+            if isinstance(data, dict):
+                summary = str(data.get("summary", "")).strip()
+                subtopics = data.get("subtopics", [])
+                if isinstance(subtopics, str):
+                    subtopics = subtopics.split("\n")
+                return summary, parse_subtopics_response(
+                    "\n".join(str(item) for item in subtopics)
+                )
+        except json.JSONDecodeError:
+            pass
+
+    # 2. Individual fields from malformed JSON
+    summary_match = re.search(r'"summary"\s*:\s*"((?:[^"\\]|\\.)*)"', text, re.DOTALL)
+    subtopics_match = re.search(r'"subtopics"\s*:\s*\[(.*?)\]', text, re.DOTALL)
+    if summary_match:
+        summary = summary_match.group(1).replace('\\"', '"').replace("\\n", "\n")
+        items = []
+        if subtopics_match:
+            items = re.findall(r'"((?:[^"\\]|\\.)*)"', subtopics_match.group(1))
+        return summary.strip(), parse_subtopics_response("\n".join(items))
+
+    # 3. Plain text: trailing numbered/bulleted lines are the subtopics
+    lines = [line.strip() for line in text.strip().split("\n")]
+    split_at = len(lines)
+    while split_at > 0 and (
+        not lines[split_at - 1] or re.match(r"^(\d+[.)]|[-*•])\s", lines[split_at - 1])
+    ):
+        split_at -= 1
+    summary = "\n".join(lines[:split_at]).strip()
+    return summary, parse_subtopics_response("\n".join(lines[split_at:]))
+
+
+def normalize_topic(topic: str) -> str:
+    """
+    Normalizes a topic string for comparisons and lookups.
+
+    Args:
+        topic (str): The raw topic entered by the user.
+
+    Returns:
+        str: The topic casefolded with collapsed whitespace.
+    """
+    return " ".join(topic.casefold().split())
+
+
+def token_fingerprint(token: str) -> str:
+    """
+    Identifies an API token without revealing it.
+
+    Args:
+        token (str): The API token.
+
+    Returns:
+        str: A short SHA-256 digest of the token, safe to store.
+    """
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+
+
+def requires_api_token(model_name: str) -> bool:
+    """
+    Checks whether generating with a model needs the HuggingFace token.
+
+    Models served by another backend (e.g. a local OpenAI-compatible
+    server) don't; automatic selection may route to any model.
+
+    Args:
+        model_name (str): A key of MODELS, or AUTO_MODEL.
+
+    Returns:
+        bool: True if the model (or any model, for AUTO_MODEL) uses the
+        HuggingFace backend.
+    """
+    names = MODELS.keys() if model_name == AUTO_MODEL else [model_name]
+    return any(
+        MODELS[name].get("backend", DEFAULT_BACKEND) == "huggingface" for name in names
+    )
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """
+    Computes a percentile with linear interpolation between closest ranks.
+
+    Args:
+        values (list[float]): The observed values, in any order.
+        pct (float): The percentile to compute, between 0 and 100.
+
+    Returns:
+        float: The percentile value, or 0.0 when there are no values.
+    """
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
 
 
 def load_css(file_name: str):
@@ -0,0 +1,424 @@
+"""
+Generation Worker
+
+Claims card generation jobs (and low priority subtopic prefetches) from the
+job queue (see job_queue.py) and runs them outside the Streamlit process, so generation throughput scales with
+the number of workers rather than with open browser tabs. Any number of
+worker processes, on any number of terminals, can share one database.
+
+Usage:
+    python worker.py --processes 4
+"""
+
+import argparse
+import itertools
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from typing import Callable, Dict, Tuple
+
+from dotenv import load_dotenv
+
+from config import (
+    AUTO_MODEL,
+    JOB_SETTINGS,
+    METRICS_SETTINGS,
+    ROUTING_SETTINGS,
+    DEFAULT_GENERATION_MODE,
+    TOKEN_BUDGET_SETTINGS,
+)
+from database import CardDatabase
+from job_queue import JobQueue, LeaseLostError
+from cache import ResponseCache
+from metrics import export_worker_textfile
+from utils import setup_logging, token_fingerprint
+
+logger = logging.getLogger(__name__)
+
+_router = None
+_budget = None
+
+
+def _get_router():
+    """Returns this process's router for the auto model option."""
+    global _router
+    if _router is None:
+        from routing import ModelRouter
+
+        _router = ModelRouter()
+    return _router
+
+
+def _get_budget(db: CardDatabase):
+    """Returns this process's adaptive token budget."""
+    global _budget
+    if _budget is None:
+        from token_budget import TokenBudget
+
+        _budget = TokenBudget(db)
+    return _budget
+
+
+def _generate(
+    payload: Dict,
+    db: CardDatabase,
+    cache: ResponseCache,
+    report_progress: Callable,
+    attempt: int,
+) -> Tuple[str, str, list, Dict]:
+    """
+    Generates the content of one card, as described by a job payload
+
+    Returns:
+        Tuple of (model that answered, summary, subtopics, usage)
+    """
+    from llm_services import GenerationUsage, initialize_model, generate_card_content
+
+    model_name = payload["model"]
+    # Tokens never travel in the payload; see JobQueue.claim
+    api_token = os.getenv("HUGGINGFACEHUB_API_TOKEN", "")
+    temperature = payload["temperature"]
+    max_tokens = payload["max_tokens"]
+    start = time.perf_counter()
+    routed_calls = itertools.count()
+    # Hedged calls run side by side; the first one to report owns the job's
+    # progress and partial result, so the UI doesn't mix their texts. A
+    # losing hedge keeps running in the background but stops reporting.
+    reporter = {"call": None, "finished": False}
+    reporter_lock = threading.Lock()
+
+    def generate_on(routed_model):
+        call = next(routed_calls)
+        # Each routed call keeps its own usage; only the answer's is stored
+        usage = GenerationUsage(start)
+        partial = {"summary": "", "subtopics": []}
+        lock = threading.Lock()
+        last_report = [0.0]
+
+        def publish(progress=None, force=True):
+            with reporter_lock:
+                if reporter["call"] is None:
+                    reporter["call"] = call
+                if reporter["call"] != call or reporter["finished"]:
+                    return
+            # Summary tokens arrive far faster than the UI polls, so they are
+            # written at most every stream_interval seconds
+            with lock:
+                now = time.monotonic()
+                if not force and now - last_report[0] < JOB_SETTINGS["stream_interval"]:
+                    return
+                last_report[0] = now
+                snapshot = {**partial, "subtopics": list(partial["subtopics"])}
+            report_progress(progress, snapshot)
+
+        def on_summary_token(chunk):
+            with lock:
+                partial["summary"] += chunk
+            publish(force=False)
+
+        def on_subtopic(subtopic):
+            with lock:
+                partial["subtopics"].append(subtopic)
+            publish()
+
+        token_limits = None
+        if TOKEN_BUDGET_SETTINGS["enabled"]:
+            token_limits = _get_budget(db).limits(routed_model, payload["language"], max_tokens)
+        try:
+            summary, subtopics = generate_card_content(
+                initialize_model(routed_model, api_token, temperature, max_tokens),
+                payload["topic"],
+                payload["language"],
+                on_progress=lambda done, total: publish(done / total),
+                cache=cache,
+                use_cache=payload.get("use_cache", True),
+                mode=payload.get("mode", DEFAULT_GENERATION_MODE),
+                usage=usage,
+                token_limits=token_limits,
+                on_subtopic=on_subtopic,
+                on_summary_token=on_summary_token,
+            )
+            return summary, subtopics, usage
+        except Exception:
+            # Hand the partial result over to the calls still running
+            with reporter_lock:
+                if reporter["call"] == call:
+                    reporter["call"] = None
+                    report_progress(0, {"summary": "", "subtopics": []})
+            raise
+
+    if model_name == AUTO_MODEL:
+        model_name, (summary, subtopics, usage) = _get_router().run(
+            generate_on, hedge=payload.get("hedge", ROUTING_SETTINGS["hedge"])
+        )
+        with reporter_lock:
+            reporter["finished"] = True
+    else:
+        summary, subtopics, usage = generate_on(model_name)
+
+    # Earlier job attempts, failovers and hedged duplicates are all retries;
+    # next() returns the number of routed calls made
+    usage.add_retry(attempt - 1 + next(routed_calls) - 1)
+    return model_name, summary, subtopics, usage.as_dict()
+
+
+def generate_card_job(
+    payload: Dict,
+    db: CardDatabase,
+    cache: ResponseCache,
+    report_progress: Callable,
+    attempt: int = 1,
+) -> Dict:
+    """
+    Generates and saves one card
+
+    Args:
+        payload: Job payload with topic, model, language, temperature,
+            max_tokens, mode, use_cache and optionally token_ref and hedge
+        db: Database the card is saved to
+        cache: Response cache shared by this worker's jobs
+        report_progress: Called with the fraction of the card generated (or
+            None) and optionally a partial result with the summary streamed
+            and the subtopics parsed so far; returns False once the job's
+            lease was lost
+        attempt: Which attempt at the job this is; earlier ones count as
+            retries in the card's usage
+
+    Returns:
+        Dictionary with the saved card's ID, model and subtopics
+    """
+    model_name, summary, subtopics, usage = _generate(
+        payload, db, cache, report_progress, attempt
+    )
+
+    # Renewing the lease leaves a full visibility timeout for the insert; a
+    # worker whose lease expired mid-generation must not save a second card
+    if not report_progress(None):
+        raise LeaseLostError(f"Lost the lease before saving '{payload['topic']}'")
+
+    card_id = db.save_card(
+        topic=payload["topic"],
+        summary=summary,
+        subtopics=subtopics,
+        model=model_name,
+        language=payload["language"],
+        temperature=payload["temperature"],
+        max_tokens=payload["max_tokens"],
+        usage=usage,
+    )
+    return {"card_id": card_id, "model": model_name, "subtopics": subtopics}
+
+
+def prefetch_card_job(
+    payload: Dict,
+    db: CardDatabase,
+    cache: ResponseCache,
+    report_progress: Callable,
+    attempt: int = 1,
+) -> Dict:
+    """
+    Generates one card speculatively, without saving it
+
+    The content is returned as the job's result, where the session that
+    queued it (see prefetch.py) picks it up if the user explores the topic.
+
+    Args:
+        payload: Same payload as generate_card_job
+        db: Database holding the job queue
+        cache: Response cache shared by this worker's jobs
+        report_progress: Called with the fraction of the card generated
+        attempt: Which attempt at the job this is
+
+    Returns:
+        Dictionary with the model, summary, subtopics and usage
+    """
+    model_name, summary, subtopics, usage = _generate(
+        payload, db, cache, lambda progress, partial=None: report_progress(progress), attempt
+    )
+    return {"model": model_name, "summary": summary, "subtopics": subtopics, "usage": usage}
+
+
+JOB_HANDLERS = {
+    "generate_card": generate_card_job,
+    "prefetch_card": prefetch_card_job,
+}
+
+
+def _hold_lease(jobs: JobQueue, job_id: int, worker_id: str, done: threading.Event):
+    """Renews a job's lease until done is set, so long generations keep it."""
+    while not done.wait(JOB_SETTINGS["heartbeat_interval"]):
+        if not jobs.renew(job_id, worker_id):
+            logger.warning(f"Worker {worker_id} lost the lease on job {job_id}")
+            return
+
+
+def run_worker(
+    db_path: str,
+    worker_id: str,
+    poll_interval: float = JOB_SETTINGS["poll_interval"],
+    stop_event=None,
+    max_jobs: int = None,
+    token_ref: str = None,
+    metrics_dir: str = METRICS_SETTINGS["worker_dir"],
+):
+    """
+    Claims and runs jobs until stopped
+
+    The process's metrics are written to metrics_dir after every job, so
+    the app can show the stage timings and retries of its workers.
+
+    Args:
+        db_path: Card database holding the job queue
+        worker_id: Identifier recorded on claimed jobs
+        poll_interval: Seconds to wait when the queue is empty
+        stop_event: Event that ends the loop once set
+        max_jobs: Stop after this many jobs (for tests and benchmarks)
+        token_ref: Fingerprint of this process's API token, to serve only
+            the jobs submitted with it (None serves jobs without one)
+        metrics_dir: Directory of the per-worker metrics files ("" disables)
+    """
+    stop_event = stop_event or multiprocessing.Event()
+    db = CardDatabase(db_path)
+    jobs = JobQueue(db)
+    cache = ResponseCache()
+    processed = 0
+
+    logger.info(f"Worker {worker_id} started")
+    try:
+        while not stop_event.is_set() and (max_jobs is None or processed < max_jobs):
+            job = jobs.claim(worker_id, token_ref)
+            if job is None:
+                stop_event.wait(poll_interval)
+                continue
+
+            handler = JOB_HANDLERS.get(job["kind"])
+            logger.info(f"Worker {worker_id} running {job['kind']} job {job['id']}")
+            done = threading.Event()
+            threading.Thread(
+                target=_hold_lease,
+                args=(jobs, job["id"], worker_id, done),
+                name=f"lease-{job['id']}",
+                daemon=True,
+            ).start()
+            try:
+                if handler is None:
+                    raise ValueError(f"Unknown job kind: {job['kind']}")
+                result = handler(
+                    job["payload"],
+                    db,
+                    cache,
+                    # Bound now: a losing hedge may still report after this
+                    # loop has moved on to the next job
+                    lambda progress, partial=None, job_id=job["id"]: jobs.set_progress(
+                        job_id, worker_id, progress, partial
+                    ),
+                    attempt=job["attempts"],
+                )
+            except LeaseLostError as e:
+                logger.warning(f"Abandoning job {job['id']}: {e}")
+            except Exception as e:
+                logger.warning(f"Job {job['id']} attempt {job['attempts']} failed: {e}")
+                jobs.fail(job["id"], worker_id, str(e))
+            else:
+                jobs.complete(job["id"], worker_id, result)
+            finally:
+                done.set()
+                export_worker_textfile(worker_id, metrics_dir)
+            processed += 1
+    finally:
+        db.close()
+        logger.info(f"Worker {worker_id} stopped after {processed} jobs")
+
+
+def _worker_process(
+    db_path: str,
+    worker_id: str,
+    poll_interval: float,
+    stop_event,
+    token_ref: str = None,
+    metrics_dir: str = METRICS_SETTINGS["worker_dir"],
+):
+    """Entry point of a worker process."""
+    load_dotenv()
+    setup_logging()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    run_worker(
+        db_path, worker_id, poll_interval, stop_event, token_ref=token_ref, metrics_dir=metrics_dir
+    )
+
+
+def parse_args(argv=None):
+    """Parses command-line arguments."""
+    parser = argparse.ArgumentParser(description="Run card generation workers.")
+    parser.add_argument("--processes", type=int, default=max(1, JOB_SETTINGS["workers"]))
+    parser.add_argument("--db-path", default="cards_history.db")
+    parser.add_argument(
+        "--poll-interval", type=float, default=JOB_SETTINGS["poll_interval"]
+    )
+    parser.add_argument(
+        "--metrics-dir",
+        default=METRICS_SETTINGS["worker_dir"],
+        help="Directory each worker writes its metrics file to (\"\" disables)",
+    )
+    parser.add_argument(
+        "--dedicated-token",
+        action="store_true",
+        help="Only run jobs submitted with this process's HUGGINGFACEHUB_API_TOKEN "
+        "(the app starts such workers for tokens typed in the sidebar)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Starts a pool of worker processes and waits for them."""
+    load_dotenv()
+    setup_logging()
+    args = parse_args(argv)
+
+    token_ref = None
+    if args.dedicated_token:
+        token = os.getenv("HUGGINGFACEHUB_API_TOKEN", "")
+        if not token:
+            logger.error("--dedicated-token needs HUGGINGFACEHUB_API_TOKEN to be set")
+            return 1
+        token_ref = token_fingerprint(token)
+
+    stop_event = multiprocessing.Event()
+    prefix = f"{socket.gethostname()}-{os.getpid()}"
+    processes = [
+        multiprocessing.Process(
+            target=_worker_process,
+            args=(
+                args.db_path,
+                f"{prefix}-{i}",
+                args.poll_interval,
+                stop_event,
+                token_ref,
+                args.metrics_dir,
+            ),
+            name=f"worker-{i}",
+        )
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    def stop(signum, frame):
+        logger.info("Stopping workers...")
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for process in processes:
+        process.join()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())